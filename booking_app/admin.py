@@ -1,12 +1,109 @@
+from django.conf import settings
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections, transaction
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .models import (
+    ArchivedBooking,
+    BookingRequest,
+    CalendarSubscription,
+    Client,
+    Groomer,
+    Job,
+    NewClientApplication,
+    OutboxMessage,
+    Service,
+    ZipCentroid,
+    new_feed_token,
+    normalize_phone,
+)
+from .totals import TOTAL_FIELDS
+
+
+def estimated_count(model, using):
+    """The planner's row estimate for `model`'s table, or None if there isn't one."""
+    connection = connections[using]
+    table = model._meta.db_table
+    if connection.vendor == "postgresql":
+        sql, params = "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [table]
+    elif connection.vendor == "mysql":
+        sql = "SELECT table_rows FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s"
+        params = [table]
+    elif connection.vendor == "sqlite":
+        # Filled in by ANALYZE; the first number is the table's row count.
+        sql, params = "SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [table]
+    else:
+        return None
+
+    try:
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+    except DatabaseError:
+        # e.g. sqlite_stat1 doesn't exist until the first ANALYZE.
+        return None
+    if row is None or row[0] is None:
+        return None
+    estimate = int(str(row[0]).split()[0])
+    return estimate if estimate >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Use the table estimate instead of COUNT(*) for big, unfiltered changelists.
+
+    Filtered or searched lists, and tables under ADMIN_ESTIMATED_COUNT_ABOVE
+    rows, still get an exact count.
+    """
+
+    @cached_property
+    def count(self):
+        qs = self.object_list
+        if hasattr(qs, "query") and not qs.query.where:
+            estimate = estimated_count(qs.model, qs.db)
+            if estimate is not None and estimate >= getattr(settings, "ADMIN_ESTIMATED_COUNT_ABOVE", 100000):
+                return estimate
+        return super().count
+
+
+def phone_digits(search_term):
+    """Digits of a search term that looks like a phone number, else ""."""
+    digits = normalize_phone(search_term)
+    if len(digits) >= 7 and not any(ch.isalpha() for ch in search_term):
+        return digits
+    return ""
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Changelist settings for tables that grow without bound."""
+
+    paginator = EstimatedCountPaginator
+    # Skips the second COUNT(*) behind "N results (M total)".
+    show_full_result_count = False
+    # Lookup path to the client's phone, searched by exact (indexed) match.
+    phone_field = None
+    # Subclasses search with "^" (prefix) and "=" lookups only: migration 0025
+    # indexes those columns for each backend's case-insensitive LIKE.
+
+    def get_search_results(self, request, queryset, search_term):
+        # Client.save() stores phones as digits (migration 0024 converted older
+        # rows), so "(312) 555-0100" is an exact lookup on the phone index
+        # rather than a LIKE scan over every search field.
+        digits = phone_digits(search_term) if self.phone_field else ""
+        if digits:
+            return queryset.filter(**{self.phone_field: digits}), False
+        return super().get_search_results(request, queryset, search_term)
 
-from .models import BookingRequest, Client, NewClientApplication, Service
 
 @admin.register(Client)
-class ClientAdmin(admin.ModelAdmin):
-    list_display = ("full_name", "phone", "is_active")
+class ClientAdmin(LargeTableAdmin):
+    list_display = ("full_name", "phone", "email", "is_active")
     list_filter = ("is_active",)
-    search_fields = ("full_name", "phone")
+    search_fields = ("^full_name", "^email")
+    search_help_text = "Name or email prefix, or a phone number."
+    phone_field = "phone"
     actions = ("mark_active", "mark_inactive")
 
     @admin.action(description="Mark selected clients as Active")
@@ -24,12 +121,51 @@ class ServiceAdmin(admin.ModelAdmin):
     search_fields = ("name",)
 
 
+@admin.register(Groomer)
+class GroomerAdmin(admin.ModelAdmin):
+    list_display = ("name", "van_name", "is_active")
+    list_filter = ("is_active",)
+    search_fields = ("name", "van_name")
+
+
+@admin.register(ZipCentroid)
+class ZipCentroidAdmin(admin.ModelAdmin):
+    list_display = ("zip_code", "latitude", "longitude")
+    search_fields = ("zip_code",)
+
+
 @admin.register(BookingRequest)
-class BookingRequestAdmin(admin.ModelAdmin):
-    list_display = ("client", "pet_name", "status", "created_at")
-    list_filter = ("status",)
-    search_fields = ("client__full_name", "pet_name", "client__phone")
+class BookingRequestAdmin(LargeTableAdmin):
+    list_display = ("client", "pet_name", "groomer", "status", "scheduled_start", "created_at")
+    list_filter = ("status", "groomer")
+    list_select_related = ("client", "groomer")
+    date_hierarchy = "scheduled_start"
+    search_fields = ("^client__full_name", "^pet_name", "=zip_code")
+    search_help_text = "Client or pet name prefix, zip code, or the client's phone number."
+    phone_field = "client__phone"
+    autocomplete_fields = ("client",)
+    raw_id_fields = ("created_by",)
     filter_horizontal = ("services",)
+    # Derived from `services` by signals.
+    readonly_fields = TOTAL_FIELDS
+
+
+@admin.register(ArchivedBooking)
+class ArchivedBookingAdmin(LargeTableAdmin):
+    """Read-only view of bookings moved out by `manage.py archive_bookings`."""
+
+    list_display = ("client", "pet_name", "status", "scheduled_start", "archived_at")
+    list_filter = ("status",)
+    search_fields = ("^client__full_name", "^pet_name", "=zip_code")
+    phone_field = "client__phone"
+    list_select_related = ("client",)
+    date_hierarchy = "scheduled_start"
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
 
 
 @admin.register(NewClientApplication)
@@ -76,4 +212,55 @@ class NewClientApplicationAdmin(admin.ModelAdmin):
                 )
             },
         ),
-    )
\ No newline at end of file
+    )
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("name", "status", "attempts", "run_after", "created_at", "finished_at")
+    list_filter = ("status", "name")
+    readonly_fields = ("attempts", "locked_by", "locked_at", "last_error", "created_at", "finished_at")
+    actions = ("retry_now",)
+
+    @admin.action(description="Retry selected jobs now")
+    def retry_now(self, request, queryset):
+        queryset.exclude(status=Job.STATUS_RUNNING).update(
+            status=Job.STATUS_QUEUED, run_after=timezone.now(), attempts=0, finished_at=None
+        )
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ("kind", "channel", "recipient", "status", "attempts", "created_at", "sent_at")
+    list_filter = ("status", "kind", "channel")
+    search_fields = ("recipient",)
+    raw_id_fields = ("booking",)
+    readonly_fields = ("attempts", "claim_token", "claimed_at", "last_error", "created_at", "sent_at")
+    actions = ("retry_now",)
+
+    @admin.action(description="Retry selected messages now")
+    def retry_now(self, request, queryset):
+        queryset.exclude(status=OutboxMessage.STATUS_SENDING).exclude(
+            status=OutboxMessage.STATUS_SENT
+        ).update(status=OutboxMessage.STATUS_PENDING, available_at=timezone.now(), attempts=0)
+
+
+@admin.register(CalendarSubscription)
+class CalendarSubscriptionAdmin(admin.ModelAdmin):
+    list_display = ("name", "is_active", "created_at", "feed_url")
+    list_filter = ("is_active",)
+    readonly_fields = ("token", "created_at", "feed_url")
+    actions = ("rotate_token",)
+
+    @admin.display(description="Feed URL")
+    def feed_url(self, obj):
+        if not obj.pk:
+            return ""
+        return f"{reverse('apple_calendar_feed')}?token={obj.token}"
+
+    @admin.action(description="Issue new links (old ones stop working)")
+    def rotate_token(self, request, queryset):
+        # save() per row so the signal rewrites the token file.
+        for subscription in queryset:
+            subscription.token = new_feed_token()
+            subscription.save(update_fields=["token"])
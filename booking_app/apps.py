@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class BookingAppConfig(AppConfig):
     name = 'booking_app'
+
+    def ready(self):
+        from . import signals, tasks  # noqa: F401
@@ -0,0 +1,328 @@
+"""Availability from merged busy intervals.
+
+Instead of testing every candidate slot against every booking, the busy
+bookings in a range are sorted and merged once. The free gaps inside each
+working day are then derived in a single forward sweep. Slot starts are
+read directly off those gaps, so the cost is O(B log B + D + S) for B
+bookings, D days and S returned slots, whatever the step size.
+
+Every active groomer has an independent timeline. Public availability is the
+union of their slot starts, merged lazily in time order. Unassigned
+bookings count against every groomer, matching the overlap guard in
+`BookingRequest.clean()`.
+
+Given the new appointment's zip, each booking is padded by the drive time
+to and from it (see `travel.Buffers`) before merging. So a slot only opens
+when the van can get there from the previous stop and on to the next one.
+"""
+
+import datetime
+import heapq
+from collections import defaultdict
+
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from . import travel
+from .models import ACTIVE_STATUSES, BookingRequest, Groomer, Service
+
+OPEN_HOUR = 9
+CLOSE_HOUR = 18
+
+DEFAULT_SLOT_MINUTES = 60
+MIN_STEP_MINUTES = 5
+MAX_RANGE_DAYS = 366
+
+# next_slot_starts() scans forward in windows that start at this many days
+# and double each time, so a near opening only reads near bookings.
+NEXT_SLOTS_FIRST_WINDOW_DAYS = 7
+NEXT_SLOTS_MAX_WINDOW_DAYS = 56
+
+
+def merge_intervals(intervals):
+    """Sort and merge overlapping/touching (start, end) pairs."""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def busy_by_resource(range_start, range_end, groomer_id=None, zip_code=None):
+    """{groomer_id: merged busy blocks} for bookings overlapping the range.
+
+    With no active groomers the whole business is one calendar keyed by None.
+    Pass `groomer_id` to compute a single groomer's timeline, and `zip_code`
+    to pad every booking with drive time to/from that zip.
+    """
+    buffers = travel.Buffers(zip_code)
+    rows = (
+        BookingRequest.objects.filter(status__in=ACTIVE_STATUSES)
+        .exclude(scheduled_start__isnull=True)
+        .exclude(scheduled_end__isnull=True)
+    )
+
+    groomers = Groomer.objects.filter(is_active=True)
+    if groomer_id is not None:
+        groomers = groomers.filter(id=groomer_id)
+        rows = rows.filter(Q(groomer_id=groomer_id) | Q(groomer__isnull=True))
+    groomer_ids = list(groomers.order_by("id").values_list("id", flat=True))
+
+    def overlapping(pad):
+        return rows.filter(scheduled_start__lt=range_end + pad, scheduled_end__gt=range_start - pad)
+
+    if buffers.zip_code:
+        # Only pad the range by the drive times these bookings actually need.
+        buffers.reach(overlapping(buffers.limit).order_by().values_list("zip_code", flat=True).distinct())
+    rows = overlapping(buffers.widest)
+
+    grouped = defaultdict(list)
+    for gid, start, end, booking_zip in rows.values_list(
+        "groomer_id", "scheduled_start", "scheduled_end", "zip_code"
+    ):
+        before, after = buffers.around(booking_zip)
+        grouped[gid].append((start - before, end + after))
+
+    if not groomer_ids:
+        if groomer_id is not None:
+            return {}
+        return {None: merge_intervals(b for blocks in grouped.values() for b in blocks)}
+
+    shared = grouped.get(None, [])
+    return {gid: merge_intervals(grouped.get(gid, []) + shared) for gid in groomer_ids}
+
+
+def busy_intervals(range_start, range_end):
+    """Merged busy blocks for a single-calendar business (no groomers)."""
+    return busy_by_resource(range_start, range_end).get(None, [])
+
+
+def working_hours(day, tz):
+    """(open, close) datetimes for a calendar day in `tz`."""
+    midnight = timezone.make_aware(datetime.datetime.combine(day, datetime.time(0, 0)), tz)
+    return (
+        midnight.replace(hour=OPEN_HOUR, minute=0),
+        midnight.replace(hour=CLOSE_HOUR, minute=0),
+    )
+
+
+def free_gaps(busy, range_start, range_end, tz):
+    """Yield (gap_start, gap_end, day_open) free windows inside working hours.
+
+    `busy` must be merged and sorted, as returned by `merge_intervals`.
+    `day_open` is that day's opening time, which slot grids are aligned to.
+    """
+    i = 0
+    day = range_start.astimezone(tz).date()
+    last_day = range_end.astimezone(tz).date()
+
+    while day <= last_day:
+        day_open, day_close = working_hours(day, tz)
+        cur = max(day_open, range_start)
+        end = min(day_close, range_end)
+
+        # Busy blocks that ended before this window can never matter again.
+        while i < len(busy) and busy[i][1] <= cur:
+            i += 1
+
+        j = i
+        while cur < end:
+            if j < len(busy) and busy[j][0] < end:
+                b_start, b_end = busy[j]
+                if b_start > cur:
+                    yield cur, b_start, day_open
+                cur = max(cur, b_end)
+                j += 1
+            else:
+                yield cur, end, day_open
+                break
+
+        day += datetime.timedelta(days=1)
+
+
+def slot_starts(gaps, duration, step):
+    """Yield every grid-aligned start where `duration` fits inside a gap."""
+    for gap_start, gap_end, origin in gaps:
+        offset = (gap_start - origin) % step
+        start = gap_start if not offset else gap_start + (step - offset)
+        while start + duration <= gap_end:
+            yield start
+            start += step
+
+
+def parse_month(value):
+    """(year, month) from "YYYY-MM", or None."""
+    try:
+        year, month = (int(part) for part in (value or "").split("-"))
+        datetime.date(year, month, 1)
+    except ValueError:
+        return None
+    return year, month
+
+
+def month_range(year, month, tz, now=None):
+    """[start, end) covering a calendar month, never starting in the past.
+
+    Past months come back empty (start >= end).
+    """
+    first = datetime.date(year, month, 1)
+    following = (first + datetime.timedelta(days=32)).replace(day=1)
+    start = timezone.make_aware(datetime.datetime.combine(first, datetime.time(0, 0)), tz)
+    end = timezone.make_aware(datetime.datetime.combine(following, datetime.time(0, 0)), tz)
+    return max(start, now or timezone.now()), end
+
+
+def requested_duration(params):
+    """Appointment length from ?duration=<minutes> or ?services=<id,id,...>.
+
+    Returns None when neither is given, so callers can keep their defaults.
+    """
+    raw_duration = (params.get("duration") or "").strip()
+    if raw_duration:
+        try:
+            minutes = int(raw_duration)
+        except ValueError:
+            return None
+    else:
+        ids = []
+        for raw in params.getlist("services") + params.getlist("service"):
+            ids.extend(part for part in raw.split(",") if part.strip().isdigit())
+        if not ids:
+            return None
+        minutes = Service.objects.filter(id__in=ids).aggregate(
+            total=Sum("duration_minutes")
+        )["total"]
+        if not minutes:
+            return None
+
+    max_minutes = (CLOSE_HOUR - OPEN_HOUR) * 60
+    return datetime.timedelta(minutes=max(MIN_STEP_MINUTES, min(minutes, max_minutes)))
+
+
+def requested_step(params, default_minutes):
+    try:
+        minutes = int(params.get("step") or default_minutes)
+    except ValueError:
+        minutes = default_minutes
+    return datetime.timedelta(minutes=max(minutes, MIN_STEP_MINUTES))
+
+
+def union_starts(streams):
+    """Merge sorted start streams, dropping duplicates."""
+    last = None
+    for start in heapq.merge(*streams):
+        if start != last:
+            yield start
+            last = start
+
+
+def iter_slot_starts(
+    range_start, range_end, duration, step, tz=None, groomer_id=None, zip_code=None
+):
+    """Sorted starts where at least one groomer can fit `duration`."""
+    tz = tz or timezone.get_current_timezone()
+    resources = busy_by_resource(range_start, range_end, groomer_id=groomer_id, zip_code=zip_code)
+
+    return union_starts(
+        slot_starts(free_gaps(busy, range_start, range_end, tz), duration, step)
+        for busy in resources.values()
+    )
+
+
+def iter_available_slots(
+    range_start, range_end, duration, step, tz=None, groomer_id=None, zip_code=None
+):
+    """Yield {"title", "start", "end"} dicts for every fitting start in the range."""
+    tz = tz or timezone.get_current_timezone()
+
+    for start in iter_slot_starts(range_start, range_end, duration, step, tz, groomer_id, zip_code):
+        start = timezone.localtime(start, tz)
+        yield {
+            "title": "Available",
+            "start": start.isoformat(),
+            "end": (start + duration).isoformat(),
+        }
+
+
+def day_summaries(
+    range_start, range_end, duration, step, tz=None, groomer_id=None, zip_code=None
+):
+    """[{"date", "free_minutes", "first_available"}] for every day in the range.
+
+    One pass over each groomer's free gaps. `free_minutes` adds up every
+    groomer's open time that day. `first_available` is the earliest start
+    (ISO, local time) where `duration` fits, or None when the day is full.
+    """
+    tz = tz or timezone.get_current_timezone()
+    if range_start >= range_end:
+        return []
+
+    resources = busy_by_resource(range_start, range_end, groomer_id=groomer_id, zip_code=zip_code)
+    minute = datetime.timedelta(minutes=1)
+
+    free = defaultdict(int)
+    first = {}
+    for busy in resources.values():
+        for gap in free_gaps(busy, range_start, range_end, tz):
+            gap_start, gap_end, day_open = gap
+            day = day_open.date()
+            free[day] += (gap_end - gap_start) // minute
+
+            start = next(slot_starts([gap], duration, step), None)
+            if start is not None and (day not in first or start < first[day]):
+                first[day] = start
+
+    days = []
+    day = range_start.astimezone(tz).date()
+    last_day = (range_end - minute).astimezone(tz).date()
+    while day <= last_day:
+        start = first.get(day)
+        days.append(
+            {
+                "date": day.isoformat(),
+                "free_minutes": free.get(day, 0),
+                "first_available": timezone.localtime(start, tz).isoformat() if start else None,
+            }
+        )
+        day += datetime.timedelta(days=1)
+    return days
+
+
+def next_slot_starts(
+    count, duration, step, horizon_days, tz=None, groomer_id=None, zip_code=None, now=None
+):
+    """The first `count` starts from now on, looking at most `horizon_days` ahead.
+
+    Walks forward in day-aligned windows and stops as soon as enough starts
+    are found. Each window reads only the bookings inside it, so the cost
+    follows how far the soonest openings are rather than the horizon.
+    """
+    tz = tz or timezone.get_current_timezone()
+    now = now or timezone.now()
+    today = timezone.localtime(now, tz).date()
+
+    def midnight(day):
+        return timezone.make_aware(datetime.datetime.combine(day, datetime.time(0, 0)), tz)
+
+    limit = midnight(today + datetime.timedelta(days=horizon_days + 1))
+    window_days = NEXT_SLOTS_FIRST_WINDOW_DAYS
+    cursor_day = today
+    cursor = now
+
+    found = []
+    while cursor < limit and len(found) < count:
+        cursor_day += datetime.timedelta(days=window_days)
+        window_end = min(midnight(cursor_day), limit)
+
+        for start in iter_slot_starts(cursor, window_end, duration, step, tz, groomer_id, zip_code):
+            found.append(start)
+            if len(found) == count:
+                break
+
+        cursor = window_end
+        window_days = min(window_days * 2, NEXT_SLOTS_MAX_WINDOW_DAYS)
+
+    return found
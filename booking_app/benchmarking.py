@@ -0,0 +1,219 @@
+"""Helpers shared by the benchmark management commands.
+
+Benchmarks always run against a throwaway test database created on the
+fly, so they can be pointed at any settings file without touching real data.
+"""
+
+import math
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test import Client as TestClient
+from django.test.utils import (
+    CaptureQueriesContext,
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.urls import URLPattern, reverse
+
+from .models import BookingRequest, Client, NewClientApplication
+
+
+@contextmanager
+def temporary_database():
+    """Run the block against a throwaway test database (never the real one)."""
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile (pct in 0..100) of a non-empty list."""
+    ordered = sorted(samples)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def _first_pk(model, **filters):
+    return model.objects.filter(**filters).order_by("pk").values_list("pk", flat=True).first()
+
+
+def endpoint_specs():
+    """How to call each named route in booking_app/urls.py.
+
+    Routes not listed here are requested with a plain GET. Routes that take
+    URL kwargs must be listed, or they are skipped. Each spec is
+    (method, url_name, kwargs_factory, params). A "<name>:post" key adds
+    a second, POST-flavoured run of that route.
+    """
+    return {
+        "book_request:post": (
+            "POST",
+            "book_request",
+            None,
+            {
+                "full_name": "Bench Client",
+                "address": "1 Bench St",
+                "phone": "3125550100",
+                "pet_name": "Rex",
+                "pet_breed": "Poodle",
+                "pet_weight_lbs": "20",
+                "pet_age_years": "3",
+                "scheduled_start": "2099-01-05T09:00",
+                "scheduled_end": "2099-01-05T10:00",
+            },
+        ),
+        "availability_slots": (
+            "GET",
+            "availability_slots",
+            None,
+            {"start": "{month_start}", "end": "{month_end}"},
+        ),
+        "availability_summary": (
+            "GET",
+            "availability_summary",
+            None,
+            {"month": "{month_start:.7}"},
+        ),
+        "booking_suggestions": ("GET", "booking_suggestions", None, {"q": "Bu"}),
+        "application_action": (
+            "POST",
+            "application_action",
+            lambda: {"app_id": _first_pk(NewClientApplication, status="pending")},
+            {"action": "approve"},
+        ),
+        "booking_action": (
+            "POST",
+            "booking_action",
+            lambda: {"booking_id": _first_pk(BookingRequest, status="new")},
+            {"action": "confirm"},
+        ),
+        "booking_cancel": (
+            "POST",
+            "booking_cancel",
+            lambda: {"booking_id": _first_pk(BookingRequest, status="confirmed")},
+            {},
+        ),
+        "booking_reschedule": (
+            "POST",
+            "booking_reschedule",
+            lambda: {"booking_id": _first_pk(BookingRequest, status="confirmed")},
+            {"scheduled_start": "2099-02-01T09:00", "scheduled_end": "2099-02-01T10:00"},
+        ),
+        "client_action": (
+            "POST",
+            "client_action",
+            lambda: {"client_id": _first_pk(Client)},
+            {"action": "deactivate"},
+        ),
+    }
+
+
+def collect_endpoints():
+    """Return [(label, method, url_name, kwargs_factory, params)] for every route."""
+    from . import urls
+
+    specs = endpoint_specs()
+    endpoints = []
+
+    for pattern in urls.urlpatterns:
+        if not isinstance(pattern, URLPattern) or not pattern.name:
+            continue
+
+        name = pattern.name
+        spec = specs.get(name)
+
+        if spec is None:
+            if pattern.pattern.converters:
+                continue
+            spec = ("GET", name, None, {})
+
+        endpoints.append((name,) + spec)
+
+        extra = specs.get(f"{name}:post")
+        if extra is not None:
+            endpoints.append((f"{name}:post",) + extra)
+
+    return endpoints
+
+
+def _format_params(params, context):
+    return {k: v.format(**context) if isinstance(v, str) else v for k, v in params.items()}
+
+
+def _consume(response):
+    if getattr(response, "streaming", False):
+        return sum(len(chunk) for chunk in response.streaming_content)
+    return len(response.content)
+
+
+@override_settings(THROTTLE_ENABLED=False)
+def benchmark_endpoints(repeat=10, context=None, labels=None):
+    """Time every endpoint (or just `labels`) through the test client.
+
+    Mutating requests run inside a rolled-back transaction, so each repetition
+    sees the same data. Throttling is off, since every request comes from one
+    client. Returns {label: stats}.
+    """
+    context = context or {}
+
+    User = get_user_model()
+    staff, _ = User.objects.get_or_create(
+        username="bench-staff", defaults={"is_staff": True, "is_superuser": True}
+    )
+
+    browser = TestClient()
+    browser.force_login(staff)
+
+    results = {}
+
+    for label, method, url_name, kwargs_factory, params in collect_endpoints():
+        if labels is not None and label not in labels:
+            continue
+
+        kwargs = kwargs_factory() if kwargs_factory else {}
+        if any(v is None for v in kwargs.values()):
+            results[label] = {"skipped": "no matching row"}
+            continue
+
+        url = reverse(url_name, kwargs=kwargs)
+        data = _format_params(params, context)
+        send = browser.post if method == "POST" else browser.get
+
+        timings = []
+        queries = 0
+        status = None
+        size = 0
+
+        for _ in range(repeat):
+            with transaction.atomic():
+                with CaptureQueriesContext(connection) as ctx:
+                    t0 = time.perf_counter()
+                    response = send(url, data)
+                    size = _consume(response)
+                    timings.append((time.perf_counter() - t0) * 1000)
+                transaction.set_rollback(True)
+
+            queries = len(ctx.captured_queries)
+            status = response.status_code
+
+        results[label] = {
+            "method": method,
+            "url": url,
+            "status": status,
+            "bytes": size,
+            "queries": queries,
+            "p50_ms": round(percentile(timings, 50), 3),
+            "p95_ms": round(percentile(timings, 95), 3),
+            "mean_ms": round(statistics.fmean(timings), 3),
+        }
+
+    return results
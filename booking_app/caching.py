@@ -0,0 +1,55 @@
+"""Version-keyed caching for derived data (dashboard counts, feeds, ...).
+
+Writers call `bump_version(name)` (signals do it for model saves/deletes).
+Readers fold `get_version(name)` into their cache keys, so a bump makes all
+old entries unreachable without deleting them one by one.
+"""
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.models import F
+
+from . import metrics
+from .models import DataVersion
+
+BOOKINGS = "bookings"
+APPLICATIONS = "applications"
+ZIP_CENTROIDS = "zip_centroids"
+CALENDAR_FEED = "calendar_feed"
+
+
+def is_shared():
+    """True when the default cache is one every process sees (not locmem/dummy)."""
+    return not isinstance(caches["default"], (LocMemCache, DummyCache))
+
+
+def bump_version(name):
+    updated = DataVersion.objects.filter(name=name).update(value=F("value") + 1)
+    if not updated:
+        DataVersion.objects.get_or_create(name=name, defaults={"value": 1})
+
+
+def get_versions(*names):
+    """{name: value} for the given counters in one query (missing ones are 0)."""
+    found = dict(DataVersion.objects.filter(name__in=names).values_list("name", "value"))
+    return {name: found.get(name, 0) for name in names}
+
+
+def get_version(name):
+    return get_versions(name)[name]
+
+
+def cached(label, key_parts, build, timeout=300):
+    """Return `build()` from the cache under `label` + `key_parts`, filling it on a miss."""
+    key = "booking_app:" + label + ":" + ":".join(str(p) for p in key_parts)
+
+    value = cache.get(key)
+    if value is not None:
+        metrics.record_cache(label, hit=True)
+        return value
+
+    metrics.record_cache(label, hit=False)
+    value = build()
+    cache.set(key, value, timeout)
+    return value
@@ -0,0 +1,278 @@
+"""Prebuilt calendar.ics snapshot for Apple Calendar subscriptions.
+
+Subscribed calendars poll the feed every few minutes, while confirmed
+bookings change a few times a day. So the document is built once in the
+background (the "rebuild_calendar_feed" job, queued by signals when
+confirmed bookings change) and written atomically to `CALENDAR_FEED_DIR`.
+Each poll then opens that file and hands it to `FileResponse`, which the
+WSGI server can send with sendfile(). A poll with a current ETag gets a 304
+after a single stat().
+
+Every change that schedules a rebuild also bumps the `calendar_feed` data
+version, and the snapshot records the version it was built from. The feed
+view compares the two at most every `CALENDAR_FEED_CHECK_SECONDS` per
+process and rebuilds inline when the snapshot is behind. So the feed stays
+current even when no `run_jobs` worker is deployed.
+
+Subscribers authenticate with a per-subscription `?token=`
+(CalendarSubscription). Hashes of the active tokens are written to a file
+next to the snapshot, so a token poll never touches the database. Staff
+signed in to the app can still open the bare URL.
+"""
+
+import datetime
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils import timezone
+from django.utils.http import http_date, parse_etags, quote_etag
+
+from . import caching, jobs
+from .models import BookingRequest, CalendarSubscription
+
+FEED_FILE = "calendar.ics"
+TOKENS_FILE = "subscribers.json"
+# The `calendar_feed` data version the snapshot was built from.
+VERSION_FILE = "calendar.version"
+
+REBUILD_JOB = "rebuild_calendar_feed"
+
+# Identity of the tokens file last read (path, inode, mtime, size) and its hashes.
+# Every write is a new inode, so this changes even within one mtime tick.
+_tokens = {"stat": None, "hashes": frozenset()}
+
+# When this process last compared the snapshot with the data version.
+_freshness = {"checked": None}
+_rebuild_lock = threading.Lock()
+
+
+def feed_dir():
+    path = getattr(settings, "CALENDAR_FEED_DIR", None)
+    if not path:
+        path = os.path.join(tempfile.gettempdir(), "booking_app_calendar")
+    os.makedirs(path, exist_ok=True)
+    return str(path)
+
+
+def ics_escape(value: str) -> str:
+    """Escape text for iCalendar (RFC 5545)."""
+    if value is None:
+        return ""
+
+    s = str(value)
+    s = s.replace("\\", "\\\\")
+    s = s.replace(";", "\\;")
+    s = s.replace(",", "\\,")
+    s = s.replace("\r\n", "\\n").replace("\n", "\\n").replace("\r", "\\n")
+    return s
+
+
+def ics_dt(dt: datetime.datetime) -> str:
+    """Format datetimes as UTC iCal timestamps."""
+    if dt is None:
+        return ""
+
+    if timezone.is_naive(dt):
+        dt = timezone.make_aware(dt, timezone.get_current_timezone())
+
+    dt_utc = dt.astimezone(datetime.timezone.utc)
+    return dt_utc.strftime("%Y%m%dT%H%M%SZ")
+
+
+def build_ics(now=None):
+    """The full feed document (confirmed bookings only)."""
+    now = now or timezone.now()
+
+    qs = (
+        BookingRequest.objects.select_related("client")
+        .filter(status="confirmed")
+        .exclude(scheduled_start__isnull=True)
+        .exclude(scheduled_end__isnull=True)
+        .order_by("scheduled_start")
+    )
+
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//Naz Mobile Grooming//Booking Calendar//EN",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        "X-WR-CALNAME:Naz Mobile Grooming",
+        "X-WR-TIMEZONE:America/Chicago",
+    ]
+
+    for b in qs:
+        client_name = (getattr(b.client, "full_name", "") or "").strip()
+        pet_name = (getattr(b, "pet_name", "") or "").strip()
+
+        bits = []
+        if pet_name:
+            bits.append(pet_name)
+        if client_name:
+            bits.append(client_name)
+
+        summary = " — ".join(bits) if bits else "Booking"
+
+        addr = (getattr(b, "address", "") or "").strip()
+        if not addr:
+            addr = (getattr(b.client, "address", "") or "").strip()
+
+        phone = (getattr(b.client, "phone", "") or "").strip()
+
+        services = [name.strip() for name in b.service_names if (name or "").strip()]
+
+        desc = []
+        if addr:
+            desc.append(f"Address: {addr}")
+        if phone:
+            desc.append(f"Phone: {phone}")
+        if services:
+            desc.append("Services: " + ", ".join(services))
+
+        uid = f"booking-{b.id}@naz-mobile-grooming"
+
+        lines.append("BEGIN:VEVENT")
+        lines.append(f"UID:{ics_escape(uid)}")
+        lines.append(f"DTSTAMP:{ics_dt(now)}")
+        lines.append(f"DTSTART:{ics_dt(b.scheduled_start)}")
+        lines.append(f"DTEND:{ics_dt(b.scheduled_end)}")
+        lines.append(f"SUMMARY:{ics_escape(summary)}")
+
+        if addr:
+            lines.append(f"LOCATION:{ics_escape(addr)}")
+
+        if desc:
+            description = "\n".join(desc)
+            lines.append(f"DESCRIPTION:{ics_escape(description)}")
+
+        lines.append("END:VEVENT")
+
+    lines.append("END:VCALENDAR")
+
+    return "\r\n".join(lines) + "\r\n"
+
+
+def _write_atomic(name, data):
+    """Replace feed_dir()/name with `data` so readers never see a partial file."""
+    directory = feed_dir()
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, os.path.join(directory, name))
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return os.path.join(directory, name)
+
+
+def snapshot_version():
+    """The data version the current snapshot was built from (None if unknown)."""
+    try:
+        with open(os.path.join(feed_dir(), VERSION_FILE), encoding="utf-8") as fh:
+            return int(fh.read())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def write_snapshot():
+    """Rebuild the feed file from the database. Returns its path."""
+    # Read the version first: a change made while building bumps it again.
+    version = caching.get_version(caching.CALENDAR_FEED)
+    path = _write_atomic(FEED_FILE, build_ics().encode("utf-8"))
+    _write_atomic(VERSION_FILE, str(version).encode("utf-8"))
+    return path
+
+
+def refresh_snapshot():
+    """Rebuild the snapshot if it is behind the data version. Returns True if it did."""
+    with _rebuild_lock:
+        if snapshot_version() == caching.get_version(caching.CALENDAR_FEED):
+            return False
+        write_snapshot()
+        return True
+
+
+def schedule_rebuild():
+    """Mark the snapshot stale and queue one background rebuild.
+
+    Extra calls while the job waits only bump the version.
+    """
+    caching.bump_version(caching.CALENDAR_FEED)
+    delay = getattr(settings, "CALENDAR_FEED_REBUILD_DELAY", 5)
+    transaction.on_commit(lambda: jobs.enqueue(REBUILD_JOB, delay=delay, unique=True))
+
+
+def check_freshness():
+    """Rebuild inline when the snapshot is stale, at most every CALENDAR_FEED_CHECK_SECONDS."""
+    now = time.monotonic()
+    interval = getattr(settings, "CALENDAR_FEED_CHECK_SECONDS", 30)
+    checked = _freshness["checked"]
+    if checked is not None and now - checked < interval:
+        return
+    _freshness["checked"] = now
+    refresh_snapshot()
+
+
+def token_hash(token):
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def write_tokens():
+    """Write the hashes of every active subscription token next to the feed."""
+    hashes = sorted(
+        token_hash(t) for t in CalendarSubscription.objects.filter(is_active=True).values_list("token", flat=True)
+    )
+    return _write_atomic(TOKENS_FILE, json.dumps(hashes).encode("utf-8"))
+
+
+def valid_token(token):
+    """True when `token` belongs to an active subscription (a stat(), no query)."""
+    path = os.path.join(feed_dir(), TOKENS_FILE)
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        write_tokens()
+        st = os.stat(path)
+
+    key = (path, st.st_ino, st.st_mtime_ns, st.st_size)
+    if _tokens["stat"] != key:
+        with open(path, encoding="utf-8") as fh:
+            _tokens["hashes"] = frozenset(json.load(fh))
+        _tokens["stat"] = key
+
+    return token_hash(token) in _tokens["hashes"]
+
+
+def feed_response(request):
+    """Serve the snapshot (building it first if there is none or it's stale)."""
+    check_freshness()
+    path = os.path.join(feed_dir(), FEED_FILE)
+    try:
+        fh = open(path, "rb")
+    except FileNotFoundError:
+        fh = open(write_snapshot(), "rb")
+
+    st = os.fstat(fh.fileno())
+    etag = quote_etag(f"{st.st_ino:x}-{st.st_mtime_ns:x}-{st.st_size:x}")
+
+    if etag in parse_etags(request.headers.get("If-None-Match", "")):
+        fh.close()
+        response = HttpResponseNotModified()
+    else:
+        response = FileResponse(fh, content_type="text/calendar; charset=utf-8", filename=FEED_FILE)
+
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(st.st_mtime)
+    response["Cache-Control"] = "no-cache"
+    return response
@@ -0,0 +1,185 @@
+"""Streaming CSV / JSON Lines exports of bookings and clients for accounting.
+
+Rows are read with `.iterator(chunk_size=...)`. On PostgreSQL that uses a
+server-side cursor, and elsewhere it uses fetchmany(). They come out as
+plain value tuples, so memory stays flat whatever the export size. Client
+and groomer columns are joined in the main query. Service names and prices
+are read from the booking's denormalized totals (see totals.py), so there is
+one query per table and no per-row query.
+
+Used by the staff endpoints /api/export/bookings/ and /api/export/clients/,
+and by `manage.py export_data`.
+"""
+
+import csv
+import datetime
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, IntegerField, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import ArchivedBooking, BookingRequest, Client
+from .streaming import DEFAULT_CHUNK_SIZE, FLUSH_AT_CHARS
+
+FORMATS = ("csv", "jsonl")
+
+CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson; charset=utf-8",
+}
+
+# (column, values() lookup) for the booking query. The service totals follow.
+BOOKING_COLUMNS = (
+    ("id", "id"),
+    ("status", "status"),
+    ("scheduled_start", "scheduled_start"),
+    ("scheduled_end", "scheduled_end"),
+    ("created_at", "created_at"),
+    ("client_id", "client_id"),
+    ("client_name", "client__full_name"),
+    ("client_phone", "client__phone"),
+    ("client_email", "client__email"),
+    ("groomer", "groomer__name"),
+    ("address", "address"),
+    ("zip_code", "zip_code"),
+    ("pet_name", "pet_name"),
+    ("pet_breed", "pet_breed"),
+)
+BOOKING_HEADER = [c for c, _ in BOOKING_COLUMNS] + [
+    "services",
+    "service_minutes",
+    "total_price",
+    "archived",
+]
+
+CLIENT_HEADER = [
+    "id",
+    "full_name",
+    "phone",
+    "email",
+    "address",
+    "is_active",
+    "bookings",
+    "last_booking",
+]
+
+
+def parse_range(start_raw, end_raw, tz=None):
+    """[start, end) datetimes from YYYY-MM-DD strings (end date inclusive).
+
+    Either side may be blank. Raises ValueError on a malformed date.
+    """
+    tz = tz or timezone.get_current_timezone()
+
+    def midnight(day):
+        return timezone.make_aware(datetime.datetime.combine(day, datetime.time(0, 0)), tz)
+
+    start = end = None
+    if (start_raw or "").strip():
+        start = midnight(datetime.date.fromisoformat(start_raw.strip()))
+    if (end_raw or "").strip():
+        end = midnight(datetime.date.fromisoformat(end_raw.strip()) + datetime.timedelta(days=1))
+    return start, end
+
+
+def _booking_rows(model, start, end, statuses, chunk_size):
+    qs = model.objects.all()
+    if start is not None:
+        qs = qs.filter(scheduled_start__gte=start)
+    if end is not None:
+        qs = qs.filter(scheduled_start__lt=end)
+    if statuses:
+        qs = qs.filter(status__in=statuses)
+
+    # values_list() follows the FKs in one JOINed query, with no model instances.
+    rows = qs.order_by("scheduled_start", "id").values_list(
+        *(lookup for _, lookup in BOOKING_COLUMNS), "service_names", "total_duration_minutes", "total_price"
+    )
+    archived = model is ArchivedBooking
+
+    for row in rows.iterator(chunk_size=chunk_size):
+        *columns, names, minutes, price = row
+        yield (*columns, "; ".join(names), minutes, price, archived)
+
+
+def iter_bookings(start=None, end=None, statuses=None, include_archive=False, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield one tuple per booking (BOOKING_HEADER order), oldest first.
+
+    With `include_archive` the matching ArchivedBooking rows (the older ones) come first.
+    """
+    if include_archive:
+        yield from _booking_rows(ArchivedBooking, start, end, statuses, chunk_size)
+    yield from _booking_rows(BookingRequest, start, end, statuses, chunk_size)
+
+
+def iter_clients(include_inactive=True, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield one tuple per client (CLIENT_HEADER order) with booking count and last booking.
+
+    Both columns cover archived bookings as well, so archiving does not change a
+    client's history in the export.
+    """
+    qs = Client.objects.all()
+    if not include_inactive:
+        qs = qs.filter(is_active=True)
+
+    archived = ArchivedBooking.objects.filter(client=OuterRef("pk")).order_by()
+    archived_count = Subquery(
+        archived.values("client").annotate(n=Count("pk")).values("n"), output_field=IntegerField()
+    )
+    archived_last = Subquery(archived.order_by("-scheduled_start").values("scheduled_start")[:1])
+    hot_last = Max("bookingrequest__scheduled_start")
+    rows = (
+        qs.annotate(
+            bookings=Count("bookingrequest") + Coalesce(archived_count, 0),
+            # Greatest() is NULL if either side is, so fall back to the other.
+            last_booking=Greatest(Coalesce(hot_last, archived_last), Coalesce(archived_last, hot_last)),
+        )
+        .order_by("id")
+        .values_list(*CLIENT_HEADER)
+    )
+    return rows.iterator(chunk_size=chunk_size)
+
+
+def _value(value):
+    if isinstance(value, datetime.datetime):
+        return timezone.localtime(value).isoformat() if timezone.is_aware(value) else value.isoformat()
+    return value
+
+
+class _Echo:
+    """File-like target that hands each CSV line straight back from writerow()."""
+
+    def write(self, value):
+        return value
+
+
+def iter_encoded(rows, header, fmt):
+    """Encode tuples as CSV (with a header row) or JSON Lines, in buffered pieces."""
+    if fmt == "csv":
+        writer = csv.writer(_Echo())
+
+        def encode(values):
+            return writer.writerow(["" if v is None else _value(v) for v in values])
+
+        buf = [writer.writerow(header)]
+    else:
+        dumps = DjangoJSONEncoder().encode
+
+        def encode(values):
+            return dumps(dict(zip(header, (_value(v) for v in values)))) + "\n"
+
+        buf = []
+
+    size = sum(len(piece) for piece in buf)
+    for values in rows:
+        piece = encode(values)
+        buf.append(piece)
+        size += len(piece)
+        if size >= FLUSH_AT_CHARS:
+            yield "".join(buf)
+            buf = []
+            size = 0
+
+    if buf:
+        yield "".join(buf)
@@ -1,5 +1,5 @@
 from django import forms
-from .models import NewClientApplication, Service, BookingRequest, Client
+from .models import NewClientApplication, Service, BookingRequest, Client, normalize_phone
 
 
 class BookingRequestForm(forms.ModelForm):
@@ -123,11 +123,11 @@ class BookingRequestForm(forms.ModelForm):
         instance = super().save(commit=False)
 
         full_name = (self.cleaned_data.get("full_name") or "").strip()
-        phone = (self.cleaned_data.get("phone") or "").strip()
+        phone = normalize_phone(self.cleaned_data.get("phone"))
         address = (self.cleaned_data.get("address") or "").strip()
 
-        # Attach creator (only if model supports it)
-        if self.user and hasattr(instance, "created_by"):
+        # Attach creator (only if model supports it; anonymous visitors aren't users)
+        if self.user and self.user.is_authenticated and hasattr(instance, "created_by"):
             instance.created_by = self.user
 
         # Reuse an existing active client when possible
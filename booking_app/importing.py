@@ -0,0 +1,436 @@
+"""Bulk import of clients and bookings from CSV or JSON Lines.
+
+Saving records one by one runs `full_clean()` and an overlap query per row.
+This module handles a file in batches instead. For each batch it:
+
+1. parses and validates every row in Python (required fields, numbers,
+   dates, statuses, service and groomer names);
+2. resolves clients with one query on the normalized phones (or names),
+   then bulk-creates the missing ones;
+3. checks the batch's active bookings for overlaps with one sorted sweep,
+   against each other and against the existing active bookings in the
+   batch's time span (one query);
+4. inserts the accepted rows with `bulk_create` and their service links.
+
+The whole import runs in one transaction, so later batches see earlier ones.
+A dry run rolls it back at the end and reports what would have happened.
+Column names match `exports.py`, so an export can be re-imported.
+"""
+
+import csv
+import datetime
+import heapq
+import json
+from bisect import bisect_left
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from . import caching, calendar_feed, totals
+from .availability import merge_intervals
+from .models import ACTIVE_STATUSES, BookingRequest, Client, Groomer, Service, normalize_phone
+from .travel import extract_zip
+
+DEFAULT_BATCH_SIZE = 5000
+MAX_REPORTED_ERRORS = 1000
+
+STATUSES = {value for value, _ in BookingRequest.STATUS_CHOICES}
+
+# Accepted spellings for each column; the first is what exports.py writes.
+ALIASES = {
+    "full_name": ("client_name", "full_name", "name"),
+    "phone": ("client_phone", "phone"),
+    "email": ("client_email", "email"),
+}
+
+
+def normalize_name(value):
+    return " ".join((value or "").split())
+
+
+def read_rows(fh, fmt):
+    """Yield (line_number, dict) from an open text file."""
+    if fmt == "jsonl":
+        for number, line in enumerate(fh, start=1):
+            if line.strip():
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    yield number, {"_error": "Invalid JSON"}
+                    continue
+                if not isinstance(row, dict):
+                    row = {"_error": "Expected a JSON object"}
+                yield number, row
+        return
+
+    # Line 1 is the header.
+    for number, row in enumerate(csv.DictReader(fh), start=2):
+        yield number, row
+
+
+def _batches(rows, size):
+    batch = []
+    for item in rows:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _get(row, name):
+    for key in ALIASES.get(name, (name,)):
+        value = row.get(key)
+        if value not in (None, ""):
+            return str(value).strip()
+    return ""
+
+
+def _parse_datetime(raw, tz):
+    if not raw:
+        return None
+    value = datetime.datetime.fromisoformat(raw.replace("Z", "+00:00"))
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value, tz)
+    return value
+
+
+def _parse_int(raw, field):
+    try:
+        value = int(Decimal(raw))
+    except (InvalidOperation, ValueError):
+        raise ValueError(f"{field} must be a whole number")
+    if value < 0:
+        raise ValueError(f"{field} must not be negative")
+    return value
+
+
+class Report:
+    """Running totals for one import, returned to the caller."""
+
+    def __init__(self, dry_run=False):
+        self.dry_run = dry_run
+        self.rows = 0
+        self.created = 0
+        self.clients_created = 0
+        self.clients_matched = 0
+        self.rejected = 0
+        self.errors = []
+
+    def reject(self, line, message):
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+    def as_dict(self):
+        return {
+            "dry_run": self.dry_run,
+            "rows": self.rows,
+            "created": self.created,
+            "clients_created": self.clients_created,
+            "clients_matched": self.clients_matched,
+            "rejected": self.rejected,
+            "errors": self.errors,
+        }
+
+
+def _client_key(phone, name):
+    return ("phone", phone) if phone else ("name", name.lower())
+
+
+class _ClientResolver:
+    """Finds or creates clients a batch at a time, keyed by phone, else by name."""
+
+    def __init__(self, report):
+        self.report = report
+        self.by_phone = {}
+        self.by_name = {}
+
+    def resolve(self, people):
+        """`people` maps key -> client fields. Returns key -> client id."""
+        phones = [v for kind, v in people if kind == "phone" and v not in self.by_phone]
+        names = [v for kind, v in people if kind == "name" and v not in self.by_name]
+
+        if phones:
+            for pk, phone in (
+                Client.objects.filter(phone__in=phones).order_by("-id").values_list("id", "phone")
+            ):
+                self.by_phone[phone] = pk  # lowest id wins
+        if names:
+            for pk, name in (
+                Client.objects.annotate(lname=Lower("full_name"))
+                .filter(lname__in=names)
+                .order_by("-id")
+                .values_list("id", "lname")
+            ):
+                self.by_name[name] = pk
+
+        looked_up = set(phones) | set(names)
+
+        found = {}
+        missing = []
+        for key, fields in people.items():
+            table = self.by_phone if key[0] == "phone" else self.by_name
+            if key[1] in table:
+                found[key] = table[key[1]]
+                # Count each existing client once, not once per batch.
+                if key[1] in looked_up:
+                    self.report.clients_matched += 1
+            else:
+                missing.append((key, fields))
+
+        created = Client.objects.bulk_create(
+            [Client(is_approved=True, **fields) for _, fields in missing]
+        )
+        for (key, _), client in zip(missing, created):
+            table = self.by_phone if key[0] == "phone" else self.by_name
+            table[key[1]] = client.pk
+            found[key] = client.pk
+        self.report.clients_created += len(created)
+
+        return found
+
+
+def _client_fields(row):
+    name = normalize_name(_get(row, "full_name"))
+    phone = normalize_phone(_get(row, "phone"))
+    if not name and not phone:
+        raise ValueError("client_name or client_phone is required")
+    return phone, name, {
+        "full_name": name or "Client",
+        "phone": phone,
+        "email": _get(row, "email"),
+        "address": _get(row, "client_address") or _get(row, "address"),
+    }
+
+
+def _booking_fields(row, tz, services, groomers):
+    for field in ("pet_name", "pet_breed"):
+        if not _get(row, field):
+            raise ValueError(f"{field} is required")
+
+    address = _get(row, "address")
+    status = (_get(row, "status") or "new").lower()
+    if status not in STATUSES:
+        raise ValueError(f"Unknown status {status!r}")
+
+    try:
+        start = _parse_datetime(_get(row, "scheduled_start"), tz)
+        end = _parse_datetime(_get(row, "scheduled_end"), tz)
+        created_at = _parse_datetime(_get(row, "created_at"), tz)
+    except ValueError:
+        raise ValueError("Dates must be ISO 8601 (YYYY-MM-DDTHH:MM[:SS][+HH:MM])")
+    if bool(start) != bool(end):
+        raise ValueError("scheduled_start and scheduled_end go together")
+    if start and end <= start:
+        raise ValueError("End time must be after start time.")
+
+    service_ids = []
+    for name in filter(None, (part.strip() for part in _get(row, "services").split(";"))):
+        pk = services.get(name.lower())
+        if pk is None:
+            raise ValueError(f"Unknown service {name!r}")
+        service_ids.append(pk)
+
+    groomer_id = None
+    groomer_name = _get(row, "groomer")
+    if groomer_name:
+        groomer_id = groomers.get(groomer_name.lower())
+        if groomer_id is None:
+            raise ValueError(f"Unknown groomer {groomer_name!r}")
+
+    return {
+        "address": address,
+        "zip_code": _get(row, "zip_code") or extract_zip(address),
+        "pet_name": _get(row, "pet_name"),
+        "pet_breed": _get(row, "pet_breed"),
+        "pet_weight_lbs": _parse_int(_get(row, "pet_weight_lbs") or "0", "pet_weight_lbs"),
+        "pet_age_years": _parse_int(_get(row, "pet_age_years") or "0", "pet_age_years"),
+        "scheduled_start": start,
+        "scheduled_end": end,
+        "status": status,
+        "groomer_id": groomer_id,
+        "special_needs": _get(row, "special_needs"),
+    }, service_ids, created_at
+
+
+def _clashes(gid, other):
+    """The groomer rule of `BookingRequest._resource_q`."""
+    return gid is None or other is None or gid == other
+
+
+def find_overlaps(candidates, existing):
+    """Indexes into `candidates` that clash, from one sorted pass over each list.
+
+    Both arguments are lists of (start, end, groomer_id). Existing bookings
+    are merged per groomer once and probed with a binary search. Candidates
+    are then swept in start order. The earlier of two clashing candidates
+    wins, and the other is reported. A groomer clashes with their own
+    bookings and unassigned ones, and unassigned clashes with everything.
+    """
+    per_groomer = defaultdict(list)
+    for start, end, gid in existing:
+        per_groomer[gid].append((start, end))
+    merged = {gid: merge_intervals(blocks) for gid, blocks in per_groomer.items()}
+    merged_all = merge_intervals(block for blocks in per_groomer.values() for block in blocks)
+    starts = {gid: [b[0] for b in blocks] for gid, blocks in merged.items()}
+    starts_all = [b[0] for b in merged_all]
+
+    def busy(start, end, gid):
+        if gid is None:
+            probes = [(starts_all, merged_all)]
+        else:
+            probes = [(starts.get(gid, []), merged.get(gid, [])), (starts.get(None, []), merged.get(None, []))]
+        for block_starts, blocks in probes:
+            i = bisect_left(block_starts, end) - 1
+            if i >= 0 and blocks[i][1] > start:
+                return True
+        return False
+
+    clashes = set()
+    held = []  # heap of (end, index, groomer_id) for accepted candidates still running
+    for index in sorted(range(len(candidates)), key=lambda i: (candidates[i][0], i)):
+        start, end, gid = candidates[index]
+        while held and held[0][0] <= start:
+            heapq.heappop(held)
+
+        if busy(start, end, gid) or any(_clashes(gid, other) for _, _, other in held):
+            clashes.add(index)
+        else:
+            heapq.heappush(held, (end, index, gid))
+
+    return clashes
+
+
+def _existing_active(start, end):
+    return [
+        (s, e, gid)
+        for s, e, gid in BookingRequest.objects.filter(
+            status__in=ACTIVE_STATUSES, scheduled_start__lt=end, scheduled_end__gt=start
+        ).values_list("scheduled_start", "scheduled_end", "groomer_id")
+    ]
+
+
+def _import_booking_batch(batch, report, resolver, tz, services, groomers):
+    parsed = []
+    for line, row in batch:
+        if "_error" in row:
+            report.reject(line, row["_error"])
+            continue
+        try:
+            phone, name, client_fields = _client_fields(row)
+            fields, service_ids, created_at = _booking_fields(row, tz, services, groomers)
+        except ValueError as exc:
+            report.reject(line, str(exc))
+            continue
+        if not fields["address"]:
+            fields["address"] = client_fields["address"]
+        if not fields["address"]:
+            report.reject(line, "address is required")
+            continue
+        parsed.append((line, _client_key(phone, name), client_fields, fields, service_ids, created_at))
+
+    # Overlaps, for bookings that hold their slot.
+    active = [p for p in parsed if p[3]["status"] in ACTIVE_STATUSES and p[3]["scheduled_start"]]
+    if active:
+        span_start = min(p[3]["scheduled_start"] for p in active)
+        span_end = max(p[3]["scheduled_end"] for p in active)
+        clashes = find_overlaps(
+            [(p[3]["scheduled_start"], p[3]["scheduled_end"], p[3]["groomer_id"]) for p in active],
+            _existing_active(span_start, span_end),
+        )
+        rejected = {id(active[i]) for i in clashes}
+        for p in active:
+            if id(p) in rejected:
+                report.reject(p[0], "That time overlaps with an existing booking.")
+        parsed = [p for p in parsed if id(p) not in rejected]
+
+    if not parsed:
+        return
+
+    people = {}
+    for _, key, client_fields, _, _, _ in parsed:
+        people.setdefault(key, client_fields)
+    client_ids = resolver.resolve(people)
+
+    bookings = BookingRequest.objects.bulk_create(
+        [BookingRequest(client_id=client_ids[key], **fields) for _, key, _, fields, _, _ in parsed]
+    )
+
+    through = BookingRequest.services.through
+    through.objects.bulk_create(
+        [
+            through(bookingrequest_id=booking.pk, service_id=service_id)
+            for booking, p in zip(bookings, parsed)
+            for service_id in p[4]
+        ]
+    )
+    totals.refresh(BookingRequest, [booking.pk for booking in bookings])
+
+    # auto_now_add overwrites created_at on insert, so backdate afterwards.
+    backdated = []
+    for booking, p in zip(bookings, parsed):
+        if p[5] is not None:
+            booking.created_at = p[5]
+            backdated.append(booking)
+    if backdated:
+        BookingRequest.objects.bulk_update(backdated, ["created_at"])
+
+    report.created += len(bookings)
+
+
+def import_bookings(rows, batch_size=DEFAULT_BATCH_SIZE, dry_run=False, tz=None):
+    """Import (line, dict) booking rows. Returns a Report."""
+    tz = tz or timezone.get_current_timezone()
+    report = Report(dry_run=dry_run)
+    resolver = _ClientResolver(report)
+
+    services = {name.lower(): pk for pk, name in Service.objects.values_list("id", "name")}
+    groomers = {name.lower(): pk for pk, name in Groomer.objects.values_list("id", "name")}
+
+    with transaction.atomic():
+        for batch in _batches(rows, batch_size):
+            report.rows += len(batch)
+            _import_booking_batch(batch, report, resolver, tz, services, groomers)
+
+        if dry_run:
+            transaction.set_rollback(True)
+        elif report.created:
+            # bulk_create skips the model signals that normally do this.
+            caching.bump_version(caching.BOOKINGS)
+            calendar_feed.schedule_rebuild()
+
+    return report
+
+
+def import_clients(rows, batch_size=DEFAULT_BATCH_SIZE, dry_run=False):
+    """Import (line, dict) client rows, matching existing clients by phone. Returns a Report."""
+    report = Report(dry_run=dry_run)
+    resolver = _ClientResolver(report)
+
+    with transaction.atomic():
+        for batch in _batches(rows, batch_size):
+            report.rows += len(batch)
+            people = {}
+            for line, row in batch:
+                try:
+                    if "_error" in row:
+                        raise ValueError(row["_error"])
+                    phone, name, fields = _client_fields(row)
+                except ValueError as exc:
+                    report.reject(line, str(exc))
+                    continue
+                if "is_active" in row:
+                    fields["is_active"] = str(row["is_active"]).strip().lower() not in ("0", "false", "no")
+                people.setdefault(_client_key(phone, name), fields)
+            resolver.resolve(people)
+
+        report.created = report.clients_created
+        if dry_run:
+            transaction.set_rollback(True)
+
+    return report
@@ -0,0 +1,149 @@
+"""Opt-in per-request timing: DB queries, template rendering and view time.
+
+Enable with `REQUEST_TIMING_ENABLED = True`. Each response then carries a
+`Server-Timing` header (visible in the browser devtools Network tab), and
+one JSON line is written to the `booking_app.timing` logger.
+
+Template time is collected by `TimedDjangoTemplates`, a drop-in replacement
+for Django's template backend. When timing is off it costs one contextvar
+lookup per render.
+"""
+
+import contextvars
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.backends.django import DjangoTemplates, Template
+
+logger = logging.getLogger("booking_app.timing")
+
+_current_timer = contextvars.ContextVar("booking_app_request_timer", default=None)
+
+
+class RequestTimer:
+    def __init__(self):
+        self.db_queries = 0
+        self.db_ms = 0.0
+        self.template_ms = 0.0
+        self.view_ms = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        # Signature required by `connection.execute_wrapper`.
+        t0 = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_ms += (time.perf_counter() - t0) * 1000
+            self.db_queries += 1
+
+    def server_timing(self):
+        return ", ".join(
+            [
+                f'db;dur={self.db_ms:.1f};desc="{self.db_queries} queries"',
+                f"tpl;dur={self.template_ms:.1f}",
+                f"view;dur={self.view_ms:.1f}",
+            ]
+        )
+
+    def as_dict(self):
+        return {
+            "db_queries": self.db_queries,
+            "db_ms": round(self.db_ms, 2),
+            "template_ms": round(self.template_ms, 2),
+            "view_ms": round(self.view_ms, 2),
+        }
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        timer = _current_timer.get()
+        if timer is None:
+            return super().render(context, request)
+
+        t0 = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timer.template_ms += (time.perf_counter() - t0) * 1000
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates backend whose top-level renders report to the active timer."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
+
+
+def _install(timer):
+    conns = connections.all()
+    for conn in conns:
+        conn.execute_wrappers.append(timer)
+    return conns
+
+
+def _uninstall(timer, conns):
+    for conn in conns:
+        if timer in conn.execute_wrappers:
+            conn.execute_wrappers.remove(timer)
+
+
+class RequestTimingMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, "REQUEST_TIMING_ENABLED", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = RequestTimer()
+        conns = _install(timer)
+        token = _current_timer.set(timer)
+
+        t0 = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        except Exception:
+            _uninstall(timer, conns)
+            raise
+        finally:
+            timer.view_ms = (time.perf_counter() - t0) * 1000
+            _current_timer.reset(token)
+
+        response["Server-Timing"] = timer.server_timing()
+
+        if getattr(response, "streaming", False):
+            # Streamed bodies query the database while they are being sent, after
+            # the headers are gone. Keep counting and log once the body is done.
+            response.streaming_content = self._stream_then_log(
+                response.streaming_content, request, response, timer, conns
+            )
+        else:
+            _uninstall(timer, conns)
+            self._log(request, response, timer)
+
+        return response
+
+    def _stream_then_log(self, content, request, response, timer, conns):
+        try:
+            yield from content
+        finally:
+            _uninstall(timer, conns)
+            self._log(request, response, timer, streamed=True)
+
+    def _log(self, request, response, timer, streamed=False):
+        match = getattr(request, "resolver_match", None)
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "url_name": match.url_name if match else None,
+            "status": response.status_code,
+            "streamed": streamed,
+        }
+        record.update(timer.as_dict())
+        logger.info(json.dumps(record))
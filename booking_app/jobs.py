@@ -0,0 +1,199 @@
+"""Small database-backed job queue for work that doesn't need the request.
+
+Views call `enqueue("name", {...})`, which is a single INSERT, and return.
+`manage.py run_jobs` claims ready jobs, runs the handler registered with
+`@task("name")` (see tasks.py) and retries failures with exponential
+backoff until `max_attempts`.
+
+Claiming uses SELECT ... FOR UPDATE SKIP LOCKED where the database supports
+it (PostgreSQL, MySQL 8). SQLite has no row locks, so there each job is
+claimed with a conditional UPDATE (status still "queued") that only one
+worker can win. Either way two workers never run the same job.
+"""
+
+import datetime
+import logging
+import os
+import random
+import socket
+import traceback
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import metrics
+from .models import Job
+
+logger = logging.getLogger("booking_app.jobs")
+
+_registry = {}
+
+
+def task(name):
+    """Register a job handler. It is called as `handler(**payload)`."""
+
+    def decorator(func):
+        _registry[name] = func
+        return func
+
+    return decorator
+
+
+def registered():
+    return dict(_registry)
+
+
+def worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def enqueue(name, payload=None, *, delay=0, max_attempts=None, unique=False):
+    """Queue `name` to run after `delay` seconds. Returns the Job (or None).
+
+    With `unique=True` nothing is added when the same job is already waiting.
+    That suits idempotent refreshes such as cache warming.
+
+    Under JOBS_EAGER the delay is ignored: with no worker polling, a job
+    that isn't due at commit time would never run.
+    """
+    if name not in _registry:
+        raise ValueError(f"Unknown job {name!r}")
+
+    payload = payload or {}
+    if unique and Job.objects.filter(
+        name=name, payload=payload, status=Job.STATUS_QUEUED
+    ).exists():
+        return None
+
+    eager = getattr(settings, "JOBS_EAGER", False)
+    if eager:
+        delay = 0
+
+    job = Job.objects.create(
+        name=name,
+        payload=payload,
+        max_attempts=max_attempts or getattr(settings, "JOBS_MAX_ATTEMPTS", 5),
+        run_after=timezone.now() + datetime.timedelta(seconds=delay),
+    )
+
+    # No worker (local dev, tests): run right after the surrounding commit.
+    if eager:
+        transaction.on_commit(lambda: run_ready(limit=1, ids=[job.pk]))
+
+    return job
+
+
+def backoff_seconds(attempts):
+    """Delay before retry number `attempts` (1-based): base * 2^n, capped, +10% jitter."""
+    base = getattr(settings, "JOBS_BACKOFF_SECONDS", 10)
+    cap = getattr(settings, "JOBS_BACKOFF_MAX_SECONDS", 3600)
+    delay = min(base * 2 ** max(attempts - 1, 0), cap)
+    return delay + random.uniform(0, delay * 0.1)
+
+
+def requeue_stale(now=None):
+    """Put back jobs whose worker died mid-run (locked longer than the timeout)."""
+    now = now or timezone.now()
+    timeout = datetime.timedelta(seconds=getattr(settings, "JOBS_LOCK_TIMEOUT_SECONDS", 600))
+    return Job.objects.filter(status=Job.STATUS_RUNNING, locked_at__lt=now - timeout).update(
+        status=Job.STATUS_QUEUED, locked_by="", locked_at=None
+    )
+
+
+def claim(worker, limit=1, ids=None, now=None):
+    """Mark up to `limit` ready jobs as running for `worker` and return them."""
+    now = now or timezone.now()
+    ready = Job.objects.filter(status=Job.STATUS_QUEUED, run_after__lte=now)
+    if ids is not None:
+        ready = ready.filter(id__in=ids)
+    ready = ready.order_by("run_after", "id")
+
+    claimed_fields = {
+        "status": Job.STATUS_RUNNING,
+        "locked_by": worker,
+        "locked_at": now,
+        "attempts": F("attempts") + 1,
+    }
+
+    alias = router.db_for_write(Job)
+    if connections[alias].features.has_select_for_update_skip_locked:
+        with transaction.atomic(using=alias):
+            claimed = list(
+                ready.select_for_update(skip_locked=True).values_list("id", flat=True)[:limit]
+            )
+            Job.objects.filter(id__in=claimed).update(**claimed_fields)
+    else:
+        claimed = []
+        for job_id in ready.values_list("id", flat=True)[: limit * 2]:
+            won = Job.objects.filter(id=job_id, status=Job.STATUS_QUEUED).update(**claimed_fields)
+            if won:
+                claimed.append(job_id)
+                if len(claimed) >= limit:
+                    break
+
+    return list(Job.objects.filter(id__in=claimed).order_by("run_after", "id"))
+
+
+def run_job(job):
+    """Run one claimed job. Returns True on success."""
+    handler = _registry.get(job.name)
+
+    try:
+        if handler is None:
+            raise LookupError(f"No handler registered for job {job.name!r}")
+        with transaction.atomic():
+            handler(**job.payload)
+    except Exception as exc:
+        _record_failure(job, exc)
+        return False
+
+    Job.objects.filter(pk=job.pk).update(
+        status=Job.STATUS_DONE, finished_at=timezone.now(), locked_by="", last_error=""
+    )
+    metrics.inc("booking_jobs_total", job=job.name, result="done")
+    return True
+
+
+def _record_failure(job, exc):
+    error = "".join(traceback.format_exception(exc))[-4000:]
+
+    if job.attempts >= job.max_attempts:
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.STATUS_FAILED, finished_at=timezone.now(), locked_by="", last_error=error
+        )
+        metrics.inc("booking_jobs_total", job=job.name, result="failed")
+        logger.error("job %s #%s failed for good: %s", job.name, job.pk, exc)
+        return
+
+    delay = backoff_seconds(job.attempts)
+    Job.objects.filter(pk=job.pk).update(
+        status=Job.STATUS_QUEUED,
+        run_after=timezone.now() + datetime.timedelta(seconds=delay),
+        locked_by="",
+        locked_at=None,
+        last_error=error,
+    )
+    metrics.inc("booking_jobs_total", job=job.name, result="retried")
+    logger.warning(
+        "job %s #%s failed (attempt %s), retrying in %.0fs: %s",
+        job.name, job.pk, job.attempts, delay, exc,
+    )
+
+
+def run_ready(worker=None, limit=None, batch=10, ids=None):
+    """Claim and run ready jobs until none are left (or `limit` ran). Returns the count."""
+    worker = worker or worker_id()
+    ran = 0
+
+    while limit is None or ran < limit:
+        size = batch if limit is None else min(batch, limit - ran)
+        jobs = claim(worker, limit=size, ids=ids)
+        if not jobs:
+            break
+        for job in jobs:
+            run_job(job)
+            ran += 1
+
+    return ran
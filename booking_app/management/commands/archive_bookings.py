@@ -0,0 +1,55 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from booking_app import archive
+
+
+class Command(BaseCommand):
+    help = (
+        "Move completed, declined and canceled bookings older than a cutoff "
+        "from BookingRequest into the ArchivedBooking table, in batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-days",
+            type=int,
+            default=None,
+            help="Archive bookings that ended this many days ago (default ARCHIVE_AFTER_DAYS).",
+        )
+        parser.add_argument(
+            "--before",
+            help="Archive bookings that ended before this date (YYYY-MM-DD) instead.",
+        )
+        parser.add_argument("--batch", type=int, default=500, help="Bookings moved per transaction.")
+        parser.add_argument("--max-batches", type=int, default=None)
+        parser.add_argument("--pause", type=float, default=0.0, help="Seconds to sleep between batches.")
+        parser.add_argument("--dry-run", action="store_true", help="Only count what would be archived.")
+
+    def handle(self, *args, **options):
+        if options["before"]:
+            try:
+                day = datetime.date.fromisoformat(options["before"])
+            except ValueError:
+                raise CommandError("--before must be YYYY-MM-DD")
+            cutoff = timezone.make_aware(datetime.datetime.combine(day, datetime.time(0, 0)))
+        elif options["older_than_days"] is not None:
+            cutoff = timezone.now() - datetime.timedelta(days=options["older_than_days"])
+        else:
+            cutoff = archive.default_cutoff()
+
+        if options["dry_run"]:
+            count = archive.archivable(cutoff).count()
+            self.stdout.write(f"{count} booking(s) ended before {cutoff:%Y-%m-%d %H:%M} and would be archived.")
+            return
+
+        moved = archive.archive_bookings(
+            cutoff,
+            batch_size=options["batch"],
+            max_batches=options["max_batches"],
+            pause=options["pause"],
+            progress=lambda n: self.stdout.write(f"  {n} archived..."),
+        )
+        self.stdout.write(self.style.SUCCESS(f"Archived {moved} booking(s) that ended before {cutoff:%Y-%m-%d}."))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from booking_app import totals
+from booking_app.models import ArchivedBooking, BookingRequest
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute total_duration_minutes, total_price and service_names from each "
+        "booking's services, in batches. Run once after migrating; safe to re-run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch", type=int, default=totals.DEFAULT_BATCH_SIZE, help="Bookings per transaction.")
+        parser.add_argument("--skip-archive", action="store_true", help="Leave ArchivedBooking rows alone.")
+
+    def handle(self, *args, **options):
+        models = [BookingRequest] if options["skip_archive"] else [BookingRequest, ArchivedBooking]
+        for model in models:
+            label = model._meta.verbose_name_plural
+            done = totals.backfill(
+                model,
+                batch_size=options["batch"],
+                progress=lambda n, label=label: self.stdout.write(f"  {n} {label}..."),
+            )
+            self.stdout.write(self.style.SUCCESS(f"Updated {done} {label}."))
@@ -0,0 +1,100 @@
+import datetime
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from booking_app import archive
+from booking_app.benchmarking import benchmark_endpoints, percentile, temporary_database
+from booking_app.models import ArchivedBooking, BookingRequest
+from booking_app.synthetic import clear_dataset, seed_dataset
+
+# Hot-path endpoints whose cost follows the size of BookingRequest.
+HOT_ENDPOINTS = (
+    "calendar_events",
+    "apple_calendar_feed",
+    "bookings_list",
+    "clients_list",
+    "dashboard_summary",
+    "availability_slots",
+    "booking_suggestions",
+    "book_request:post",
+)
+
+
+class Command(BaseCommand):
+    help = "Time hot booking queries before and after archiving old history."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--bookings", type=int, default=20000)
+        parser.add_argument("--clients", type=int, default=2000)
+        parser.add_argument("--past-days", type=int, default=1460, help="History seeded before today.")
+        parser.add_argument("--future-days", type=int, default=90)
+        parser.add_argument("--older-than-days", type=int, default=180, help="Archive cutoff.")
+        parser.add_argument("--repeat", type=int, default=10)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def _overlap_check_ms(self, repeat, rng):
+        """p50 of the overlap guard that runs on every booking save."""
+        samples = []
+        now = timezone.now()
+        for _ in range(repeat * 10):
+            start = now + datetime.timedelta(hours=rng.randint(1, 24 * 60))
+            t0 = time.perf_counter()
+            BookingRequest.objects.filter(
+                BookingRequest._overlap_q(start, start + datetime.timedelta(hours=1))
+            ).exists()
+            samples.append((time.perf_counter() - t0) * 1000)
+        return percentile(samples, 50)
+
+    def _measure(self, repeat, context, rng):
+        results = {
+            label: stats["p50_ms"]
+            for label, stats in benchmark_endpoints(repeat, context, labels=HOT_ENDPOINTS).items()
+            if "skipped" not in stats
+        }
+        results["overlap_check"] = self._overlap_check_ms(repeat, rng)
+        return results
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        month_start = today.replace(day=1)
+        month_end = (month_start + datetime.timedelta(days=32)).replace(day=1)
+        context = {"month_start": month_start.isoformat(), "month_end": month_end.isoformat()}
+
+        with temporary_database():
+            clear_dataset()
+            seed_dataset(
+                clients=options["clients"],
+                bookings=options["bookings"],
+                applications=50,
+                seed=options["seed"],
+                anchor=today,
+                past_days=options["past_days"],
+                future_days=options["future_days"],
+            )
+
+            before = self._measure(options["repeat"], context, random.Random(options["seed"]))
+            hot_before = BookingRequest.objects.count()
+
+            t0 = time.perf_counter()
+            cutoff = timezone.now() - datetime.timedelta(days=options["older_than_days"])
+            moved = archive.archive_bookings(cutoff)
+            elapsed = time.perf_counter() - t0
+
+            after = self._measure(options["repeat"], context, random.Random(options["seed"]))
+            hot_after = BookingRequest.objects.count()
+
+            self.stdout.write(
+                f"Archived {moved} of {hot_before} bookings in {elapsed:.2f}s "
+                f"(hot table {hot_before} -> {hot_after}, archive {ArchivedBooking.objects.count()})."
+            )
+
+        self.stdout.write(f"\n{'p50 ms':<24} {'before':>9} {'after':>9} {'speedup':>8}")
+        for label in before:
+            a, b = before[label], after.get(label)
+            if b is None:
+                continue
+            speedup = f"{a / b:.1f}x" if b else "-"
+            self.stdout.write(f"{label:<24} {a:>9.2f} {b:>9.2f} {speedup:>8}")
@@ -0,0 +1,77 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from booking_app import availability
+from booking_app.benchmarking import percentile, temporary_database
+from booking_app.synthetic import clear_dataset, seed_dataset
+
+
+class Command(BaseCommand):
+    help = "Time public availability as the number of groomers grows."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--resources",
+            default="1,5,10,20,40",
+            help="Comma-separated groomer counts to benchmark.",
+        )
+        parser.add_argument(
+            "--bookings-per-groomer",
+            type=int,
+            default=300,
+            help="Future bookings seeded for each groomer.",
+        )
+        parser.add_argument("--days", type=int, default=31, help="Availability range in days.")
+        parser.add_argument("--duration", type=int, default=90, help="Appointment length in minutes.")
+        parser.add_argument("--step", type=int, default=15)
+        parser.add_argument("--repeat", type=int, default=10)
+
+    def handle(self, *args, **options):
+        try:
+            counts = [int(n) for n in options["resources"].split(",") if n.strip()]
+        except ValueError:
+            raise CommandError("--resources must be a comma-separated list of integers")
+
+        tz = timezone.get_current_timezone()
+        duration = datetime.timedelta(minutes=options["duration"])
+        step = datetime.timedelta(minutes=options["step"])
+        today = timezone.localdate()
+        range_start = timezone.make_aware(datetime.datetime.combine(today, datetime.time(0, 0)), tz)
+        range_end = range_start + datetime.timedelta(days=options["days"])
+
+        self.stdout.write(f"{'groomers':>8} {'bookings':>9} {'slots':>7} {'p50 ms':>9} {'p95 ms':>9}")
+
+        with temporary_database():
+            for n in counts:
+                with transaction.atomic():
+                    clear_dataset()
+                    seeded = seed_dataset(
+                        clients=50,
+                        bookings=n * options["bookings_per_groomer"],
+                        applications=0,
+                        anchor=today,
+                        past_days=0,
+                        future_days=options["days"],
+                        groomers=n,
+                    )
+
+                samples = []
+                slots = 0
+                for _ in range(options["repeat"]):
+                    t0 = time.perf_counter()
+                    slots = sum(
+                        1
+                        for _ in availability.iter_available_slots(
+                            range_start, range_end, duration, step, tz
+                        )
+                    )
+                    samples.append((time.perf_counter() - t0) * 1000)
+
+                self.stdout.write(
+                    f"{n:>8} {seeded['bookings']:>9} {slots:>7} "
+                    f"{percentile(samples, 50):>9.2f} {percentile(samples, 95):>9.2f}"
+                )
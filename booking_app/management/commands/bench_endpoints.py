@@ -0,0 +1,80 @@
+import datetime
+import json
+import platform
+
+import django
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from booking_app.benchmarking import benchmark_endpoints, temporary_database
+from booking_app.synthetic import clear_dataset, seed_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Time every booking_app endpoint through the test client at several "
+        "synthetic data sizes and write p50/p95 and query counts as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            default="100,1000,10000",
+            help="Comma-separated booking counts to benchmark at.",
+        )
+        parser.add_argument("--repeat", type=int, default=10)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", default="bench_results.json")
+
+    def handle(self, *args, **options):
+        sizes = [int(s) for s in options["sizes"].split(",") if s.strip()]
+
+        today = timezone.localdate()
+        month_start = today.replace(day=1)
+        month_end = (month_start + datetime.timedelta(days=32)).replace(day=1)
+        context = {
+            "month_start": month_start.isoformat(),
+            "month_end": month_end.isoformat(),
+        }
+
+        report = {
+            "meta": {
+                "generated_at": timezone.now().isoformat(),
+                "anchor": today.isoformat(),
+                "django": django.get_version(),
+                "python": platform.python_version(),
+                "repeat": options["repeat"],
+                "seed": options["seed"],
+            },
+            "sizes": {},
+        }
+
+        with temporary_database():
+            for size in sizes:
+                clear_dataset()
+                counts = seed_dataset(
+                    clients=max(size // 10, 1),
+                    bookings=size,
+                    applications=max(size // 20, 1),
+                    seed=options["seed"],
+                    anchor=today,
+                )
+
+                self.stdout.write(f"\n== {size} bookings ==")
+                results = benchmark_endpoints(repeat=options["repeat"], context=context)
+                report["sizes"][str(size)] = {"rows": counts, "endpoints": results}
+
+                for label, stats in results.items():
+                    if "skipped" in stats:
+                        self.stdout.write(f"  {label:<28} skipped ({stats['skipped']})")
+                        continue
+                    self.stdout.write(
+                        f"  {label:<28} {stats['status']:>3}  "
+                        f"p50={stats['p50_ms']:9.2f}ms  p95={stats['p95_ms']:9.2f}ms  "
+                        f"queries={stats['queries']}"
+                    )
+
+        with open(options["output"], "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2, sort_keys=True)
+
+        self.stdout.write(self.style.SUCCESS(f"\nWrote {options['output']}"))
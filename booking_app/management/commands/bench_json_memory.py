@@ -0,0 +1,90 @@
+import datetime
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.http import JsonResponse
+from django.utils import timezone
+
+from booking_app.benchmarking import temporary_database
+from booking_app.models import BookingRequest, Client
+from booking_app.streaming import StreamingJsonResponse, iter_queryset
+from booking_app.views import _calendar_event
+
+
+def _seed(rows):
+    clients = Client.objects.bulk_create(
+        [
+            Client(full_name=f"Client {i}", address=f"{i} Main St", phone=f"555{i:07d}")
+            for i in range(max(rows // 50, 1))
+        ]
+    )
+
+    base = timezone.now().replace(minute=0, second=0, microsecond=0)
+    hour = datetime.timedelta(hours=1)
+
+    batch = []
+    for i in range(rows):
+        start = base + hour * i
+        batch.append(
+            BookingRequest(
+                client=clients[i % len(clients)],
+                address=f"{i} Main St",
+                pet_name=f"Pet {i}",
+                pet_breed="Poodle",
+                pet_weight_lbs=20,
+                pet_age_years=3,
+                scheduled_start=start,
+                scheduled_end=start + hour,
+                status="confirmed",
+            )
+        )
+        if len(batch) >= 5000:
+            BookingRequest.objects.bulk_create(batch)
+            batch = []
+
+    if batch:
+        BookingRequest.objects.bulk_create(batch)
+
+
+def _measure(fn):
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    t0 = time.perf_counter()
+    size = fn()
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, peak, elapsed
+
+
+class Command(BaseCommand):
+    help = "Compare peak memory of JsonResponse vs StreamingJsonResponse for the calendar feed."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100_000)
+
+    def handle(self, *args, **options):
+        rows = options["rows"]
+
+        with temporary_database():
+            self.stdout.write(f"Seeding {rows} bookings...")
+            _seed(rows)
+
+            def qs():
+                return BookingRequest.objects.select_related("client").exclude(status="declined")
+
+            def buffered():
+                resp = JsonResponse([_calendar_event(b) for b in qs()], safe=False)
+                return len(resp.content)
+
+            def streamed():
+                resp = StreamingJsonResponse(iter_queryset(qs(), _calendar_event))
+                return sum(len(chunk) for chunk in resp.streaming_content)
+
+            for label, fn in (("JsonResponse", buffered), ("StreamingJsonResponse", streamed)):
+                size, peak, elapsed = _measure(fn)
+                self.stdout.write(
+                    f"{label:<22} body={size / 1e6:7.1f} MB  "
+                    f"peak={peak / 1e6:7.1f} MB  time={elapsed:6.2f}s"
+                )
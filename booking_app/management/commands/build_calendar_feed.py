@@ -0,0 +1,14 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from booking_app import calendar_feed
+
+
+class Command(BaseCommand):
+    help = "Rebuild the calendar.ics snapshot and subscriber token file now (e.g. after a deploy)."
+
+    def handle(self, *args, **options):
+        path = calendar_feed.write_snapshot()
+        calendar_feed.write_tokens()
+        self.stdout.write(self.style.SUCCESS(f"Wrote {path} ({os.path.getsize(path)} bytes)"))
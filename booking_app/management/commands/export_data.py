@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from booking_app import exports
+from booking_app.streaming import DEFAULT_CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = "Stream bookings or clients to a CSV / JSON Lines file with flat memory use."
+
+    def add_arguments(self, parser):
+        parser.add_argument("dataset", choices=("bookings", "clients"))
+        parser.add_argument("--format", choices=exports.FORMATS, default="csv")
+        parser.add_argument("--start", help="First scheduled date (YYYY-MM-DD), bookings only.")
+        parser.add_argument("--end", help="Last scheduled date, inclusive (YYYY-MM-DD), bookings only.")
+        parser.add_argument(
+            "--status",
+            action="append",
+            default=[],
+            help="Only bookings in this status (repeatable).",
+        )
+        parser.add_argument("--include-archive", action="store_true", help="Add archived bookings.")
+        parser.add_argument("--active-only", action="store_true", help="Skip inactive clients.")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument("--output", "-o", default="-", help="File to write ('-' for stdout).")
+
+    def handle(self, *args, **options):
+        if options["dataset"] == "bookings":
+            try:
+                start, end = exports.parse_range(options["start"], options["end"])
+            except ValueError:
+                raise CommandError("--start/--end must be YYYY-MM-DD")
+            rows = exports.iter_bookings(
+                start,
+                end,
+                statuses=options["status"],
+                include_archive=options["include_archive"],
+                chunk_size=options["chunk_size"],
+            )
+            header = exports.BOOKING_HEADER
+        else:
+            rows = exports.iter_clients(
+                include_inactive=not options["active_only"], chunk_size=options["chunk_size"]
+            )
+            header = exports.CLIENT_HEADER
+
+        pieces = exports.iter_encoded(rows, header, options["format"])
+
+        if options["output"] == "-":
+            for piece in pieces:
+                self.stdout.write(piece, ending="")
+            return
+
+        with open(options["output"], "w", encoding="utf-8", newline="") as fh:
+            for piece in pieces:
+                fh.write(piece)
+        self.stderr.write(self.style.SUCCESS(f"Wrote {options['output']}"))
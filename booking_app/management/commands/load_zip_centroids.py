@@ -0,0 +1,67 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from booking_app.models import ZipCentroid
+from booking_app.travel import centroids_changed
+
+ZIP_COLUMNS = ("zip_code", "zip", "zcta", "postal_code")
+LAT_COLUMNS = ("latitude", "lat")
+LNG_COLUMNS = ("longitude", "lng", "lon", "long")
+
+
+def _column(header, names):
+    for name in names:
+        if name in header:
+            return header.index(name)
+    raise CommandError(f"CSV needs one of these columns: {', '.join(names)}")
+
+
+class Command(BaseCommand):
+    help = "Load zip code centroids (zip, latitude, longitude) from a CSV file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV with a header row, e.g. a Census ZCTA gazetteer export.")
+        parser.add_argument(
+            "--replace",
+            action="store_true",
+            help="Delete every existing centroid first.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with open(options["path"], newline="") as fh:
+                reader = csv.reader(fh, delimiter="\t" if options["path"].endswith(".txt") else ",")
+                header = [h.strip().lower() for h in next(reader, [])]
+                zip_i = _column(header, ZIP_COLUMNS)
+                lat_i = _column(header, LAT_COLUMNS)
+                lng_i = _column(header, LNG_COLUMNS)
+
+                rows = {}
+                for line in reader:
+                    try:
+                        zip_code = line[zip_i].strip().zfill(5)
+                        rows[zip_code] = ZipCentroid(
+                            zip_code=zip_code,
+                            latitude=float(line[lat_i]),
+                            longitude=float(line[lng_i]),
+                        )
+                    except (IndexError, ValueError):
+                        continue
+        except OSError as exc:
+            raise CommandError(str(exc))
+
+        with transaction.atomic():
+            if options["replace"]:
+                ZipCentroid.objects.all().delete()
+            ZipCentroid.objects.bulk_create(
+                rows.values(),
+                batch_size=2000,
+                update_conflicts=True,
+                unique_fields=["zip_code"],
+                update_fields=["latitude", "longitude"],
+            )
+            centroids_changed()
+
+        self.stdout.write(self.style.SUCCESS(f"Loaded {len(rows)} zip centroids."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from booking_app.tasks import purge_idempotency_keys
+
+
+class Command(BaseCommand):
+    help = "Delete booking idempotency keys older than --days (run daily from cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=30, help="Keep keys this many days (default 30).")
+
+    def handle(self, *args, **options):
+        deleted = purge_idempotency_keys(days=options["days"])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} idempotency key(s)."))
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from booking_app.tasks import purge_jobs
+
+
+class Command(BaseCommand):
+    help = "Delete done and failed background jobs older than --days (run daily from cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=None,
+            help="Keep finished jobs this many days (default JOBS_KEEP_DAYS).",
+        )
+
+    def handle(self, *args, **options):
+        days = options["days"]
+        if days is None:
+            days = getattr(settings, "JOBS_KEEP_DAYS", 7)
+        deleted = purge_jobs(days=days)
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} finished job(s)."))
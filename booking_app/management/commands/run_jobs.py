@@ -0,0 +1,60 @@
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from booking_app import jobs
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs (booking_app.jobs) until stopped."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Run every job that is ready now, then exit.",
+        )
+        parser.add_argument("--batch", type=int, default=10, help="Jobs claimed per poll.")
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=None,
+            help="Seconds to wait when the queue is empty (default JOBS_POLL_SECONDS).",
+        )
+
+    def handle(self, *args, **options):
+        worker = jobs.worker_id()
+        sleep = options["sleep"]
+        if sleep is None:
+            sleep = getattr(settings, "JOBS_POLL_SECONDS", 1.0)
+
+        stopping = False
+
+        def stop(signum, frame):
+            nonlocal stopping
+            stopping = True
+
+        if not options["once"]:
+            signal.signal(signal.SIGTERM, stop)
+            signal.signal(signal.SIGINT, stop)
+            self.stdout.write(f"Worker {worker} polling every {sleep}s (Ctrl+C to stop).")
+
+        total = 0
+        while not stopping:
+            close_old_connections()
+            jobs.requeue_stale()
+
+            # One batch at a time, so a stop request is honoured between batches.
+            ran = jobs.run_ready(worker, limit=options["batch"], batch=options["batch"])
+            total += ran
+
+            if options["once"]:
+                if not ran:
+                    break
+            elif not ran:
+                time.sleep(sleep)
+
+        self.stdout.write(self.style.SUCCESS(f"Ran {total} job(s)."))
@@ -0,0 +1,62 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from booking_app.models import BookingRequest, Client
+from booking_app.synthetic import clear_dataset, seed_dataset
+
+
+class Command(BaseCommand):
+    help = "Seed a deterministic synthetic dataset (clients, bookings, services, applications)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=200)
+        parser.add_argument("--bookings", type=int, default=2000)
+        parser.add_argument("--applications", type=int, default=100)
+        parser.add_argument(
+            "--groomers",
+            type=int,
+            default=0,
+            help="Create this many groomers and spread bookings across them (0 = single calendar).",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--anchor",
+            help="Date (YYYY-MM-DD) the past/future window is centred on. Defaults to today.",
+        )
+        parser.add_argument("--past-days", type=int, default=730)
+        parser.add_argument("--future-days", type=int, default=180)
+        parser.add_argument(
+            "--flush",
+            action="store_true",
+            help="Delete ALL existing clients, bookings, services and applications first.",
+        )
+
+    def handle(self, *args, **options):
+        anchor = None
+        if options["anchor"]:
+            try:
+                anchor = datetime.date.fromisoformat(options["anchor"])
+            except ValueError:
+                raise CommandError("--anchor must be YYYY-MM-DD")
+
+        has_data = Client.objects.exists() or BookingRequest.objects.exists()
+        if has_data and not options["flush"]:
+            raise CommandError("Database already has clients/bookings. Re-run with --flush to replace them.")
+
+        if options["flush"]:
+            clear_dataset()
+
+        counts = seed_dataset(
+            clients=options["clients"],
+            bookings=options["bookings"],
+            applications=options["applications"],
+            seed=options["seed"],
+            anchor=anchor,
+            past_days=options["past_days"],
+            future_days=options["future_days"],
+            groomers=options["groomers"],
+        )
+
+        summary = ", ".join(f"{n} {label}" for label, n in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Seeded {summary}."))
@@ -0,0 +1,67 @@
+import json
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from booking_app import notifications
+
+
+class Command(BaseCommand):
+    help = "Deliver queued client notifications (booking_app.notifications) in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Send everything that is ready now, then exit.",
+        )
+        parser.add_argument("--batch", type=int, default=50, help="Messages per batch (one SMTP connection).")
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=None,
+            help="Seconds to wait when the outbox is empty (default NOTIFICATIONS_POLL_SECONDS).",
+        )
+        parser.add_argument("--stats", action="store_true", help="Print delivery stats and exit.")
+
+    def handle(self, *args, **options):
+        if options["stats"]:
+            self.stdout.write(json.dumps(notifications.delivery_stats(), indent=2))
+            return
+
+        sleep = options["sleep"]
+        if sleep is None:
+            sleep = getattr(settings, "NOTIFICATIONS_POLL_SECONDS", 5.0)
+
+        stopping = False
+
+        def stop(signum, frame):
+            nonlocal stopping
+            stopping = True
+
+        if not options["once"]:
+            signal.signal(signal.SIGTERM, stop)
+            signal.signal(signal.SIGINT, stop)
+            self.stdout.write(f"Sending outbox every {sleep}s (Ctrl+C to stop).")
+
+        backend = notifications.get_backend()
+        sent = failed = 0
+        while not stopping:
+            close_old_connections()
+            notifications.queue_due_reminders()
+
+            # One batch at a time, so a stop request is honoured between batches.
+            s, f = notifications.drain(options["batch"], max_batches=1, backend=backend)
+            sent += s
+            failed += f
+
+            if options["once"]:
+                if not (s or f):
+                    break
+            elif not (s or f):
+                time.sleep(sleep)
+
+        self.stdout.write(self.style.SUCCESS(f"Sent {sent} message(s), {failed} failed."))
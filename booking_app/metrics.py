@@ -0,0 +1,318 @@
+"""Prometheus-style metrics that work across gunicorn workers.
+
+Each process keeps its counters in memory and periodically dumps them to its
+own JSON file in `METRICS_DIR`, named after its pid. The /metrics view sums
+every file. So no shared memory or external service is needed.
+
+When a worker dies its file is folded into `retired.json` on the next scrape
+and removed, so totals never go backwards and recycled workers don't pile
+up files. Pids are only checked on this host, so give each host its own
+`METRICS_DIR`. Clear the directory on deploy to reset everything.
+"""
+
+import atexit
+import fcntl
+import json
+import os
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+
+# Latency buckets in seconds.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HELP = {
+    "booking_http_requests_total": ("counter", "HTTP requests by URL name, method and status."),
+    "booking_http_request_errors_total": ("counter", "Requests that raised or returned a 5xx."),
+    "booking_http_request_duration_seconds": ("histogram", "Request latency by URL name."),
+    "booking_admissions_total": ("counter", "book_request outcomes (created, overlap_rejected, ...)."),
+    "booking_cache_requests_total": ("counter", "Cache lookups by cache name and hit/miss."),
+    "booking_jobs_total": ("counter", "Background jobs by job name and result (done, retried, failed)."),
+    "booking_notifications_total": ("counter", "Outbox deliveries by kind, channel and result (sent, retried, failed)."),
+    "booking_throttled_total": ("counter", "Requests refused with a 429 by URL name and bucket scope (ip, route)."),
+}
+
+
+def _metrics_dir():
+    path = getattr(settings, "METRICS_DIR", None)
+    if not path:
+        path = os.path.join(tempfile.gettempdir(), "booking_app_metrics")
+    os.makedirs(path, exist_ok=True)
+    return str(path)
+
+
+RETIRED_FILE = "retired.json"
+RETIRE_LOCK = ".retire.lock"
+
+
+def _key(name, labels):
+    return (name, tuple(sorted(labels.items())))
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _dead_worker_file(entry):
+    """True for "<pid>-<ns>.json" files whose process is gone."""
+    pid, sep, rest = entry.partition("-")
+    if not sep or not rest.endswith(".json") or not pid.isdigit():
+        return False
+    return int(pid) != os.getpid() and not _pid_alive(int(pid))
+
+
+def _read(path):
+    try:
+        with open(path) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def _write(directory, name, data):
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w") as fh:
+        json.dump(data, fh)
+    os.replace(tmp, os.path.join(directory, name))
+
+
+def _merge(counters, histograms, data):
+    for name, labels, value in data.get("counters", []):
+        key = (name, tuple(tuple(p) for p in labels))
+        counters[key] = counters.get(key, 0) + value
+
+    for name, labels, hist in data.get("histograms", []):
+        key = (name, tuple(tuple(p) for p in labels))
+        merged = histograms.get(key)
+        if merged is None:
+            histograms[key] = list(hist)
+        else:
+            histograms[key] = [a + b for a, b in zip(merged, hist)]
+
+
+def _dump(counters, histograms):
+    return {
+        "counters": [[n, list(l), v] for (n, l), v in counters.items()],
+        "histograms": [[n, list(l), list(h)] for (n, l), h in histograms.items()],
+    }
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._counters = {}
+        self._histograms = {}
+        self._last_flush = 0.0
+        self._started = time.time_ns()
+
+    def _after_fork(self):
+        # The child inherits the parent's counts, which the parent reports itself.
+        self._lock = threading.Lock()
+        self._reset()
+
+    def filename(self):
+        # Read the pid at flush time: under gunicorn --preload this module is
+        # imported once in the master and every worker is a fork of it.
+        return f"{os.getpid()}-{self._started}.json"
+
+    def inc(self, name, labels, amount=1):
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+        self._maybe_flush()
+
+    def observe(self, name, labels, value):
+        key = _key(name, labels)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                # One slot per bucket, then +Inf, then the sum.
+                hist = self._histograms[key] = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0]
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if value <= bound:
+                    hist[i] += 1
+                    break
+            else:
+                hist[len(LATENCY_BUCKETS)] += 1
+            hist[-1] += value
+        self._maybe_flush()
+
+    def snapshot(self):
+        with self._lock:
+            return _dump(self._counters, self._histograms)
+
+    def _maybe_flush(self):
+        interval = getattr(settings, "METRICS_FLUSH_SECONDS", 5)
+        if time.monotonic() - self._last_flush >= interval:
+            self.flush()
+
+    def flush(self):
+        self._last_flush = time.monotonic()
+        _write(_metrics_dir(), self.filename(), self.snapshot())
+
+    def collect(self):
+        """Merge this process with every other worker's last flushed file."""
+        self.flush()
+
+        counters = {}
+        histograms = {}
+        directory = _metrics_dir()
+        self._retire_dead(directory)
+
+        for entry in os.listdir(directory):
+            if not entry.endswith(".json"):
+                continue
+            data = _read(os.path.join(directory, entry))
+            if data is not None:
+                _merge(counters, histograms, data)
+
+        return counters, histograms
+
+    def _retire_dead(self, directory):
+        """Fold the files of exited workers into RETIRED_FILE and delete them."""
+        if not any(_dead_worker_file(entry) for entry in os.listdir(directory)):
+            return
+
+        with open(os.path.join(directory, RETIRE_LOCK), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            # Another scrape may have folded some while we waited for the lock.
+            dead = [entry for entry in os.listdir(directory) if _dead_worker_file(entry)]
+
+            counters = {}
+            histograms = {}
+            _merge(counters, histograms, _read(os.path.join(directory, RETIRED_FILE)) or {})
+            for entry in dead:
+                _merge(counters, histograms, _read(os.path.join(directory, entry)) or {})
+
+            _write(directory, RETIRED_FILE, _dump(counters, histograms))
+            for entry in dead:
+                os.unlink(os.path.join(directory, entry))
+
+
+registry = Registry()
+atexit.register(registry.flush)
+os.register_at_fork(after_in_child=registry._after_fork)
+
+
+def inc(name, amount=1, **labels):
+    registry.inc(name, labels, amount)
+
+
+def observe(name, value, **labels):
+    registry.observe(name, labels, value)
+
+
+def record_admission(outcome):
+    inc("booking_admissions_total", outcome=outcome)
+
+
+def record_cache(cache, hit):
+    inc("booking_cache_requests_total", cache=cache, result="hit" if hit else "miss")
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(pairs, extra=()):
+    items = list(pairs) + list(extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+
+def _fmt(value):
+    if isinstance(value, float):
+        return repr(round(value, 6))
+    return str(value)
+
+
+def render():
+    """Render every metric in the Prometheus text exposition format."""
+    counters, histograms = registry.collect()
+    lines = []
+    seen = set()
+
+    def header(name):
+        if name in seen:
+            return
+        seen.add(name)
+        kind, text = HELP.get(name, ("untyped", name))
+        lines.append(f"# HELP {name} {text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    for (name, labels), value in sorted(counters.items()):
+        header(name)
+        lines.append(f"{name}{_labels(labels)} {_fmt(value)}")
+
+    for (name, labels), hist in sorted(histograms.items()):
+        header(name)
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS, hist):
+            cumulative += count
+            lines.append(f"{name}_bucket{_labels(labels, [('le', bound)])} {cumulative}")
+        cumulative += hist[len(LATENCY_BUCKETS)]
+        lines.append(f"{name}_bucket{_labels(labels, [('le', '+Inf')])} {cumulative}")
+        lines.append(f"{name}_sum{_labels(labels)} {_fmt(hist[-1])}")
+        lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """Count and time every request by its URL name."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        t0 = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        except Exception:
+            self._record(request, 500, time.perf_counter() - t0, error=True)
+            raise
+
+        # Streamed bodies (JSON lists, exports) do their queries while being
+        # sent, so time them to the last chunk. FileResponse keeps sendfile().
+        if getattr(response, "streaming", False) and getattr(response, "file_to_stream", None) is None:
+            response.streaming_content = self._stream_then_record(
+                response.streaming_content, request, response.status_code, t0
+            )
+        else:
+            self._record(request, response.status_code, time.perf_counter() - t0)
+        return response
+
+    def _stream_then_record(self, content, request, status, t0):
+        error = False
+        try:
+            yield from content
+        except GeneratorExit:
+            # The client went away; not the server's fault.
+            raise
+        except Exception:
+            error = True
+            raise
+        finally:
+            self._record(request, status, time.perf_counter() - t0, error=error)
+
+    def _record(self, request, status, elapsed, error=False):
+        match = getattr(request, "resolver_match", None)
+        view = (match.url_name if match else None) or "<unmatched>"
+
+        inc("booking_http_requests_total", view=view, method=request.method, status=status)
+        observe("booking_http_request_duration_seconds", elapsed, view=view)
+
+        if error or status >= 500:
+            inc("booking_http_request_errors_total", view=view)
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-19 19:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking_app', '0011_bookingrequest_created_by_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='is_approved',
+            field=models.BooleanField(default=True),
+        ),
+    ]
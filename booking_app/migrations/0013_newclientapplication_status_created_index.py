@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-10-19 19:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking_app', '0012_client_is_approved'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='newclientapplication',
+            index=models.Index(fields=['status', 'created_at'], name='app_status_created_idx'),
+        ),
+    ]
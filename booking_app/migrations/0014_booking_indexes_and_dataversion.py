@@ -0,0 +1,30 @@
+# Generated by Django 6.0.2 on 2026-10-19 19:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking_app', '0013_newclientapplication_status_created_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataVersion',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('value', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='bookingrequest',
+            index=models.Index(fields=['scheduled_start', 'status'], name='booking_start_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bookingrequest',
+            index=models.Index(fields=['status', 'scheduled_start'], name='booking_status_start_idx'),
+        ),
+    ]
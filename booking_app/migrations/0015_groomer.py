@@ -0,0 +1,34 @@
+# Generated by Django 6.0.2 on 2026-10-19 19:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking_app', '0014_booking_indexes_and_dataversion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Groomer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=80)),
+                ('van_name', models.CharField(blank=True, max_length=80)),
+                ('is_active', models.BooleanField(default=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='bookingrequest',
+            name='groomer',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='bookings', to='booking_app.groomer'),
+        ),
+        migrations.AddIndex(
+            model_name='bookingrequest',
+            index=models.Index(fields=['groomer', 'scheduled_start'], name='booking_groomer_start_idx'),
+        ),
+    ]
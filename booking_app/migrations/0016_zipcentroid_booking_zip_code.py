@@ -0,0 +1,51 @@
+# Generated by Django 6.0.2 on 2026-10-19 19:24
+
+import re
+
+from django.db import migrations, models
+
+# Frozen copy of booking_app.travel.ZIP_RE.
+ZIP_RE = re.compile(r"\b(\d{5})(?:-\d{4})?\W*(?:USA?)?\W*$", re.IGNORECASE)
+
+
+def extract_zip(address):
+    match = ZIP_RE.search(address or "")
+    return match.group(1) if match else ""
+
+
+def backfill_zip_codes(apps, schema_editor):
+    BookingRequest = apps.get_model("booking_app", "BookingRequest")
+    batch = []
+    for booking in BookingRequest.objects.only("id", "address").iterator(chunk_size=2000):
+        booking.zip_code = extract_zip(booking.address)
+        if booking.zip_code:
+            batch.append(booking)
+        if len(batch) >= 2000:
+            BookingRequest.objects.bulk_update(batch, ["zip_code"])
+            batch = []
+    if batch:
+        BookingRequest.objects.bulk_update(batch, ["zip_code"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking_app', '0015_groomer'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ZipCentroid',
+            fields=[
+                ('zip_code', models.CharField(max_length=10, primary_key=True, serialize=False)),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='bookingrequest',
+            name='zip_code',
+            field=models.CharField(blank=True, max_length=10),
+        ),
+        migrations.RunPython(backfill_zip_codes, migrations.RunPython.noop),
+    ]
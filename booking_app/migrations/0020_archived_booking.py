@@ -0,0 +1,42 @@
+# Generated by Django 6.0.2 on 2026-10-19 19:38
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking_app', '0019_outbox'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedBooking',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('address', models.CharField(max_length=255)),
+                ('zip_code', models.CharField(blank=True, max_length=10)),
+                ('pet_name', models.CharField(max_length=100)),
+                ('pet_breed', models.CharField(max_length=100)),
+                ('pet_weight_lbs', models.PositiveIntegerField()),
+                ('pet_age_years', models.PositiveIntegerField()),
+                ('scheduled_start', models.DateTimeField(blank=True, null=True)),
+                ('scheduled_end', models.DateTimeField(blank=True, null=True)),
+                ('special_needs', models.TextField(blank=True)),
+                ('status', models.CharField(choices=[('new', 'New'), ('confirmed', 'Confirmed'), ('completed', 'Completed'), ('declined', 'Declined'), ('canceled', 'Canceled')], max_length=20)),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('client', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_bookings', to='booking_app.client')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('groomer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='booking_app.groomer')),
+                ('services', models.ManyToManyField(blank=True, related_name='archived_bookings', to='booking_app.service')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['client', 'scheduled_start'], name='archived_client_start_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 6.0.2 on 2026-10-19 19:53
+
+import booking_app.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking_app', '0020_archived_booking'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CalendarSubscription',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('token', models.CharField(default=booking_app.models.new_feed_token, max_length=64, unique=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
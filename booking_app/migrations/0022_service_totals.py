@@ -0,0 +1,43 @@
+# Generated by Django 6.0.2 on 2026-10-19 19:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking_app', '0021_calendar_subscription'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedbooking',
+            name='service_names',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='archivedbooking',
+            name='total_duration_minutes',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='archivedbooking',
+            name='total_price',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=9),
+        ),
+        migrations.AddField(
+            model_name='bookingrequest',
+            name='service_names',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='bookingrequest',
+            name='total_duration_minutes',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='bookingrequest',
+            name='total_price',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=9),
+        ),
+    ]
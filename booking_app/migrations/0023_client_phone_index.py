@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-10-19 19:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking_app', '0022_service_totals'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['phone'], name='client_phone_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 6.0.2 on 2026-10-19 21:10
+
+from django.db import migrations
+
+
+# Frozen copy of booking_app.models.normalize_phone.
+def normalize_phone(value):
+    return "".join(ch for ch in (value or "") if ch.isdigit())
+
+
+def normalize_client_phones(apps, schema_editor):
+    Client = apps.get_model("booking_app", "Client")
+    batch = []
+    for client in Client.objects.only("id", "phone").iterator(chunk_size=2000):
+        digits = normalize_phone(client.phone)
+        if digits != client.phone:
+            client.phone = digits
+            batch.append(client)
+        if len(batch) >= 2000:
+            Client.objects.bulk_update(batch, ["phone"])
+            batch = []
+    if batch:
+        Client.objects.bulk_update(batch, ["phone"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking_app', '0023_client_phone_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_client_phones, migrations.RunPython.noop),
+    ]
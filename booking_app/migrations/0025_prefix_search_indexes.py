@@ -0,0 +1,61 @@
+# Generated by Django 6.0.2 on 2026-10-19 22:05
+
+from django.db import migrations
+
+# (index name, table, column) behind the admin's "^" prefix and "=" zip searches.
+SEARCH_INDEXES = [
+    ("client_name_search_idx", "booking_app_client", "full_name"),
+    ("client_email_search_idx", "booking_app_client", "email"),
+    ("booking_pet_search_idx", "booking_app_bookingrequest", "pet_name"),
+    ("booking_zip_search_idx", "booking_app_bookingrequest", "zip_code"),
+    ("archived_pet_search_idx", "booking_app_archivedbooking", "pet_name"),
+    ("archived_zip_search_idx", "booking_app_archivedbooking", "zip_code"),
+]
+
+
+def _indexed_expression(vendor, quoted_column):
+    """How each backend has to index a column for its case-insensitive LIKE."""
+    if vendor == "postgresql":
+        # istartswith / iexact compile to UPPER(col::text) LIKE UPPER(%s).
+        return f"UPPER({quoted_column}) text_pattern_ops"
+    if vendor == "sqlite":
+        # LIKE is case-insensitive and only uses NOCASE indexes.
+        return f"{quoted_column} COLLATE NOCASE"
+    if vendor == "mysql":
+        # The default collations are case-insensitive already.
+        return quoted_column
+    return None
+
+
+def create_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    quote = schema_editor.quote_name
+    if _indexed_expression(vendor, "x") is None:
+        return
+    for name, table, column in SEARCH_INDEXES:
+        expression = _indexed_expression(vendor, quote(column))
+        schema_editor.execute(f"CREATE INDEX {quote(name)} ON {quote(table)} ({expression})")
+
+
+def drop_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    quote = schema_editor.quote_name
+    if _indexed_expression(vendor, "x") is None:
+        return
+    for name, table, _ in SEARCH_INDEXES:
+        if vendor == "mysql":
+            schema_editor.execute(f"DROP INDEX {quote(name)} ON {quote(table)}")
+        else:
+            schema_editor.execute(f"DROP INDEX {quote(name)}")
+
+
+class Migration(migrations.Migration):
+    """Vendor-specific expression indexes, so they live here rather than in Meta.indexes."""
+
+    dependencies = [
+        ('booking_app', '0024_normalize_client_phones'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
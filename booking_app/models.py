@@ -1,7 +1,22 @@
+import secrets
+
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import models
 from django.db.models import Q
+from django.utils import timezone
+
+
+# Bookings in these statuses occupy their time slot.
+ACTIVE_STATUSES = ("new", "confirmed")
+
+# Finished bookings that `manage.py archive_bookings` may move to ArchivedBooking.
+ARCHIVABLE_STATUSES = ("completed", "declined", "canceled")
+
+
+def normalize_phone(value):
+    """Digits only: how client phones are stored and matched."""
+    return "".join(ch for ch in (value or "") if ch.isdigit())
 
 
 class NewClientApplication(models.Model):
@@ -35,6 +50,12 @@ class NewClientApplication(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Status-filtered, newest-first listing and per-status counts.
+            models.Index(fields=["status", "created_at"], name="app_status_created_idx"),
+        ]
+
     def __str__(self):
         return f"{self.full_name} ({self.status})"
 
@@ -53,16 +74,63 @@ class Client(models.Model):
     full_name = models.CharField(max_length=120)
     address = models.CharField(max_length=255)
     phone = models.CharField(max_length=30)
+    # Optional; notifications go by email when set, otherwise by SMS.
+    email = models.EmailField(blank=True)
 
     is_active = models.BooleanField(default=True)
     is_approved = models.BooleanField(default=True)
 
+    class Meta:
+        indexes = [
+            # Phone lookups (public booking, imports, admin search).
+            models.Index(fields=["phone"], name="client_phone_idx"),
+        ]
+
     def __str__(self):
         return self.full_name
 
+    def save(self, *args, **kwargs):
+        # Digits only, so exact (indexed) lookups match however it was typed.
+        self.phone = normalize_phone(self.phone)
+        super().save(*args, **kwargs)
+
+
+class ZipCentroid(models.Model):
+    """Centre point of a zip code, used to estimate drive times offline."""
+
+    zip_code = models.CharField(max_length=10, primary_key=True)
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+
+    def __str__(self):
+        return self.zip_code
+
+
+class Groomer(models.Model):
+    """A bookable resource: one groomer and their van.
+
+    Each groomer has an independent calendar. With no groomers defined the app
+    behaves as a single shared calendar, as before.
+    """
+
+    name = models.CharField(max_length=80)
+    van_name = models.CharField(max_length=80, blank=True)
+    is_active = models.BooleanField(default=True)
+
+    def __str__(self):
+        return self.name
+
 
 class BookingRequest(models.Model):
     client = models.ForeignKey(Client, on_delete=models.CASCADE)
+    # Unassigned bookings (legacy rows, or no groomers configured) block every groomer.
+    groomer = models.ForeignKey(
+        Groomer,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="bookings",
+    )
     created_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.SET_NULL,
@@ -71,6 +139,8 @@ class BookingRequest(models.Model):
         related_name="booking_requests_created",
     )
     address = models.CharField(max_length=255)
+    # Parsed from the address on save; keys the drive-time lookups.
+    zip_code = models.CharField(max_length=10, blank=True)
     pet_name = models.CharField(max_length=100)
     pet_breed = models.CharField(max_length=100)
     pet_weight_lbs = models.PositiveIntegerField()
@@ -80,6 +150,12 @@ class BookingRequest(models.Model):
 
     services = models.ManyToManyField(Service)
 
+    # Copies of the linked services, kept in sync by signals (see totals.py),
+    # so lists, feeds and reports need no M2M join.
+    total_duration_minutes = models.PositiveIntegerField(default=0)
+    total_price = models.DecimalField(max_digits=9, decimal_places=2, default=0)
+    service_names = models.JSONField(default=list, blank=True)
+
     
     special_needs = models.TextField(blank=True)
 
@@ -98,6 +174,50 @@ class BookingRequest(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Date-range scans (calendar feeds, dashboard counts, overlap checks).
+            models.Index(fields=["scheduled_start", "status"], name="booking_start_status_idx"),
+            # Status-first lookups ordered by time (next appointment, ICS feed).
+            models.Index(fields=["status", "scheduled_start"], name="booking_status_start_idx"),
+            # Per-groomer overlap checks and availability.
+            models.Index(fields=["groomer", "scheduled_start"], name="booking_groomer_start_idx"),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_slot()
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._remember_slot()
+
+    def _remember_slot(self):
+        # What the row held when loaded/saved, to tell whether the slot moved.
+        # None (a field was deferred) means "unknown": always re-check.
+        fields = ("scheduled_start", "scheduled_end", "groomer_id", "status")
+        if all(f in self.__dict__ for f in fields):
+            self._loaded_slot = tuple(self.__dict__[f] for f in fields)
+        else:
+            self._loaded_slot = None
+
+    def slot_needs_check(self):
+        """True unless this save provably can't create an overlap.
+
+        New bookings are always checked. Existing ones only when their times
+        or groomer changed, or they move from an inactive status into an
+        active one (confirm/cancel/decline between active states can't clash).
+        """
+        loaded = getattr(self, "_loaded_slot", None)
+        if self._state.adding or loaded is None:
+            return True
+        start, end, groomer_id, status = loaded
+        if (self.scheduled_start, self.scheduled_end, self.groomer_id) != (start, end, groomer_id):
+            return True
+        return status not in ACTIVE_STATUSES and self.status in ACTIVE_STATUSES
+
     def clean(self):
         super().clean()
 
@@ -107,24 +227,64 @@ class BookingRequest(models.Model):
         if self.scheduled_end <= self.scheduled_start:
             raise ValidationError("End time must be after start time.")
 
-        overlap = (
-            Q(scheduled_start__lt=self.scheduled_end)
-            & Q(scheduled_end__gt=self.scheduled_start)
-        )
-
-        # Block overlaps with active bookings.
-        active = Q(status__in=["new", "confirmed"])
+        if not self.slot_needs_check():
+            return
 
-        qs = BookingRequest.objects.filter(overlap & active)
+        qs = BookingRequest.objects.filter(
+            self._overlap_q(self.scheduled_start, self.scheduled_end)
+        ).filter(self._resource_q(self.groomer_id))
 
         if self.pk:
             qs = qs.exclude(pk=self.pk)
 
         if qs.exists():
             raise ValidationError(
-                "That time overlaps with an existing booking."
+                "That time overlaps with an existing booking.",
+                code="overlap",
             )
 
+    @staticmethod
+    def _overlap_q(start, end):
+        # Only active bookings block time.
+        return (
+            Q(scheduled_start__lt=end)
+            & Q(scheduled_end__gt=start)
+            & Q(status__in=ACTIVE_STATUSES)
+        )
+
+    @staticmethod
+    def _resource_q(groomer_id):
+        """Bookings that compete with one on `groomer_id` for the same time.
+
+        A groomer's bookings clash with their own and with unassigned ones.
+        An unassigned booking clashes with everything.
+        """
+        if groomer_id is None:
+            return Q()
+        return Q(groomer_id=groomer_id) | Q(groomer__isnull=True)
+
+    def assign_free_groomer(self):
+        """Pick the first active groomer with no clashing booking (lowest id)."""
+        if not (self.scheduled_start and self.scheduled_end):
+            return None
+
+        busy = BookingRequest.objects.filter(
+            self._overlap_q(self.scheduled_start, self.scheduled_end),
+            groomer__isnull=False,
+        )
+        if self.pk:
+            busy = busy.exclude(pk=self.pk)
+
+        groomer = (
+            Groomer.objects.filter(is_active=True)
+            .exclude(id__in=busy.values("groomer_id"))
+            .order_by("id")
+            .first()
+        )
+        if groomer is not None:
+            self.groomer = groomer
+        return groomer
+
     def save(self, *args, **kwargs):
         if not self.address:
             if self.client_id and self.client and self.client.address:
@@ -132,15 +292,266 @@ class BookingRequest(models.Model):
             else:
                 raise ValueError("BookingRequest requires an address")
 
+        if not self.zip_code:
+            from .travel import extract_zip
+
+            self.zip_code = extract_zip(self.address)
+
         # Auto-confirm bookings created by staff users (ex: Nazar creating in his calendar).
         # This keeps client-submitted bookings as "new" so they still require approval.
         if self.status == "new" and self.created_by and getattr(self.created_by, "is_staff", False):
             self.status = "confirmed"
 
-        # Enforce guardrails (also runs `clean()`).
-        self.full_clean()
+        # With several groomers, new bookings go to whoever is free.
+        if self._state.adding and self.groomer_id is None and Groomer.objects.filter(is_active=True).exists():
+            self.assign_free_groomer()
+            if self.groomer_id is None and self.scheduled_start and self.scheduled_end:
+                raise ValidationError(
+                    "That time overlaps with an existing booking.",
+                    code="overlap",
+                )
+
+        # Enforce guardrails (also runs `clean()`). With update_fields only
+        # those fields are validated; clean() skips the overlap query itself
+        # when the slot can't have changed.
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None:
+            self.full_clean()
+        else:
+            saved = set(update_fields)
+            self.full_clean(
+                exclude=[
+                    f.name for f in self._meta.concrete_fields if f.name not in saved and f.attname not in saved
+                ],
+                validate_unique=False,
+                validate_constraints=False,
+            )
+
+        result = super().save(*args, **kwargs)
+        self._remember_slot()
+        return result
+
+    def __str__(self):
+        return f"{self.client.full_name} - {self.pet_name}"
+
+
+class ArchivedBooking(models.Model):
+    """A finished booking moved out of BookingRequest (see archive.py).
+
+    Same columns as BookingRequest, and the same primary key, so an archived
+    row can be traced back. Nothing on the hot path reads this table. Only
+    list pages with `?archive=1` and the admin do.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    client = models.ForeignKey(Client, on_delete=models.CASCADE, related_name="archived_bookings")
+    groomer = models.ForeignKey(
+        Groomer,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    address = models.CharField(max_length=255)
+    zip_code = models.CharField(max_length=10, blank=True)
+    pet_name = models.CharField(max_length=100)
+    pet_breed = models.CharField(max_length=100)
+    pet_weight_lbs = models.PositiveIntegerField()
+    pet_age_years = models.PositiveIntegerField()
+    scheduled_start = models.DateTimeField(null=True, blank=True)
+    scheduled_end = models.DateTimeField(null=True, blank=True)
+
+    services = models.ManyToManyField(Service, blank=True, related_name="archived_bookings")
+    total_duration_minutes = models.PositiveIntegerField(default=0)
+    total_price = models.DecimalField(max_digits=9, decimal_places=2, default=0)
+    service_names = models.JSONField(default=list, blank=True)
+
+    special_needs = models.TextField(blank=True)
+    status = models.CharField(max_length=20, choices=BookingRequest.STATUS_CHOICES)
+
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # Per-client history (clients_list "last booking" with the archive).
+            models.Index(fields=["client", "scheduled_start"], name="archived_client_start_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.client.full_name} - {self.pet_name} (archived)"
+
+
+class IdempotencyKey(models.Model):
+    """One successful public booking submission, keyed by its form token.
+
+    `book_request` stores the key in the same transaction as the booking. A
+    replayed POST (double tap, back button) finds it and skips the writes.
+    Old keys are pruned by `manage.py purge_idempotency_keys`.
+    """
+
+    key = models.CharField(max_length=64, unique=True)
+    booking = models.ForeignKey(
+        BookingRequest,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.key
+
+
+class Job(models.Model):
+    """A unit of background work, run by `manage.py run_jobs` (see jobs.py).
+
+    Done and failed rows are pruned by `manage.py purge_jobs`.
+    """
+
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+
+    STATUS_CHOICES = (
+        (STATUS_QUEUED, "Queued"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_DONE, "Done"),
+        (STATUS_FAILED, "Failed"),
+    )
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Workers poll for the oldest ready job.
+            models.Index(fields=["status", "run_after"], name="job_status_run_after_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+
+class OutboxMessage(models.Model):
+    """A client notification, written in the same transaction as the change.
+
+    `manage.py send_outbox` delivers pending rows in batches (see
+    notifications.py). A rolled-back status change never leaves a message
+    behind, and a slow SMTP/SMS provider never blocks the staff UI.
+    """
+
+    KIND_CHOICES = (
+        ("confirmation", "Confirmation"),
+        ("declined", "Declined"),
+        ("cancellation", "Cancellation"),
+        ("reschedule", "Reschedule"),
+        ("reminder", "Reminder"),
+    )
+    CHANNEL_CHOICES = (
+        ("email", "Email"),
+        ("sms", "SMS"),
+    )
+
+    STATUS_PENDING = "pending"
+    STATUS_SENDING = "sending"
+    STATUS_SENT = "sent"
+    STATUS_FAILED = "failed"
+
+    STATUS_CHOICES = (
+        (STATUS_PENDING, "Pending"),
+        (STATUS_SENDING, "Sending"),
+        (STATUS_SENT, "Sent"),
+        (STATUS_FAILED, "Failed"),
+    )
+
+    booking = models.ForeignKey(
+        BookingRequest,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="notifications",
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES)
+    recipient = models.CharField(max_length=255)
+    subject = models.CharField(max_length=200, blank=True)
+    body = models.TextField()
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    claim_token = models.CharField(max_length=32, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    # Stops the same reminder being queued twice.
+    dedupe_key = models.CharField(max_length=100, unique=True, null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The sender drains the oldest deliverable messages first.
+            models.Index(fields=["status", "available_at"], name="outbox_status_available_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} to {self.recipient} ({self.status})"
+
+
+def new_feed_token():
+    return secrets.token_urlsafe(24)
+
+
+class CalendarSubscription(models.Model):
+    """One subscriber (a phone, a shared calendar) to the calendar.ics feed.
+
+    Each one gets its own secret URL, so one leaked link can be revoked
+    without touching the others. Feed polls check the token against a file
+    written by calendar_feed.py, never against this table.
+    """
+
+    name = models.CharField(max_length=100)
+    token = models.CharField(max_length=64, unique=True, default=new_feed_token)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+
+class DataVersion(models.Model):
+    """Counter bumped whenever a cached dataset changes.
+
+    Lives in the database (not the cache) so every worker process agrees on
+    the current version. Cache keys embed it, so stale entries are never read.
+    """
 
-        return super().save(*args, **kwargs)
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.PositiveBigIntegerField(default=0)
 
     def __str__(self):
-        return f"{self.client.full_name} - {self.pet_name}"
\ No newline at end of file
+        return f"{self.name}={self.value}"
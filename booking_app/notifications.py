@@ -0,0 +1,318 @@
+"""Client notifications through a transactional outbox.
+
+Views call `queue_booking_message()` inside the transaction that changes the
+booking, which adds one OutboxMessage row. `manage.py send_outbox` claims
+pending rows in batches and hands each batch to the configured backend,
+which reuses one SMTP connection per batch. Failed sends are retried with
+backoff. Delivery is at-least-once: a sender that dies mid-batch gets its
+claim back after `NOTIFICATIONS_CLAIM_TIMEOUT_SECONDS`.
+
+Backends (`NOTIFICATIONS_BACKEND`):
+
+    booking_app.notifications.MailBackend  Django email (EMAIL_BACKEND). SMS goes
+                                           through an email-to-SMS gateway if
+                                           NOTIFICATIONS_SMS_EMAIL_GATEWAY is set.
+    booking_app.notifications.LogBackend   Just logs the messages (local dev).
+
+A backend may define `supports(channel)`. Clients are only messaged on a
+channel the backend supports, so without an SMS gateway clients with no
+email get nothing queued. A send that can never succeed is reported as a
+`PermanentFailure` and fails at once instead of being retried.
+
+Tests get Django's in-memory mail outbox as the SMTP stand-in. For a real
+local SMTP sink, point EMAIL_HOST/EMAIL_PORT at one.
+"""
+
+import datetime
+import logging
+import uuid
+
+from django.conf import settings
+from django.core import mail
+from django.db.models import Count, F, Min
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from . import metrics
+from .jobs import backoff_seconds
+from .models import BookingRequest, OutboxMessage
+
+logger = logging.getLogger("booking_app.notifications")
+
+SUBJECTS = {
+    "confirmation": "Your grooming appointment is confirmed",
+    "declined": "We couldn't confirm your grooming request",
+    "cancellation": "Your grooming appointment was canceled",
+    "reschedule": "Your grooming appointment has moved",
+    "reminder": "Reminder: grooming appointment tomorrow",
+}
+
+BODIES = {
+    "confirmation": "Hi {name}, {pet}'s appointment on {when} is confirmed. See you then!",
+    "declined": "Hi {name}, we couldn't fit {pet} in on {when}. Please pick another time.",
+    "cancellation": "Hi {name}, {pet}'s appointment on {when} has been canceled.",
+    "reschedule": "Hi {name}, {pet}'s appointment is now on {when}.",
+    "reminder": "Hi {name}, a reminder that we'll see {pet} on {when}.",
+}
+
+
+class PermanentFailure(str):
+    """A send error that retrying won't fix (e.g. no route for the channel)."""
+
+
+def _business_name():
+    return getattr(settings, "NOTIFICATIONS_BUSINESS_NAME", "Naz Mobile Grooming")
+
+
+def _when(booking):
+    if not booking.scheduled_start:
+        return "your requested time"
+    start = timezone.localtime(booking.scheduled_start)
+    return f"{start:%A, %B} {start.day} at {start:%I:%M %p}".replace(" 0", " ")
+
+
+def supports(channel, backend=None):
+    """Whether the configured backend can deliver on `channel`."""
+    backend = backend or get_backend()
+    check = getattr(backend, "supports", None)
+    return check is None or check(channel)
+
+
+def build_message(booking, kind, dedupe_key=None, backend=None):
+    """An unsaved OutboxMessage for `booking`'s client.
+
+    None when the client has no contact details the backend can deliver to.
+    """
+    client = booking.client
+    email = (getattr(client, "email", "") or "").strip()
+    phone = "".join(ch for ch in (client.phone or "") if ch.isdigit())
+
+    if email:
+        channel, recipient = "email", email
+    elif phone and supports("sms", backend):
+        channel, recipient = "sms", phone
+    else:
+        return None
+
+    first_name = (client.full_name or "").split(" ")[0] or "there"
+    body = BODIES[kind].format(name=first_name, pet=booking.pet_name, when=_when(booking))
+
+    return OutboxMessage(
+        booking=booking,
+        kind=kind,
+        channel=channel,
+        recipient=recipient,
+        subject=f"{SUBJECTS[kind]} - {_business_name()}",
+        body=body,
+        dedupe_key=dedupe_key,
+    )
+
+
+def queue_booking_message(booking, kind):
+    """Add a notification to the outbox. Call inside the change's transaction."""
+    message = build_message(booking, kind)
+    if message is not None:
+        message.save()
+    return message
+
+
+def queue_due_reminders(now=None):
+    """Queue one reminder per confirmed booking starting within the reminder window.
+
+    A booking that is rescheduled gets a fresh reminder for its new time.
+    Returns the number of reminders actually inserted.
+    """
+    now = now or timezone.now()
+    hours = getattr(settings, "NOTIFICATIONS_REMINDER_HOURS", 24)
+
+    bookings = BookingRequest.objects.select_related("client").filter(
+        status="confirmed",
+        scheduled_start__gt=now,
+        scheduled_start__lte=now + datetime.timedelta(hours=hours),
+    )
+
+    keyed = {f"reminder:{b.pk}:{b.scheduled_start:%Y%m%dT%H%M}": b for b in bookings}
+    # Skip bookings already reminded, so a poll only builds what is new.
+    queued = set(
+        OutboxMessage.objects.filter(dedupe_key__in=keyed).values_list("dedupe_key", flat=True)
+    )
+
+    backend = get_backend()
+    messages = []
+    for key, booking in keyed.items():
+        if key in queued:
+            continue
+        message = build_message(booking, "reminder", dedupe_key=key, backend=backend)
+        if message is not None:
+            messages.append(message)
+    if not messages:
+        return 0
+
+    # A concurrent poll may have won the race for some keys; count only rows created here.
+    started = timezone.now()
+    OutboxMessage.objects.bulk_create(messages, ignore_conflicts=True)
+    return OutboxMessage.objects.filter(
+        dedupe_key__in=[m.dedupe_key for m in messages], created_at__gte=started
+    ).count()
+
+
+def claim_batch(size, now=None):
+    """Claim up to `size` deliverable messages with one UPDATE and return them."""
+    now = now or timezone.now()
+    timeout = getattr(settings, "NOTIFICATIONS_CLAIM_TIMEOUT_SECONDS", 600)
+
+    # Give back batches whose sender died.
+    OutboxMessage.objects.filter(
+        status=OutboxMessage.STATUS_SENDING,
+        claimed_at__lt=now - datetime.timedelta(seconds=timeout),
+    ).update(status=OutboxMessage.STATUS_PENDING, claim_token="")
+
+    candidates = list(
+        OutboxMessage.objects.filter(status=OutboxMessage.STATUS_PENDING, available_at__lte=now)
+        .order_by("available_at", "id")
+        .values_list("id", flat=True)[:size]
+    )
+    if not candidates:
+        return []
+
+    # Only rows still pending are taken, so concurrent senders never share one.
+    token = uuid.uuid4().hex
+    OutboxMessage.objects.filter(id__in=candidates, status=OutboxMessage.STATUS_PENDING).update(
+        status=OutboxMessage.STATUS_SENDING, claim_token=token, claimed_at=now
+    )
+    return list(OutboxMessage.objects.filter(claim_token=token).order_by("available_at", "id"))
+
+
+def get_backend():
+    path = getattr(settings, "NOTIFICATIONS_BACKEND", "booking_app.notifications.MailBackend")
+    return import_string(path)()
+
+
+def send_batch(messages, backend=None):
+    """Deliver claimed messages. Returns (sent, failed) counts."""
+    if not messages:
+        return 0, 0
+
+    backend = backend or get_backend()
+    try:
+        errors = backend.send_messages(messages)
+    except Exception as exc:
+        # e.g. the SMTP server is down: the whole batch is retried.
+        errors = {m.pk: str(exc) or exc.__class__.__name__ for m in messages}
+
+    now = timezone.now()
+    sent_ids = [m.pk for m in messages if not errors.get(m.pk)]
+    OutboxMessage.objects.filter(id__in=sent_ids).update(
+        status=OutboxMessage.STATUS_SENT,
+        sent_at=now,
+        attempts=F("attempts") + 1,
+        claim_token="",
+        last_error="",
+    )
+
+    max_attempts = getattr(settings, "NOTIFICATIONS_MAX_ATTEMPTS", 5)
+    failed = 0
+    for message in messages:
+        if message.pk in sent_ids:
+            metrics.inc(
+                "booking_notifications_total", kind=message.kind, channel=message.channel, result="sent"
+            )
+            continue
+
+        failed += 1
+        attempts = message.attempts + 1
+        gave_up = attempts >= max_attempts or isinstance(errors[message.pk], PermanentFailure)
+        OutboxMessage.objects.filter(pk=message.pk).update(
+            status=OutboxMessage.STATUS_FAILED if gave_up else OutboxMessage.STATUS_PENDING,
+            attempts=attempts,
+            available_at=now + datetime.timedelta(seconds=backoff_seconds(attempts)),
+            claim_token="",
+            last_error=errors[message.pk][:2000],
+        )
+        metrics.inc(
+            "booking_notifications_total",
+            kind=message.kind,
+            channel=message.channel,
+            result="failed" if gave_up else "retried",
+        )
+        logger.warning("notification #%s to %s failed: %s", message.pk, message.recipient, errors[message.pk])
+
+    return len(sent_ids), failed
+
+
+def drain(batch_size=50, max_batches=None, backend=None):
+    """Send pending messages batch by batch until none are ready. Returns (sent, failed)."""
+    backend = backend or get_backend()
+    sent = failed = batches = 0
+
+    while max_batches is None or batches < max_batches:
+        messages = claim_batch(batch_size)
+        if not messages:
+            break
+        s, f = send_batch(messages, backend)
+        sent += s
+        failed += f
+        batches += 1
+
+    return sent, failed
+
+
+def delivery_stats():
+    """Counts by status and kind, plus the age of the oldest waiting message."""
+    by_status = dict(
+        OutboxMessage.objects.values_list("status").annotate(n=Count("id")).values_list("status", "n")
+    )
+    by_kind = {}
+    for kind, status, n in (
+        OutboxMessage.objects.values_list("kind", "status").annotate(n=Count("id")).values_list("kind", "status", "n")
+    ):
+        by_kind.setdefault(kind, {})[status] = n
+
+    oldest = OutboxMessage.objects.filter(status=OutboxMessage.STATUS_PENDING).aggregate(
+        oldest=Min("created_at")
+    )["oldest"]
+
+    return {
+        "by_status": {status: by_status.get(status, 0) for status, _ in OutboxMessage.STATUS_CHOICES},
+        "by_kind": by_kind,
+        "oldest_pending_seconds": round((timezone.now() - oldest).total_seconds()) if oldest else None,
+    }
+
+
+class LogBackend:
+    def send_messages(self, messages):
+        for message in messages:
+            logger.info("[%s] to %s: %s", message.channel, message.recipient, message.body)
+        return {}
+
+
+class MailBackend:
+    """Send through Django's email backend, one connection per batch."""
+
+    def supports(self, channel):
+        return channel == "email" or bool(getattr(settings, "NOTIFICATIONS_SMS_EMAIL_GATEWAY", ""))
+
+    def _address(self, message):
+        if message.channel == "email":
+            return message.recipient
+        gateway = getattr(settings, "NOTIFICATIONS_SMS_EMAIL_GATEWAY", "")
+        return f"{message.recipient}@{gateway}" if gateway else ""
+
+    def send_messages(self, messages):
+        errors = {}
+        from_email = getattr(settings, "DEFAULT_FROM_EMAIL", None)
+
+        with mail.get_connection() as connection:
+            for message in messages:
+                to = self._address(message)
+                if not to:
+                    errors[message.pk] = PermanentFailure("No SMS gateway configured")
+                    continue
+                try:
+                    mail.EmailMessage(
+                        message.subject, message.body, from_email, [to], connection=connection
+                    ).send()
+                except Exception as exc:
+                    errors[message.pk] = str(exc) or exc.__class__.__name__
+
+        return errors
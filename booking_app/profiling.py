@@ -0,0 +1,208 @@
+"""On-demand request profiling for staff.
+
+With `PROFILING_ENABLED = True`, a staff user can add `?_profile=cpu`,
+`?_profile=mem` or `?_profile=cpu,mem` to any URL, or send the same value in
+an `X-Profile` header. That request then runs under cProfile and/or
+tracemalloc. Each capture is written to `PROFILING_DIR` as:
+
+    <id>.prof      pstats dump (open with snakeviz / `python -m pstats`)
+    <id>.snapshot  tracemalloc snapshot (`tracemalloc.Snapshot.load`)
+    <id>.json      summary with the top functions and allocation sites
+
+Only the newest `PROFILING_MAX_CAPTURES` are kept. The /profiling/ page
+lists them.
+"""
+
+import cProfile
+import datetime
+import json
+import os
+import pstats
+import re
+import tempfile
+import time
+import tracemalloc
+import uuid
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+# Ids sort chronologically: <date>-<time>-<microseconds>-<random>.
+CAPTURE_ID_RE = re.compile(r"^[0-9]{8}-[0-9]{6}-[0-9]{6}-[0-9a-f]{4}$")
+
+TOP_N = 15
+
+VALID_MODES = {"cpu", "mem"}
+
+
+def capture_dir():
+    path = getattr(settings, "PROFILING_DIR", None)
+    if not path:
+        path = os.path.join(tempfile.gettempdir(), "booking_app_profiles")
+    os.makedirs(path, exist_ok=True)
+    return str(path)
+
+
+def capture_path(capture_id, ext):
+    """Path of one capture file, or None for a malformed id."""
+    if not CAPTURE_ID_RE.match(capture_id or ""):
+        return None
+    return os.path.join(capture_dir(), f"{capture_id}.{ext}")
+
+
+def requested_modes(request):
+    raw = request.GET.get("_profile") or request.headers.get("X-Profile") or ""
+    modes = {m.strip().lower() for m in raw.split(",") if m.strip()}
+    if modes & {"1", "all", "both"}:
+        return set(VALID_MODES)
+    return modes & VALID_MODES
+
+
+def _top_functions(profiler):
+    stats = pstats.Stats(profiler)
+    rows = []
+    for (filename, line, func), (cc, nc, tt, ct, _callers) in stats.stats.items():
+        rows.append(
+            {
+                "function": f"{os.path.basename(filename)}:{line}({func})",
+                "calls": nc,
+                "total_ms": round(tt * 1000, 3),
+                "cumulative_ms": round(ct * 1000, 3),
+            }
+        )
+    rows.sort(key=lambda r: r["cumulative_ms"], reverse=True)
+    return rows[:TOP_N]
+
+
+def _top_allocations(snapshot):
+    snapshot = snapshot.filter_traces(
+        (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        )
+    )
+    rows = []
+    for stat in snapshot.statistics("lineno")[:TOP_N]:
+        frame = stat.traceback[0]
+        rows.append(
+            {
+                "location": f"{os.path.basename(frame.filename)}:{frame.lineno}",
+                "size_kb": round(stat.size / 1024, 1),
+                "count": stat.count,
+            }
+        )
+    return rows
+
+
+def _prune(directory, keep):
+    ids = sorted(f[:-5] for f in os.listdir(directory) if f.endswith(".json"))
+    for old in ids[:-keep] if keep > 0 else ids:
+        for ext in ("json", "prof", "snapshot"):
+            try:
+                os.remove(os.path.join(directory, f"{old}.{ext}"))
+            except FileNotFoundError:
+                pass
+
+
+def save_capture(request, response, elapsed, profiler=None, snapshot=None, peak=None):
+    directory = capture_dir()
+    capture_id = f"{datetime.datetime.now():%Y%m%d-%H%M%S-%f}-{uuid.uuid4().hex[:4]}"
+    match = getattr(request, "resolver_match", None)
+
+    summary = {
+        "id": capture_id,
+        "created": time.time(),
+        "method": request.method,
+        "path": request.get_full_path(),
+        "url_name": match.url_name if match else None,
+        "status": response.status_code,
+        "elapsed_ms": round(elapsed * 1000, 2),
+        "user": request.user.get_username(),
+        "top_functions": [],
+        "top_allocations": [],
+        "peak_kb": None,
+    }
+
+    if profiler is not None:
+        profiler.dump_stats(os.path.join(directory, f"{capture_id}.prof"))
+        summary["top_functions"] = _top_functions(profiler)
+
+    if snapshot is not None:
+        snapshot.dump(os.path.join(directory, f"{capture_id}.snapshot"))
+        summary["top_allocations"] = _top_allocations(snapshot)
+        summary["peak_kb"] = round(peak / 1024, 1)
+
+    with open(os.path.join(directory, f"{capture_id}.json"), "w") as fh:
+        json.dump(summary, fh)
+
+    _prune(directory, getattr(settings, "PROFILING_MAX_CAPTURES", 20))
+    return capture_id
+
+
+def recent_captures():
+    """Capture summaries, newest first."""
+    directory = capture_dir()
+    captures = []
+    for name in sorted(os.listdir(directory), reverse=True):
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as fh:
+                capture = json.load(fh)
+        except (OSError, ValueError):
+            continue
+        capture["has_prof"] = os.path.exists(os.path.join(directory, f"{capture['id']}.prof"))
+        captures.append(capture)
+    return captures
+
+
+class ProfilingMiddleware:
+    """Must sit after AuthenticationMiddleware (it checks `request.user`)."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, "PROFILING_ENABLED", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        modes = requested_modes(request)
+        user = getattr(request, "user", None)
+
+        if not modes or not (user and user.is_staff):
+            return self.get_response(request)
+
+        profiler = cProfile.Profile() if "cpu" in modes else None
+        trace_mem = "mem" in modes and not tracemalloc.is_tracing()
+
+        if trace_mem:
+            tracemalloc.start(getattr(settings, "PROFILING_TRACEMALLOC_FRAMES", 5))
+
+        t0 = time.perf_counter()
+        try:
+            if profiler is not None:
+                try:
+                    profiler.enable()
+                except ValueError:
+                    # Another profiler (e.g. a debugger) already owns the hook.
+                    profiler = None
+
+            response = self.get_response(request)
+
+            # Feeds stream their bodies; render them inside the capture.
+            if getattr(response, "streaming", False):
+                response.streaming_content = [b"".join(response.streaming_content)]
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            elapsed = time.perf_counter() - t0
+
+            snapshot = peak = None
+            if trace_mem:
+                snapshot = tracemalloc.take_snapshot()
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+        capture_id = save_capture(request, response, elapsed, profiler, snapshot, peak)
+        response["X-Profile-Capture"] = capture_id
+        return response
@@ -0,0 +1,108 @@
+"""Serve read-only views from a replica database.
+
+Views wrapped in `@replica_reads` run their ORM reads on `READ_REPLICA_ALIAS`
+(a streaming body runs there too, since it is consumed after the view
+returns). Everything else, and every write, stays on "default".
+
+Read-your-writes: `ReplicaPinMiddleware` notices when a request wrote to the
+primary (a staff member confirming or moving a booking, a client booking a
+slot, a login). It then sets a short-lived cookie. While that cookie is
+present the browser's reads stay on the primary, so a replica that is a few
+seconds behind never hides a change the user just made.
+
+With READ_REPLICA_ALIAS unset (or not in DATABASES) this is all a no-op.
+"""
+
+import contextvars
+import functools
+
+from django.conf import settings
+
+PIN_COOKIE = "db_pin"
+
+# Alias that reads in the current view should use (None = router default).
+_read_alias = contextvars.ContextVar("read_alias", default=None)
+# Per-request {"pinned": bool, "wrote": bool}, set by the middleware.
+_request_state = contextvars.ContextVar("replica_request_state", default=None)
+
+
+def replica_alias():
+    alias = getattr(settings, "READ_REPLICA_ALIAS", None)
+    return alias if alias and alias in settings.DATABASES else None
+
+
+class ReplicaRouter:
+    """DATABASE_ROUTERS entry: replica reads inside `@replica_reads` views."""
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state["wrote"] = True
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary.
+        return db == "default"
+
+
+def _streaming_on(alias, content):
+    token = _read_alias.set(alias)
+    try:
+        yield from content
+    finally:
+        _read_alias.reset(token)
+
+
+def replica_reads(view):
+    """Run the view's reads on the replica unless this browser is pinned."""
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        alias = replica_alias()
+        state = _request_state.get()
+        if alias is None or (state is not None and state["pinned"]):
+            return view(request, *args, **kwargs)
+
+        token = _read_alias.set(alias)
+        try:
+            response = view(request, *args, **kwargs)
+        finally:
+            _read_alias.reset(token)
+
+        if getattr(response, "streaming", False):
+            response.streaming_content = _streaming_on(alias, response.streaming_content)
+        return response
+
+    return wrapper
+
+
+class ReplicaPinMiddleware:
+    """Keep a browser on the primary for READ_REPLICA_PIN_SECONDS after it writes."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = {"pinned": PIN_COOKIE in request.COOKIES, "wrote": False}
+        token = _request_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+
+        if state["wrote"] and replica_alias() is not None:
+            response.set_cookie(
+                PIN_COOKIE,
+                "1",
+                max_age=getattr(settings, "READ_REPLICA_PIN_SECONDS", 10),
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
@@ -0,0 +1,109 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import caching, calendar_feed, totals, travel
+from .models import (
+    ArchivedBooking,
+    BookingRequest,
+    CalendarSubscription,
+    Client,
+    NewClientApplication,
+    Service,
+    ZipCentroid,
+)
+
+
+@receiver(post_save, sender=BookingRequest)
+@receiver(post_delete, sender=BookingRequest)
+@receiver(m2m_changed, sender=BookingRequest.services.through)
+def bump_booking_version(sender, **kwargs):
+    if kwargs.get("action", "post_").startswith("post_"):
+        caching.bump_version(caching.BOOKINGS)
+
+
+@receiver(m2m_changed, sender=BookingRequest.services.through)
+def sync_booking_totals(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse:
+        # service.bookingrequest_set.add()/remove()/clear()
+        if action == "pre_clear":
+            instance._cleared_booking_ids = totals.booking_ids_for_service(BookingRequest, instance.pk)
+        elif action == "post_clear":
+            totals.refresh(BookingRequest, instance.__dict__.pop("_cleared_booking_ids", []))
+        elif action in ("post_add", "post_remove"):
+            totals.refresh(BookingRequest, pk_set)
+        return
+
+    if action.startswith("post_"):
+        values = totals.compute(BookingRequest, [instance.pk])[instance.pk]
+        BookingRequest.objects.filter(pk=instance.pk).update(**values)
+        for field, value in values.items():
+            setattr(instance, field, value)
+
+
+@receiver(post_save, sender=Service)
+def sync_totals_on_service_edit(sender, instance, created, **kwargs):
+    if not created:
+        for model in (BookingRequest, ArchivedBooking):
+            totals.refresh(model, totals.booking_ids_for_service(model, instance.pk))
+
+
+@receiver(pre_delete, sender=Service)
+def remember_service_bookings(sender, instance, **kwargs):
+    # The link rows are gone by post_delete, so collect the bookings first.
+    instance._booking_ids = {
+        model: totals.booking_ids_for_service(model, instance.pk) for model in (BookingRequest, ArchivedBooking)
+    }
+
+
+@receiver(post_delete, sender=Service)
+def sync_totals_on_service_delete(sender, instance, **kwargs):
+    for model, ids in instance.__dict__.pop("_booking_ids", {}).items():
+        totals.refresh(model, ids)
+
+
+@receiver(post_save, sender=NewClientApplication)
+@receiver(post_delete, sender=NewClientApplication)
+def bump_application_version(sender, **kwargs):
+    caching.bump_version(caching.APPLICATIONS)
+
+
+@receiver(post_save, sender=ZipCentroid)
+@receiver(post_delete, sender=ZipCentroid)
+def bump_zip_centroid_version(sender, **kwargs):
+    travel.centroids_changed()
+
+
+# calendar.ics only lists confirmed bookings, so other changes skip the rebuild.
+@receiver(post_save, sender=BookingRequest)
+def rebuild_feed_on_booking_save(sender, instance, created, update_fields=None, **kwargs):
+    # A status change may take a booking out of the feed, so it counts too.
+    status_changed = not created and (update_fields is None or "status" in update_fields)
+    if instance.status == "confirmed" or status_changed:
+        calendar_feed.schedule_rebuild()
+
+
+@receiver(post_delete, sender=BookingRequest)
+def rebuild_feed_on_booking_delete(sender, instance, **kwargs):
+    if instance.status == "confirmed":
+        calendar_feed.schedule_rebuild()
+
+
+@receiver(m2m_changed, sender=BookingRequest.services.through)
+def rebuild_feed_on_services_change(sender, instance, action, **kwargs):
+    if action.startswith("post_") and getattr(instance, "status", "confirmed") == "confirmed":
+        calendar_feed.schedule_rebuild()
+
+
+@receiver(post_save, sender=Client)
+@receiver(post_save, sender=Service)
+def rebuild_feed_on_name_change(sender, instance, created, **kwargs):
+    # Client names/addresses and service names are printed in the feed.
+    if not created and instance.bookingrequest_set.filter(status="confirmed").exists():
+        calendar_feed.schedule_rebuild()
+
+
+@receiver(post_save, sender=CalendarSubscription)
+@receiver(post_delete, sender=CalendarSubscription)
+def write_feed_tokens(sender, **kwargs):
+    transaction.on_commit(calendar_feed.write_tokens)
@@ -261,6 +261,24 @@
     });
   }
 
+  // Retries reuse the page's idempotency key, so the server can recognise
+  // a double tap or a back-button re-POST and skip creating a duplicate.
+  if (form) {
+    const keyInput = form.querySelector("input[name='idempotency_key']");
+    if (keyInput && !keyInput.value && window.crypto && window.crypto.randomUUID) {
+      keyInput.value = window.crypto.randomUUID();
+    }
+
+    form.addEventListener("submit", () => {
+      if (submitBtn) submitBtn.disabled = true;
+    });
+
+    // Pages restored from the back/forward cache keep the disabled button.
+    window.addEventListener("pageshow", () => {
+      if (submitBtn) submitBtn.disabled = false;
+    });
+  }
+
   applySelectedSlotFromUrl();
   autoFillEndFromStart();
   show(1);
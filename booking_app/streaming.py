@@ -0,0 +1,64 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+# Rows pulled from the database cursor per round trip when streaming a queryset.
+DEFAULT_CHUNK_SIZE = 2000
+
+# Flush encoded JSON to the client once roughly this many characters are buffered.
+# Yielding every item on its own makes WSGI servers do one write() per row.
+FLUSH_AT_CHARS = 64 * 1024
+
+
+def iter_queryset(qs, build, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield `build(obj)` for each row without caching the queryset."""
+    for obj in qs.iterator(chunk_size=chunk_size):
+        item = build(obj)
+        if item is not None:
+            yield item
+
+
+def iter_json_array(items, encoder=DjangoJSONEncoder):
+    """Encode an iterable as a JSON array, one buffered piece at a time."""
+    encode = encoder().encode
+
+    buf = ["["]
+    size = 1
+    first = True
+
+    for item in items:
+        piece = encode(item)
+        if not first:
+            # Same separator json.dumps puts between items, so the body matches
+            # JsonResponse byte for byte.
+            piece = ", " + piece
+        first = False
+
+        buf.append(piece)
+        size += len(piece)
+
+        if size >= FLUSH_AT_CHARS:
+            yield "".join(buf)
+            buf = []
+            size = 0
+
+    buf.append("]")
+    yield "".join(buf)
+
+
+class StreamingJsonResponse(StreamingHttpResponse):
+    """JSON array response that never holds the whole result set in memory.
+
+    Accepts any iterable of JSON-serializable items (usually a generator from
+    `iter_queryset`). Clients see the same body `JsonResponse(list, safe=False)`
+    would have produced.
+    """
+
+    def __init__(self, items, encoder=DjangoJSONEncoder, **kwargs):
+        kwargs.setdefault("content_type", "application/json")
+        super().__init__(iter_json_array(items, encoder=encoder), **kwargs)
+
+
+def stream_queryset(qs, build, chunk_size=DEFAULT_CHUNK_SIZE, **kwargs):
+    """Shortcut for streaming a queryset through a per-row builder."""
+    return StreamingJsonResponse(iter_queryset(qs, build, chunk_size=chunk_size), **kwargs)
+
@@ -0,0 +1,289 @@
+"""Deterministic synthetic data for local benchmarking.
+
+Everything is driven by a seeded `random.Random`, so the same arguments
+always produce the same rows. Rows go in through `bulk_create`, which skips
+`BookingRequest.save()` and its overlap query. That keeps seeding fast at
+100k+ rows.
+"""
+
+import datetime
+import random
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import (
+    ArchivedBooking,
+    BookingRequest,
+    Client,
+    Groomer,
+    NewClientApplication,
+    Service,
+    ZipCentroid,
+)
+from .totals import totals_for
+from .travel import centroids_changed, extract_zip
+
+BATCH_SIZE = 2000
+
+SERVICE_CATALOG = (
+    ("Bath & Brush", 60, "55.00"),
+    ("Full Groom", 120, "95.00"),
+    ("Puppy Intro", 45, "40.00"),
+    ("Nail Trim", 15, "15.00"),
+    ("De-shedding", 60, "50.00"),
+    ("Teeth Cleaning", 30, "25.00"),
+)
+
+FIRST_NAMES = (
+    "Alex", "Maria", "James", "Linh", "Priya", "Omar", "Grace", "Diego",
+    "Hannah", "Kenji", "Sofia", "Noah", "Aisha", "Ethan", "Chloe", "Mateo",
+)
+LAST_NAMES = (
+    "Smith", "Garcia", "Nguyen", "Patel", "Kowalski", "Johnson", "Kim",
+    "Brown", "Lopez", "Novak", "Davis", "Ali", "Rossi", "Wilson",
+)
+PET_NAMES = (
+    "Buddy", "Luna", "Max", "Bella", "Charlie", "Daisy", "Milo", "Coco",
+    "Rocky", "Lola", "Teddy", "Nala", "Bear", "Rosie", "Ziggy", "Pepper",
+)
+BREEDS = (
+    "Poodle", "Goldendoodle", "Labrador", "Shih Tzu", "Yorkie", "Maltese",
+    "Golden Retriever", "Schnauzer", "Cocker Spaniel", "Bichon Frise",
+)
+STREETS = (
+    "Main St", "Oak Ave", "Clark St", "Halsted St", "Division St",
+    "Armitage Ave", "Belmont Ave", "Lincoln Ave", "Damen Ave", "Ashland Ave",
+)
+# Approximate centroids, so ?zip= availability has drive times to work with.
+ZIP_CENTROIDS = {
+    "60610": (41.9036, -87.6344),
+    "60614": (41.9226, -87.6519),
+    "60613": (41.9543, -87.6575),
+    "60622": (41.9020, -87.6773),
+    "60647": (41.9211, -87.7015),
+    "60657": (41.9400, -87.6545),
+    "60618": (41.9464, -87.7037),
+    "60625": (41.9712, -87.7024),
+}
+ZIP_CODES = tuple(ZIP_CENTROIDS)
+
+OPEN_HOUR = 9
+CLOSE_HOUR = 18
+STEP_MINUTES = 30
+
+PAST_STATUSES = (
+    ("completed", 70),
+    ("canceled", 10),
+    ("declined", 10),
+    ("confirmed", 10),
+)
+FUTURE_STATUSES = (
+    ("confirmed", 70),
+    ("new", 25),
+    ("canceled", 5),
+)
+APPLICATION_STATUSES = (
+    ("pending", 40),
+    ("approved", 45),
+    ("declined", 15),
+)
+
+
+def _pick(rng, weighted):
+    values = [v for v, _ in weighted]
+    weights = [w for _, w in weighted]
+    return rng.choices(values, weights=weights, k=1)[0]
+
+
+def _phone(rng):
+    return "312" + "".join(str(rng.randint(0, 9)) for _ in range(7))
+
+
+def _address(rng):
+    return f"{rng.randint(100, 9999)} {rng.choice(STREETS)}, Chicago, IL {rng.choice(ZIP_CODES)}"
+
+
+def _candidate_starts(first_day, last_day, tz):
+    """Every bookable start on weekdays between open and close hours."""
+    starts = []
+    day = first_day
+    while day <= last_day:
+        if day.weekday() < 6:
+            minute = OPEN_HOUR * 60
+            while minute < CLOSE_HOUR * 60:
+                starts.append(
+                    timezone.make_aware(
+                        datetime.datetime.combine(
+                            day, datetime.time(minute // 60, minute % 60)
+                        ),
+                        tz,
+                    )
+                )
+                minute += STEP_MINUTES
+        day += datetime.timedelta(days=1)
+    return starts
+
+
+def clear_dataset():
+    """Delete every booking_app row (bookings cascade from clients)."""
+    ArchivedBooking.objects.all().delete()
+    BookingRequest.objects.all().delete()
+    Client.objects.all().delete()
+    Groomer.objects.all().delete()
+    NewClientApplication.objects.all().delete()
+    Service.objects.all().delete()
+
+
+@transaction.atomic
+def seed_dataset(
+    *,
+    clients=200,
+    bookings=2000,
+    applications=100,
+    seed=0,
+    anchor=None,
+    past_days=730,
+    future_days=180,
+    groomers=0,
+):
+    """Insert a synthetic dataset and return a dict of row counts.
+
+    Bookings are spread across `past_days` before and `future_days` after
+    `anchor` (a date, default today). They don't overlap while the calendar
+    has room. Once the range is full, starts are reused, which mirrors
+    a multi-groomer calendar.
+
+    With `groomers` > 0 that many groomers are created and bookings are dealt
+    to them round-robin, so each groomer's own timeline stays overlap-free.
+    """
+    rng = random.Random(seed)
+    tz = timezone.get_current_timezone()
+
+    if anchor is None:
+        anchor = timezone.localdate()
+
+    services = Service.objects.bulk_create(
+        [
+            Service(name=name, duration_minutes=minutes, price=price)
+            for name, minutes, price in SERVICE_CATALOG
+        ]
+    )
+
+    client_objs = []
+    for _ in range(max(clients, 1)):
+        full_name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        client_objs.append(
+            Client(
+                full_name=full_name,
+                address=_address(rng),
+                phone=_phone(rng),
+                is_active=rng.random() > 0.1,
+            )
+        )
+    client_objs = Client.objects.bulk_create(client_objs, batch_size=BATCH_SIZE)
+
+    # Reference data: keep whatever centroids are already loaded.
+    ZipCentroid.objects.bulk_create(
+        [ZipCentroid(zip_code=z, latitude=lat, longitude=lng) for z, (lat, lng) in ZIP_CENTROIDS.items()],
+        ignore_conflicts=True,
+    )
+    centroids_changed()
+
+    groomer_objs = Groomer.objects.bulk_create(
+        [Groomer(name=f"Groomer {i + 1}", van_name=f"Van {i + 1}") for i in range(groomers)]
+    )
+    stride = max(len(groomer_objs), 1)
+
+    first_day = anchor - datetime.timedelta(days=past_days)
+    last_day = anchor + datetime.timedelta(days=future_days)
+    candidates = _candidate_starts(first_day, last_day, tz)
+
+    if bookings <= len(candidates):
+        starts = sorted(rng.sample(candidates, bookings))
+    else:
+        starts = sorted(rng.choice(candidates) for _ in range(bookings))
+
+    now = timezone.now()
+    through = BookingRequest.services.through
+
+    booking_objs = []
+    booking_services = []
+    created_ats = []
+
+    for i, start in enumerate(starts):
+        chosen = rng.sample(services, rng.randint(1, 2))
+        minutes = sum(s.duration_minutes for s in chosen)
+        end = start + datetime.timedelta(minutes=minutes)
+
+        # Keep active bookings from overlapping when the calendar has room.
+        # The next booking on the same calendar is `stride` places later.
+        nxt = i + stride
+        if nxt < len(starts) and starts[nxt] > start and end > starts[nxt]:
+            end = starts[nxt]
+
+        client = rng.choice(client_objs)
+        status = _pick(rng, PAST_STATUSES if start < now else FUTURE_STATUSES)
+
+        booking_objs.append(
+            BookingRequest(
+                client=client,
+                address=client.address,
+                zip_code=extract_zip(client.address),
+                pet_name=rng.choice(PET_NAMES),
+                pet_breed=rng.choice(BREEDS),
+                pet_weight_lbs=rng.randint(5, 90),
+                pet_age_years=rng.randint(0, 15),
+                scheduled_start=start,
+                scheduled_end=end,
+                status=status,
+                groomer=groomer_objs[i % stride] if groomer_objs else None,
+                **totals_for(chosen),
+            )
+        )
+        booking_services.append(chosen)
+        created_ats.append(start - datetime.timedelta(days=rng.randint(1, 30)))
+
+    for offset in range(0, len(booking_objs), BATCH_SIZE):
+        chunk = BookingRequest.objects.bulk_create(booking_objs[offset:offset + BATCH_SIZE])
+        links = []
+        for booking, chosen in zip(chunk, booking_services[offset:offset + BATCH_SIZE]):
+            for service in chosen:
+                links.append(through(bookingrequest_id=booking.pk, service_id=service.pk))
+        through.objects.bulk_create(links)
+
+    # auto_now_add overwrites created_at on insert, so backdate afterwards.
+    for booking, created_at in zip(booking_objs, created_ats):
+        booking.created_at = created_at
+    BookingRequest.objects.bulk_update(booking_objs, ["created_at"], batch_size=BATCH_SIZE)
+
+    app_objs = []
+    app_created = []
+    for _ in range(applications):
+        app_objs.append(
+            NewClientApplication(
+                status=_pick(rng, APPLICATION_STATUSES),
+                full_name=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                address=_address(rng),
+                zip_code=rng.choice(ZIP_CODES),
+                phone=_phone(rng),
+                pet_name=rng.choice(PET_NAMES),
+                pet_breed=rng.choice(BREEDS),
+                pet_weight_lbs=rng.randint(5, 90),
+                pet_age_years=rng.randint(0, 15),
+            )
+        )
+        app_created.append(now - datetime.timedelta(minutes=rng.randint(0, past_days * 24 * 60)))
+
+    app_objs = NewClientApplication.objects.bulk_create(app_objs, batch_size=BATCH_SIZE)
+    for app, created_at in zip(app_objs, app_created):
+        app.created_at = created_at
+    NewClientApplication.objects.bulk_update(app_objs, ["created_at"], batch_size=BATCH_SIZE)
+
+    return {
+        "services": len(services),
+        "clients": len(client_objs),
+        "groomers": len(groomer_objs),
+        "bookings": len(booking_objs),
+        "applications": len(app_objs),
+    }
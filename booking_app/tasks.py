@@ -0,0 +1,41 @@
+"""Background job handlers. Enqueue them by name with `jobs.enqueue()`."""
+
+import datetime
+
+from django.utils import timezone
+
+from . import calendar_feed
+from .jobs import task
+from .models import IdempotencyKey, Job
+
+
+# Only enqueued when the cache is shared (see views._warm_dashboard_later).
+@task("warm_dashboard_summary")
+def warm_dashboard_summary():
+    from .views import dashboard_summary_data
+
+    dashboard_summary_data()
+
+
+@task("purge_idempotency_keys")
+def purge_idempotency_keys(days=30):
+    """Delete keys older than `days`. Returns how many went."""
+    cutoff = timezone.now() - datetime.timedelta(days=days)
+    deleted, _ = IdempotencyKey.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
+
+
+@task("purge_jobs")
+def purge_jobs(days=7):
+    """Delete done and failed jobs that finished more than `days` ago. Returns how many went."""
+    cutoff = timezone.now() - datetime.timedelta(days=days)
+    deleted, _ = Job.objects.filter(
+        status__in=(Job.STATUS_DONE, Job.STATUS_FAILED), finished_at__lt=cutoff
+    ).delete()
+    return deleted
+
+
+@task(calendar_feed.REBUILD_JOB)
+def rebuild_calendar_feed():
+    # A feed poll may already have caught up.
+    calendar_feed.refresh_snapshot()
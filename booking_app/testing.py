@@ -0,0 +1,41 @@
+"""Test helpers for keeping view query counts in check."""
+
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+
+@contextmanager
+def query_budget(max_queries, using=DEFAULT_DB_ALIAS):
+    """Fail if the block runs more than `max_queries` queries.
+
+    Unlike `assertNumQueries`, the budget is an upper bound, so harmless query
+    savings don't break tests but an N+1 (one query per row) always does.
+    """
+    with CaptureQueriesContext(connections[using]) as ctx:
+        yield ctx
+
+    if len(ctx) > max_queries:
+        lines = "\n".join(
+            f"{i}. {q['sql']}" for i, q in enumerate(ctx.captured_queries, start=1)
+        )
+        raise AssertionError(
+            f"{len(ctx)} queries executed, budget is {max_queries}:\n{lines}"
+        )
+
+
+class QueryBudgetMixin:
+    """TestCase mixin: request a URL and assert its query budget."""
+
+    def assertQueryBudget(self, max_queries, url, method="get", data=None, **extra):
+        send = getattr(self.client, method)
+
+        with query_budget(max_queries) as ctx:
+            response = send(url, data or {}, **extra)
+            # Streaming responses only hit the database while being consumed.
+            if getattr(response, "streaming", False):
+                response.content_bytes = b"".join(response.streaming_content)
+
+        response.query_count = len(ctx)
+        return response
@@ -1,3 +1,1836 @@
-from django.test import TestCase
+import csv
+import datetime
+import importlib
+import io
+import json
+import os
+import tempfile
+import time
+from decimal import Decimal
+from itertools import groupby
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import OperationalError, connection, connections
+from django.http import JsonResponse, StreamingHttpResponse
+from django.test import Client as TestClient
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from config import settings as project_settings
+
+from . import archive, availability, calendar_feed, exports, jobs, metrics, notifications, streaming, travel
+from .admin import EstimatedCountPaginator
+from .benchmarking import percentile
+from .importing import find_overlaps, import_clients
+from .models import (
+    ArchivedBooking,
+    BookingRequest,
+    CalendarSubscription,
+    Client,
+    Groomer,
+    IdempotencyKey,
+    Job,
+    NewClientApplication,
+    OutboxMessage,
+    Service,
+    ZipCentroid,
+)
+from .routing import PIN_COOKIE
+from .streaming import StreamingJsonResponse
+from .synthetic import clear_dataset, seed_dataset
+from .testing import QueryBudgetMixin
+from .throttling import parse_rate, take
+from .travel import Buffers, extract_zip, get_drive_times
+from .views import _warm_dashboard_later
+
+# Upper bounds on queries per view. A view that starts issuing one query per
+# row (e.g. a template walking `b.services.all` without a prefetch) blows
+# through these as soon as the dataset grows.
+VIEW_QUERY_BUDGETS = {
+    "bookings_list": 5,
+    "clients_list": 4,
+    "calendar_events": 3,
+    "availability_events": 3,
+    "availability_slots": 3,
+    "availability_dashboard": 4,
+    "availability_summary": 3,
+    "next_available_slots": 3,
+    "pending_applications": 3,
+    # Served from the snapshot: the session and user lookups, plus the
+    # freshness check (made on every poll here, CALENDAR_FEED_CHECK_SECONDS=0).
+    "apple_calendar_feed": 3,
+    "booking_suggestions": 4,
+    "export_bookings": 5,
+    "export_clients": 3,
+}
+
+VIEW_PARAMS = {
+    "booking_suggestions": {"q": "Bu"},
+    "availability_summary": {"month": timezone.localdate().strftime("%Y-%m")},
+}
+
+
+def _staff_user():
+    User = get_user_model()
+    return User.objects.create_user("staff", password="pw", is_staff=True)
+
+
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = _staff_user()
+        seed_dataset(clients=5, bookings=20, applications=5, seed=1, groomers=3)
+
+    def setUp(self):
+        self.client.force_login(self.staff)
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        settings_override = override_settings(CALENDAR_FEED_DIR=tmp.name, CALENDAR_FEED_CHECK_SECONDS=0)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        calendar_feed.write_snapshot()
+
+    def _params(self, name):
+        params = dict(VIEW_PARAMS.get(name, {}))
+        if name == "availability_slots":
+            today = timezone.localdate()
+            params["start"] = today.isoformat()
+            params["end"] = (today + datetime.timedelta(days=31)).isoformat()
+        return params
+
+    def test_views_stay_within_budget(self):
+        for name, budget in VIEW_QUERY_BUDGETS.items():
+            with self.subTest(view=name):
+                response = self.assertQueryBudget(budget, reverse(name), data=self._params(name))
+                self.assertEqual(response.status_code, 200)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        before = {
+            name: self.assertQueryBudget(budget, reverse(name), data=self._params(name)).query_count
+            for name, budget in VIEW_QUERY_BUDGETS.items()
+        }
+
+        seed_dataset(clients=20, bookings=200, applications=20, seed=2, groomers=3)
+
+        for name, budget in VIEW_QUERY_BUDGETS.items():
+            with self.subTest(view=name):
+                response = self.assertQueryBudget(budget, reverse(name), data=self._params(name))
+                self.assertEqual(response.query_count, before[name])
+
+
+class StreamingJsonResponseTests(TestCase):
+    DATA = [
+        {"id": 1, "name": "Buddy", "tags": ["a", "b"]},
+        {"id": 2, "name": "Luna — \"quoted\"", "tags": []},
+        None,
+        3.5,
+    ]
+
+    def _body(self, items):
+        response = StreamingJsonResponse(items)
+        self.assertEqual(response["Content-Type"], "application/json")
+        return b"".join(response.streaming_content).decode("utf-8")
+
+    def test_body_matches_json_dumps(self):
+        body = self._body(iter(self.DATA))
+        self.assertEqual(body, json.dumps(self.DATA))
+        self.assertEqual(body, JsonResponse(self.DATA, safe=False).content.decode("utf-8"))
+
+    def test_empty_iterator(self):
+        self.assertEqual(self._body(iter([])), "[]")
+
+    def test_body_matches_across_flushes(self):
+        data = [{"n": i, "pad": "x" * 50} for i in range(100)]
+        with mock.patch.object(streaming, "FLUSH_AT_CHARS", 200):
+            chunks = list(streaming.iter_json_array(iter(data)))
+
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("".join(chunks), json.dumps(data))
+
+    def test_error_mid_stream_propagates(self):
+        def items():
+            yield from self.DATA
+            raise RuntimeError("cursor died")
+
+        chunks = []
+        with mock.patch.object(streaming, "FLUSH_AT_CHARS", 1):
+            with self.assertRaises(RuntimeError):
+                for chunk in streaming.StreamingJsonResponse(items()).streaming_content:
+                    chunks.append(chunk.decode("utf-8"))
+
+        # What went out is a prefix of the full array, never a closed one.
+        sent = "".join(chunks)
+        self.assertTrue(json.dumps(self.DATA).startswith(sent))
+        self.assertFalse(sent.endswith("]"))
+
+
+class SyntheticSeedTests(TestCase):
+    ANCHOR = datetime.date(2025, 3, 3)
+
+    def _snapshot(self):
+        return [
+            (b.client.full_name, b.pet_name, b.scheduled_start, b.scheduled_end, b.status,
+             b.groomer and b.groomer.name, tuple(b.service_names))
+            for b in BookingRequest.objects.select_related("client", "groomer").order_by("scheduled_start", "pk")
+        ]
+
+    def _seed(self, seed, **kwargs):
+        kwargs = {"clients": 5, "bookings": 60, "applications": 3, "anchor": self.ANCHOR,
+                  "past_days": 10, "future_days": 10, **kwargs}
+        return seed_dataset(seed=seed, **kwargs)
+
+    def _assert_no_overlaps(self, bookings):
+        bookings = sorted(bookings, key=lambda b: (b.groomer_id or 0, b.scheduled_start))
+        for _, timeline in groupby(bookings, key=lambda b: b.groomer_id or 0):
+            timeline = list(timeline)
+            for prev, nxt in zip(timeline, timeline[1:]):
+                self.assertLessEqual(prev.scheduled_end, nxt.scheduled_start)
+                self.assertLess(prev.scheduled_start, prev.scheduled_end)
+
+    def test_same_seed_same_rows(self):
+        counts = self._seed(7)
+        self.assertEqual(counts["bookings"], 60)
+        first = self._snapshot()
+
+        clear_dataset()
+        self._seed(7)
+        self.assertEqual(self._snapshot(), first)
+
+        clear_dataset()
+        self._seed(8)
+        self.assertNotEqual(self._snapshot(), first)
+
+    def test_seeded_bookings_do_not_overlap(self):
+        self._seed(3)
+        self._assert_no_overlaps(BookingRequest.objects.all())
+
+    def test_seeded_bookings_do_not_overlap_per_groomer(self):
+        self._seed(4, groomers=3)
+        self._assert_no_overlaps(BookingRequest.objects.all())
+
+    def test_percentile(self):
+        samples = [5, 1, 4, 2, 3]
+        self.assertEqual(percentile(samples, 50), 3)
+        self.assertEqual(percentile(samples, 95), 5)
+        self.assertEqual(percentile(samples, 0), 1)
+
+
+class RequestTimingMiddlewareTests(TestCase):
+    def setUp(self):
+        self.client.force_login(_staff_user())
+
+    def test_disabled_by_default(self):
+        response = self.client.get(reverse("clients_list"))
+        self.assertNotIn("Server-Timing", response.headers)
+
+    @override_settings(REQUEST_TIMING_ENABLED=True)
+    def test_server_timing_header(self):
+        with self.assertLogs("booking_app.timing", level="INFO") as logs:
+            response = self.client.get(reverse("clients_list"))
+
+        header = response.headers["Server-Timing"]
+        self.assertIn("db;dur=", header)
+        self.assertIn("tpl;dur=", header)
+        self.assertIn("view;dur=", header)
+        self.assertIn('"url_name": "clients_list"', logs.output[0])
+
+    @override_settings(REQUEST_TIMING_ENABLED=True)
+    def test_streamed_response_logged_after_body(self):
+        with self.assertLogs("booking_app.timing", level="INFO") as logs:
+            response = self.client.get(reverse("calendar_events"))
+            self.assertEqual(logs.output, [])
+            b"".join(response.streaming_content)
+
+        self.assertIn('"streamed": true', logs.output[0])
+        self.assertIn('"db_queries": 1', logs.output[0])
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        settings_override = override_settings(METRICS_DIR=self.tmp.name, METRICS_TOKEN="s3cret")
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_requires_staff_or_token(self):
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, 302)
+
+        response = self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer s3cret")
+        self.assertEqual(response.status_code, 200)
+
+    def test_request_counts_and_admissions(self):
+        self.client.post(
+            reverse("book_request"),
+            {
+                "full_name": "Brand New",
+                "address": "1 Main St",
+                "phone": "3125550199",
+                "pet_name": "Rex",
+                "pet_breed": "Poodle",
+                "pet_weight_lbs": "20",
+                "pet_age_years": "3",
+            },
+        )
+
+        self.client.force_login(_staff_user())
+        body = self.client.get(reverse("metrics")).content.decode()
+
+        self.assertIn('booking_admissions_total{outcome="soft_gate_rejected"}', body)
+        self.assertIn('view="book_request"', body)
+        self.assertIn('booking_http_request_duration_seconds_bucket{view="book_request",le="+Inf"}', body)
+
+    def test_sums_other_worker_files(self):
+        with open(os.path.join(self.tmp.name, "99999-1.json"), "w") as fh:
+            json.dump(
+                {"counters": [["booking_admissions_total", [["outcome", "created"]], 41]], "histograms": []},
+                fh,
+            )
+
+        metrics.record_admission("created")
+        counters, _ = metrics.registry.collect()
+
+        key = ("booking_admissions_total", (("outcome", "created"),))
+        self.assertGreaterEqual(counters[key], 42)
+
+    def test_dead_worker_files_fold_into_retired(self):
+        dead = os.path.join(self.tmp.name, "99999999-1.json")
+        with open(dead, "w") as fh:
+            json.dump(
+                {"counters": [["booking_jobs_total", [["job", "x"], ["result", "done"]], 5]], "histograms": []},
+                fh,
+            )
+
+        key = ("booking_jobs_total", (("job", "x"), ("result", "done")))
+        self.assertEqual(metrics.registry.collect()[0][key], 5)
+        self.assertFalse(os.path.exists(dead))
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, metrics.RETIRED_FILE)))
+        # Still counted on the next scrape.
+        self.assertEqual(metrics.registry.collect()[0][key], 5)
+
+    def test_filename_follows_pid_after_fork(self):
+        registry = metrics.Registry()
+        registry.inc("booking_jobs_total", {"job": "x"})
+        parent_file = registry.filename()
+
+        with mock.patch.object(metrics.os, "getpid", return_value=4242):
+            registry._after_fork()
+            self.assertTrue(registry.filename().startswith("4242-"))
+            self.assertNotEqual(registry.filename(), parent_file)
+            self.assertEqual(registry.snapshot()["counters"], [])
+
+    def _stream_through_middleware(self, body):
+        request = RequestFactory().get("/stream/")
+        middleware = metrics.MetricsMiddleware(lambda r: StreamingHttpResponse(body()))
+        return middleware(request)
+
+    def _counter(self, name, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        return metrics.registry.collect()[0].get(key, 0)
+
+    def test_streamed_response_timed_to_last_chunk(self):
+        def body():
+            yield b"["
+            time.sleep(0.03)
+            yield b"]"
+
+        hist_key = ("booking_http_request_duration_seconds", (("view", "<unmatched>"),))
+        labels = {"view": "<unmatched>", "method": "GET", "status": 200}
+        before_sum = (metrics.registry.collect()[1].get(hist_key) or [0.0])[-1]
+        before_count = self._counter("booking_http_requests_total", **labels)
+
+        response = self._stream_through_middleware(body)
+        self.assertEqual(self._counter("booking_http_requests_total", **labels), before_count)
+
+        self.assertEqual(b"".join(response.streaming_content), b"[]")
+        self.assertEqual(self._counter("booking_http_requests_total", **labels), before_count + 1)
+        self.assertGreaterEqual(metrics.registry.collect()[1][hist_key][-1] - before_sum, 0.03)
+
+    def test_error_mid_stream_counted(self):
+        def body():
+            yield b"["
+            raise RuntimeError("cursor died")
+
+        before = self._counter("booking_http_request_errors_total", view="<unmatched>")
+        response = self._stream_through_middleware(body)
+        with self.assertRaises(RuntimeError):
+            b"".join(response.streaming_content)
+        self.assertEqual(self._counter("booking_http_request_errors_total", view="<unmatched>"), before + 1)
+
+    def test_wrong_token_refused(self):
+        response = self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer s3cre")
+        self.assertEqual(response.status_code, 302)
+
+
+class ProfilingTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        settings_override = override_settings(
+            PROFILING_ENABLED=True,
+            PROFILING_DIR=self.tmp.name,
+            PROFILING_MAX_CAPTURES=2,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_anonymous_requests_are_not_profiled(self):
+        response = self.client.get(reverse("availability_events"), {"_profile": "cpu"})
+        self.assertNotIn("X-Profile-Capture", response.headers)
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+    def test_staff_capture_and_ring_buffer(self):
+        self.client.force_login(_staff_user())
+
+        response = self.client.get(reverse("calendar_events"), {"_profile": "cpu,mem"})
+        capture_id = response.headers["X-Profile-Capture"]
+        for ext in ("json", "prof", "snapshot"):
+            self.assertTrue(os.path.exists(os.path.join(self.tmp.name, f"{capture_id}.{ext}")))
+
+        self.client.get(reverse("clients_list"), HTTP_X_PROFILE="cpu")
+        self.client.get(reverse("clients_list"), HTTP_X_PROFILE="mem")
+
+        summaries = [f for f in os.listdir(self.tmp.name) if f.endswith(".json")]
+        self.assertEqual(len(summaries), 2)
+        self.assertNotIn(f"{capture_id}.json", summaries)
+
+        page = self.client.get(reverse("profiling_captures"))
+        self.assertContains(page, "Top functions")
+        self.assertContains(page, "Top allocations")
+
+
+class PendingApplicationsApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        applications = NewClientApplication.objects.bulk_create(
+            [
+                NewClientApplication(
+                    full_name=f"Applicant {i}",
+                    address=f"{i} Main St",
+                    zip_code="60610",
+                    phone="3125550100",
+                    pet_name="Rex",
+                    pet_breed="Poodle",
+                    status="declined" if i % 5 == 0 else "pending",
+                )
+                for i in range(12)
+            ]
+        )
+        # Equal timestamps for several rows exercise the id tie-breaker.
+        same = timezone.now()
+        NewClientApplication.objects.filter(pk__in=[a.pk for a in applications]).update(created_at=same)
+        cls.staff = _staff_user()
+
+    def setUp(self):
+        self.client.force_login(self.staff)
+
+    def _get(self, **params):
+        response = self.client.get(reverse("pending_applications"), params)
+        return response, json.loads(b"".join(response.streaming_content))
+
+    def test_cursor_pagination_walks_every_pending_row_once(self):
+        seen = []
+        params = {"limit": 4}
+        while True:
+            response, page = self._get(**params)
+            seen.extend(a["id"] for a in page)
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+            self.assertIn('rel="next"', response.headers["Link"])
+            params["cursor"] = cursor
+
+        self.assertEqual(len(seen), 9)
+        self.assertEqual(len(set(seen)), 9)
+        self.assertEqual(seen, sorted(seen, reverse=True))
+
+    def test_status_filter_and_all(self):
+        _, declined = self._get(status="declined")
+        self.assertEqual({a["status"] for a in declined}, {"declined"})
+
+        _, everything = self._get(all=1, limit=100)
+        self.assertEqual(len(everything), 12)
+
+    def test_bad_cursor(self):
+        response = self.client.get(reverse("pending_applications"), {"cursor": "nope"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_counts(self):
+        # Session and user lookups, then the single aggregate.
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse("application_counts"))
+        self.assertEqual(response.json(), {"pending": 9, "approved": 0, "declined": 3})
+
+    def test_anonymous_refused(self):
+        self.client.logout()
+        for name, params in (("pending_applications", {"all": 1}), ("application_counts", {})):
+            with self.subTest(view=name):
+                response = self.client.get(reverse(name), params)
+                self.assertEqual(response.status_code, 302)
+                self.assertNotIn(b"Applicant", response.content)
+
+
+class DashboardSummaryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(_staff_user())
+
+    def _booking(self, start, status="confirmed", services=()):
+        client = Client.objects.create(full_name="Pat Doe", address="1 Main St", phone="3125550100")
+        booking = BookingRequest.objects.create(
+            client=client,
+            address=client.address,
+            pet_name="Rex",
+            pet_breed="Poodle",
+            pet_weight_lbs=20,
+            pet_age_years=3,
+            scheduled_start=start,
+            scheduled_end=start + datetime.timedelta(hours=1),
+            status=status,
+        )
+        booking.services.set(services)
+        return booking
+
+    def test_summary_counts_and_cache_invalidation(self):
+        service = Service.objects.create(name="Bath", duration_minutes=60, price="40.00")
+        now = timezone.localtime()
+
+        self._booking(now - datetime.timedelta(minutes=1), status="completed", services=[service])
+        upcoming = self._booking(now + datetime.timedelta(hours=2))
+
+        data = self.client.get(reverse("dashboard_summary")).json()
+        self.assertEqual(data["next_appointment"]["id"], upcoming.id)
+        self.assertEqual(data["pending_applications"], 0)
+
+        # Served from cache: just session, user and version lookups.
+        with self.assertNumQueries(3):
+            self.assertEqual(self.client.get(reverse("dashboard_summary")).json(), data)
+
+        upcoming.status = "declined"
+        upcoming.save(update_fields=["status"])
+
+        data = self.client.get(reverse("dashboard_summary")).json()
+        self.assertIsNone(data["next_appointment"])
+        self.assertEqual(data["revenue_to_date"], "40.00")
+
+
+class AvailabilitySlotsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.tz = timezone.get_current_timezone()
+        cls.day = timezone.localdate() + datetime.timedelta(days=3)
+        client = Client.objects.create(full_name="Pat Doe", address="1 Main St", phone="3125550100")
+
+        def at(hour, minute=0):
+            return timezone.make_aware(
+                datetime.datetime.combine(cls.day, datetime.time(hour, minute)), cls.tz
+            )
+
+        for start, end, status in (
+            (at(10), at(11, 30), "confirmed"),
+            (at(11, 15), at(12), "new"),
+            (at(14), at(15), "declined"),
+            (at(16, 45), at(17, 15), "confirmed"),
+        ):
+            BookingRequest.objects.bulk_create(
+                [
+                    BookingRequest(
+                        client=client,
+                        address=client.address,
+                        pet_name="Rex",
+                        pet_breed="Poodle",
+                        pet_weight_lbs=20,
+                        pet_age_years=3,
+                        scheduled_start=start,
+                        scheduled_end=end,
+                        status=status,
+                    )
+                ]
+            )
+
+        cls.bath = Service.objects.create(name="Bath", duration_minutes=60, price="40.00")
+        cls.nails = Service.objects.create(name="Nails", duration_minutes=30, price="15.00")
+
+    def at(self, hour, minute=0):
+        return timezone.make_aware(
+            datetime.datetime.combine(self.day, datetime.time(hour, minute)), self.tz
+        )
+
+    def _slots(self, **params):
+        params.setdefault("start", self.day.isoformat())
+        params.setdefault("end", (self.day + datetime.timedelta(days=1)).isoformat())
+        response = self.client.get(reverse("availability_slots"), params)
+        return [
+            (datetime.datetime.fromisoformat(s["start"]), datetime.datetime.fromisoformat(s["end"]))
+            for s in json.loads(b"".join(response.streaming_content))
+        ]
+
+    def test_default_hourly_slots(self):
+        starts = [s.hour for s, _ in self._slots()]
+        self.assertEqual(starts, [9, 12, 13, 14, 15])
+
+    def test_only_active_bookings_block(self):
+        client = Client.objects.get()
+        for status in ("canceled", "completed"):
+            BookingRequest.objects.bulk_create(
+                [
+                    BookingRequest(
+                        client=client,
+                        address=client.address,
+                        pet_name="Rex",
+                        pet_breed="Poodle",
+                        pet_weight_lbs=20,
+                        pet_age_years=3,
+                        scheduled_start=self.at(13),
+                        scheduled_end=self.at(14),
+                        status=status,
+                    )
+                ]
+            )
+
+        starts = [s.hour for s, _ in self._slots()]
+        self.assertEqual(starts, [9, 12, 13, 14, 15])
+
+    def test_service_duration_on_quarter_hour_grid(self):
+        slots = self._slots(services=f"{self.bath.id},{self.nails.id}")
+        at = self.at
+
+        self.assertEqual(slots[0], (at(12), at(13, 30)))
+        self.assertIn((at(15, 15), at(16, 45)), slots)
+        self.assertNotIn((at(15, 30), at(17)), slots)
+        self.assertTrue(all((e - s) == datetime.timedelta(minutes=90) for s, e in slots))
+        self.assertTrue(all(s.minute % 15 == 0 for s, _ in slots))
+
+    def test_explicit_duration_and_step(self):
+        slots = self._slots(duration="30", step="30")
+        at = self.at
+
+        self.assertEqual(slots[:3], [(at(9), at(9, 30)), (at(9, 30), at(10)), (at(12), at(12, 30))])
+        # The gap after the 17:15 booking starts off-grid; the first aligned start is 17:30.
+        self.assertEqual(slots[-1], (at(17, 30), at(18)))
+
+    def test_month_scoped_request(self):
+        slots = self._slots(month=self.day.strftime("%Y-%m"), start="", end="")
+        days = {s.date() for s, _ in slots}
+
+        self.assertIn(self.day, days)
+        self.assertTrue(all(s.month == self.day.month for s, _ in slots))
+        self.assertTrue(all(s >= timezone.now() for s, _ in slots))
+
+        last_year = timezone.localdate().replace(day=1) - datetime.timedelta(days=360)
+        self.assertEqual(self._slots(month=last_year.strftime("%Y-%m"), start="", end=""), [])
+
+    def test_page_embeds_current_month_summary(self):
+        response = self.client.get(reverse("availability_dashboard"))
+        initial = response.context["initial_summary"]
+
+        self.assertEqual(initial["month"], timezone.localdate().strftime("%Y-%m"))
+        self.assertContains(response, 'id="initialSummary"')
+
+        api = self.client.get(reverse("availability_summary"), {"month": initial["month"]}).json()
+        self.assertEqual(initial["days"], api["days"])
+
+    def test_month_summary(self):
+        month = self.day.strftime("%Y-%m")
+        data = self.client.get(reverse("availability_summary"), {"month": month}).json()
+        days = {d["date"]: d for d in data["days"]}
+
+        self.assertEqual(data["duration_minutes"], 60)
+        # 09-10, 12-16:45 and 17:15-18 (the declined booking doesn't count).
+        self.assertEqual(days[self.day.isoformat()]["free_minutes"], 390)
+        self.assertEqual(days[self.day.isoformat()]["first_available"], self.at(9).isoformat())
+
+        data = self.client.get(
+            reverse("availability_summary"),
+            {"month": month, "services": f"{self.bath.id},{self.nails.id}"},
+        ).json()
+        days = {d["date"]: d for d in data["days"]}
+        self.assertEqual(days[self.day.isoformat()]["first_available"], self.at(12).isoformat())
+
+    def test_month_summary_requires_month(self):
+        response = self.client.get(reverse("availability_summary"), {"month": "2026-13"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["ok"], False)
+
+
+class GroomerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.tz = timezone.get_current_timezone()
+        cls.day = timezone.localdate() + datetime.timedelta(days=3)
+        cls.pat = Client.objects.create(full_name="Pat Doe", address="1 Main St", phone="3125550100")
+        cls.ann = Groomer.objects.create(name="Ann", van_name="Van 1")
+        cls.bo = Groomer.objects.create(name="Bo", van_name="Van 2")
+
+    def at(self, hour, minute=0):
+        return timezone.make_aware(
+            datetime.datetime.combine(self.day, datetime.time(hour, minute)), self.tz
+        )
+
+    def _book(self, start, end, **kwargs):
+        return BookingRequest.objects.create(
+            client=self.pat,
+            pet_name="Rex",
+            pet_breed="Poodle",
+            pet_weight_lbs=20,
+            pet_age_years=3,
+            scheduled_start=start,
+            scheduled_end=end,
+            status="confirmed",
+            **kwargs,
+        )
+
+    def _slot_starts(self, **params):
+        params.update(start=self.day.isoformat(), end=(self.day + datetime.timedelta(days=1)).isoformat())
+        response = self.client.get(reverse("availability_slots"), params)
+        return [
+            datetime.datetime.fromisoformat(s["start"]).hour
+            for s in json.loads(b"".join(response.streaming_content))
+        ]
+
+    def test_overlap_is_checked_per_groomer(self):
+        self._book(self.at(10), self.at(11), groomer=self.ann)
+        # Bo is free at the same time.
+        self._book(self.at(10), self.at(11), groomer=self.bo)
+
+        with self.assertRaises(ValidationError):
+            self._book(self.at(10, 30), self.at(11, 30), groomer=self.ann)
+
+    def test_new_bookings_go_to_a_free_groomer(self):
+        first = self._book(self.at(10), self.at(11))
+        second = self._book(self.at(10), self.at(11))
+        self.assertEqual((first.groomer, second.groomer), (self.ann, self.bo))
+
+        with self.assertRaises(ValidationError) as ctx:
+            self._book(self.at(10, 30), self.at(11, 30))
+        self.assertEqual(ctx.exception.error_list[0].code, "overlap")
+
+    def test_public_availability_is_union_across_groomers(self):
+        self._book(self.at(10), self.at(12), groomer=self.ann)
+        self._book(self.at(13), self.at(15), groomer=self.bo)
+
+        self.assertEqual(self._slot_starts(), list(range(9, 18)))
+        self.assertEqual(self._slot_starts(groomer=self.ann.id), [9, 12, 13, 14, 15, 16, 17])
+
+        # A booking both groomers are busy for closes the hour for everyone.
+        self._book(self.at(16), self.at(17), groomer=self.ann)
+        self._book(self.at(16), self.at(17), groomer=self.bo)
+        self.assertNotIn(16, self._slot_starts())
+
+    def test_unassigned_bookings_block_every_groomer(self):
+        BookingRequest.objects.bulk_create(
+            [
+                BookingRequest(
+                    client=self.pat,
+                    address="1 Main St",
+                    pet_name="Rex",
+                    pet_breed="Poodle",
+                    pet_weight_lbs=20,
+                    pet_age_years=3,
+                    scheduled_start=self.at(9),
+                    scheduled_end=self.at(10),
+                    status="confirmed",
+                )
+            ]
+        )
+
+        self.assertNotIn(9, self._slot_starts())
+
+
+class TravelTimeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.tz = timezone.get_current_timezone()
+        cls.day = timezone.localdate() + datetime.timedelta(days=3)
+
+        # About 5.9 miles apart: with the 1.3 detour factor at 25 mph, 19 minutes.
+        ZipCentroid.objects.create(zip_code="60610", latitude=41.9036, longitude=-87.6344)
+        ZipCentroid.objects.create(zip_code="60625", latitude=41.9712, longitude=-87.7024)
+
+        client = Client.objects.create(
+            full_name="Pat Doe", address="1 Main St, Chicago, IL 60625", phone="3125550100"
+        )
+        cls.booking = BookingRequest.objects.create(
+            client=client,
+            pet_name="Rex",
+            pet_breed="Poodle",
+            pet_weight_lbs=20,
+            pet_age_years=3,
+            scheduled_start=cls.at(cls, 10),
+            scheduled_end=cls.at(cls, 11),
+            status="confirmed",
+        )
+
+    def setUp(self):
+        travel.invalidate()
+
+    def at(self, hour, minute=0):
+        return timezone.make_aware(
+            datetime.datetime.combine(self.day, datetime.time(hour, minute)), self.tz
+        )
+
+    def _starts(self, **params):
+        params.update(
+            start=self.day.isoformat(),
+            end=(self.day + datetime.timedelta(days=1)).isoformat(),
+            duration="30",
+            step="15",
+        )
+        response = self.client.get(reverse("availability_slots"), params)
+        return [
+            datetime.datetime.fromisoformat(s["start"])
+            for s in json.loads(b"".join(response.streaming_content))
+        ]
+
+    def test_zip_parsed_from_address(self):
+        self.assertEqual(self.booking.zip_code, "60625")
+        self.assertEqual(extract_zip("12 Oak Ave, Chicago, IL 60614-1234, USA"), "60614")
+        self.assertEqual(extract_zip("10234 Main St, Chicago"), "")
+
+    def test_drive_time_lookups(self):
+        times = get_drive_times()
+        with self.assertNumQueries(1):
+            self.assertEqual(times.minutes("60610", "60625"), 19)
+        with self.assertNumQueries(0):
+            self.assertEqual(times.minutes("60625", "60610"), 19)
+            self.assertEqual(times.minutes("60610", "60610"), 0)
+        self.assertEqual(times.minutes("60610", "99999"), 0)
+
+    @override_settings(TRAVEL_MAX_MINUTES=120)
+    def test_far_zip_does_not_widen_every_query(self):
+        # Anchorage: a centroid far from every booking.
+        ZipCentroid.objects.create(zip_code="99501", latitude=61.2160, longitude=-149.8763)
+
+        buffers = Buffers("60610")
+        self.assertEqual(buffers.limit, datetime.timedelta(minutes=120))
+        self.assertEqual(buffers.reach(["60625"]), datetime.timedelta(minutes=19))
+        # Only the zips in play are loaded, never the whole table.
+        self.assertNotIn("99501", buffers.times._coords)
+
+        self.assertEqual(Buffers("99501").around("60625")[0], datetime.timedelta(minutes=120))
+
+    def test_slots_leave_drive_time_around_bookings(self):
+        without_zip = self._starts()
+        self.assertIn(self.at(9, 30), without_zip)
+        self.assertIn(self.at(11), without_zip)
+
+        starts = self._starts(zip="60610")
+        # 09:15-09:45 leaves no time to drive to the 10:00 booking; 09:00 does.
+        self.assertIn(self.at(9), starts)
+        self.assertNotIn(self.at(9, 15), starts)
+        self.assertNotIn(self.at(11), starts)
+        self.assertIn(self.at(11, 30), starts)
+
+        # Same zip: no drive needed.
+        self.assertIn(self.at(11), self._starts(zip="60625"))
+
+
+class NextAvailableSlotsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.tz = timezone.get_current_timezone()
+        cls.first_day = timezone.localdate() + datetime.timedelta(days=2)
+        client = Client.objects.create(full_name="Pat Doe", address="1 Main St", phone="3125550100")
+
+        # Ten fully booked days, so the search has to cross the first window.
+        BookingRequest.objects.bulk_create(
+            [
+                BookingRequest(
+                    client=client,
+                    address=client.address,
+                    pet_name="Rex",
+                    pet_breed="Poodle",
+                    pet_weight_lbs=20,
+                    pet_age_years=3,
+                    scheduled_start=cls.at(cls, offset, 9),
+                    scheduled_end=cls.at(cls, offset, 18),
+                    status="confirmed",
+                )
+                for offset in range(10)
+            ]
+        )
+
+    def at(self, offset, hour, minute=0):
+        day = self.first_day + datetime.timedelta(days=offset)
+        return timezone.make_aware(datetime.datetime.combine(day, datetime.time(hour, minute)), self.tz)
+
+    def test_skips_booked_days_and_stops_at_count(self):
+        hour = datetime.timedelta(hours=1)
+        starts = availability.next_slot_starts(3, hour, hour, 30, self.tz, now=self.at(0, 0))
+        self.assertEqual(starts, [self.at(10, 9), self.at(10, 10), self.at(10, 11)])
+
+        self.assertEqual(availability.next_slot_starts(3, hour, hour, 5, self.tz, now=self.at(0, 0)), [])
+
+    def test_endpoint(self):
+        data = self.client.get(reverse("next_available_slots"), {"count": "2", "duration": "30"}).json()
+
+        self.assertTrue(data["ok"])
+        self.assertEqual(len(data["slots"]), 2)
+        first = datetime.datetime.fromisoformat(data["slots"][0]["start"])
+        self.assertGreaterEqual(first, timezone.now())
+        self.assertEqual(
+            datetime.datetime.fromisoformat(data["slots"][0]["end"]) - first,
+            datetime.timedelta(minutes=30),
+        )
+
+        response = self.client.get(reverse("next_available_slots"), {"count": "x"})
+        self.assertEqual(response.status_code, 400)
+
+
+class IdempotentBookingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # The soft gate only lets known clients book.
+        Client.objects.create(full_name="Pat Doe", address="1 Main St", phone="3125550100")
+
+    def _post(self, key):
+        day = timezone.localdate() + datetime.timedelta(days=5)
+        return self.client.post(
+            reverse("book_request"),
+            {
+                "idempotency_key": key,
+                "full_name": "Pat Doe",
+                "address": "1 Main St",
+                "phone": "3125550100",
+                "pet_name": "Rex",
+                "pet_breed": "Poodle",
+                "pet_weight_lbs": "20",
+                "pet_age_years": "3",
+                "scheduled_start": f"{day}T09:00",
+                "scheduled_end": f"{day}T10:00",
+            },
+        )
+
+    def test_form_carries_a_key(self):
+        response = self.client.get(reverse("book_request"))
+        self.assertRegex(response.context["idempotency_key"], r"^[0-9a-f]{32}$")
+        self.assertContains(response, 'name="idempotency_key"')
+
+    def test_replayed_post_creates_nothing(self):
+        key = "a" * 32
+        first = self._post(key)
+        self.assertRedirects(first, reverse("book_success"))
+
+        with self.assertNumQueries(1):
+            second = self._post(key)
+        self.assertRedirects(second, reverse("book_success"))
+
+        self.assertEqual(BookingRequest.objects.count(), 1)
+        self.assertEqual(Client.objects.count(), 1)
+        self.assertEqual(IdempotencyKey.objects.get().booking, BookingRequest.objects.get())
+
+    def test_new_key_is_a_new_submission(self):
+        self._post("a" * 32)
+        # Same slot, different key: goes through the pipeline and hits the overlap guard.
+        response = self._post("b" * 32)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(BookingRequest.objects.count(), 1)
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        self.calls = []
+
+        @jobs.task("test_record")
+        def record(value):
+            self.calls.append(value)
+
+        @jobs.task("test_broken")
+        def broken():
+            raise RuntimeError("boom")
+
+    def test_enqueue_and_run(self):
+        job = jobs.enqueue("test_record", {"value": 7})
+        self.assertEqual(job.status, Job.STATUS_QUEUED)
+
+        self.assertEqual(jobs.run_ready(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.STATUS_DONE, 1))
+        self.assertEqual(self.calls, [7])
+
+        with self.assertRaises(ValueError):
+            jobs.enqueue("no_such_job")
+
+    def test_unique_and_delayed(self):
+        jobs.enqueue("test_record", {"value": 1}, unique=True)
+        self.assertIsNone(jobs.enqueue("test_record", {"value": 1}, unique=True))
+        jobs.enqueue("test_record", {"value": 2}, delay=3600)
+
+        self.assertEqual(Job.objects.count(), 2)
+        self.assertEqual(jobs.run_ready(), 1)
+        self.assertEqual(self.calls, [1])
+
+    def test_claimed_job_is_not_claimed_twice(self):
+        jobs.enqueue("test_record", {"value": 1})
+        self.assertEqual(len(jobs.claim("a", limit=5)), 1)
+        self.assertEqual(jobs.claim("b", limit=5), [])
+
+    def test_failures_back_off_then_give_up(self):
+        job = jobs.enqueue("test_broken", max_attempts=2)
+
+        with self.assertLogs("booking_app.jobs", "WARNING"):
+            jobs.run_ready()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.STATUS_QUEUED, 1))
+        self.assertGreater(job.run_after, timezone.now())
+        self.assertIn("boom", job.last_error)
+
+        # Not ready yet; then make it due and let it fail for good.
+        self.assertEqual(jobs.run_ready(), 0)
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        with self.assertLogs("booking_app.jobs", "ERROR"):
+            jobs.run_ready()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.STATUS_FAILED, 2))
+
+    @override_settings(JOBS_EAGER=True)
+    def test_eager_runs_delayed_jobs_at_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            job = jobs.enqueue("test_record", {"value": 3}, delay=3600, unique=True)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_DONE)
+        self.assertEqual(self.calls, [3])
+
+    def test_approval_creates_client_immediately(self):
+        self.client.force_login(_staff_user())
+        app = NewClientApplication.objects.create(
+            full_name="Sam Lee",
+            address="9 Oak Ave",
+            zip_code="60614",
+            phone="3125550199",
+            pet_name="Bo",
+            pet_breed="Pug",
+        )
+
+        response = self.client.post(reverse("application_action", args=[app.id]), {"action": "approve"})
+        self.assertEqual(response.json()["status"], "approved")
+        self.assertTrue(Client.objects.filter(phone="3125550199").exists())
+        self.assertFalse(Job.objects.exists())
+
+    def test_dashboard_warming_needs_a_shared_cache(self):
+        _warm_dashboard_later()
+        self.assertFalse(Job.objects.exists())
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        shared = {"default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": tmp.name}}
+        with override_settings(CACHES=shared):
+            _warm_dashboard_later()
+        self.assertEqual(list(Job.objects.values_list("name", flat=True)), ["warm_dashboard_summary"])
+
+    def test_purge_jobs_command(self):
+        old = timezone.now() - datetime.timedelta(days=10)
+        done = Job.objects.create(name="test_record", status=Job.STATUS_DONE, finished_at=old)
+        failed = Job.objects.create(name="test_record", status=Job.STATUS_FAILED, finished_at=old)
+        recent = Job.objects.create(name="test_record", status=Job.STATUS_DONE, finished_at=timezone.now())
+        queued = Job.objects.create(name="test_record", run_after=old)
+
+        out = io.StringIO()
+        call_command("purge_jobs", "--days", "7", stdout=out)
+        self.assertIn("Deleted 2", out.getvalue())
+        self.assertEqual(set(Job.objects.values_list("pk", flat=True)), {recent.pk, queued.pk})
+        self.assertFalse(Job.objects.filter(pk__in=[done.pk, failed.pk]).exists())
+
+    def test_purge_idempotency_keys_command(self):
+        old = IdempotencyKey.objects.create(key="old")
+        IdempotencyKey.objects.filter(pk=old.pk).update(created_at=timezone.now() - datetime.timedelta(days=40))
+        IdempotencyKey.objects.create(key="new")
+
+        out = io.StringIO()
+        call_command("purge_idempotency_keys", "--days", "30", stdout=out)
+        self.assertIn("Deleted 1", out.getvalue())
+        self.assertEqual(list(IdempotencyKey.objects.values_list("key", flat=True)), ["new"])
+
+
+@override_settings(
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+    NOTIFICATIONS_BACKEND="booking_app.notifications.MailBackend",
+    NOTIFICATIONS_SMS_EMAIL_GATEWAY="sms.example.com",
+)
+class OutboxNotificationTests(TestCase):
+    def setUp(self):
+        self.client.force_login(_staff_user())
+        self.pat = Client.objects.create(
+            full_name="Pat Doe", address="1 Main St", phone="312-555-0100", email="pat@example.com"
+        )
+        start = timezone.now().replace(microsecond=0) + datetime.timedelta(hours=6)
+        self.booking = BookingRequest.objects.create(
+            client=self.pat,
+            pet_name="Rex",
+            pet_breed="Poodle",
+            pet_weight_lbs=20,
+            pet_age_years=3,
+            scheduled_start=start,
+            scheduled_end=start + datetime.timedelta(hours=1),
+        )
+
+    def test_status_change_writes_outbox_and_sender_delivers(self):
+        self.client.post(reverse("booking_action", args=[self.booking.id]), {"action": "confirm"})
+        message = OutboxMessage.objects.get()
+        self.assertEqual((message.kind, message.channel, message.status), ("confirmation", "email", "pending"))
+        self.assertEqual(mail.outbox, [])
+
+        call_command("send_outbox", "--once", stdout=open(os.devnull, "w"))
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), ("sent", 1))
+        # The confirmed booking is within 24h, so the reminder goes out too.
+        self.assertEqual(
+            sorted(m.subject.split(" - ")[0] for m in mail.outbox),
+            ["Reminder: grooming appointment tomorrow", "Your grooming appointment is confirmed"],
+        )
+        self.assertEqual(mail.outbox[0].to, ["pat@example.com"])
+
+        # Reminders are not queued twice.
+        notifications.queue_due_reminders()
+        self.assertEqual(OutboxMessage.objects.filter(kind="reminder").count(), 1)
+
+    def test_reminder_poll_skips_bookings_already_reminded(self):
+        self.client.post(reverse("booking_action", args=[self.booking.id]), {"action": "confirm"})
+        self.assertEqual(notifications.queue_due_reminders(), 1)
+
+        with mock.patch.object(notifications, "build_message") as build:
+            self.assertEqual(notifications.queue_due_reminders(), 0)
+        build.assert_not_called()
+
+    def test_cancel_and_reschedule_queue_messages(self):
+        new_start = self.booking.scheduled_start + datetime.timedelta(days=2)
+        self.client.post(
+            reverse("booking_reschedule", args=[self.booking.id]),
+            {
+                "scheduled_start": new_start.isoformat(),
+                "scheduled_end": (new_start + datetime.timedelta(hours=1)).isoformat(),
+            },
+        )
+        self.client.post(reverse("booking_cancel", args=[self.booking.id]))
+        self.assertEqual(
+            list(OutboxMessage.objects.order_by("id").values_list("kind", flat=True)),
+            ["reschedule", "cancellation"],
+        )
+
+    def test_failed_sends_retry_then_give_up(self):
+        class SmtpDown:
+            def send_messages(self, messages):
+                return {m.pk: "Connection refused" for m in messages}
+
+        self.pat.email = ""
+        self.pat.save()
+        with self.settings(NOTIFICATIONS_MAX_ATTEMPTS=2):
+            message = notifications.queue_booking_message(self.booking, "confirmation")
+            self.assertEqual((message.channel, message.recipient), ("sms", "3125550100"))
+
+            with self.assertLogs("booking_app.notifications", "WARNING"):
+                self.assertEqual(notifications.drain(backend=SmtpDown()), (0, 1))
+            message.refresh_from_db()
+            self.assertEqual((message.status, message.attempts), ("pending", 1))
+            self.assertGreater(message.available_at, timezone.now())
+
+            OutboxMessage.objects.filter(pk=message.pk).update(available_at=timezone.now())
+            with self.assertLogs("booking_app.notifications", "WARNING"):
+                notifications.drain(backend=SmtpDown())
+            message.refresh_from_db()
+            self.assertEqual(message.status, "failed")
+
+        stats = self.client.get(reverse("notification_stats")).json()
+        self.assertEqual(stats["by_status"]["failed"], 1)
+        self.assertEqual(stats["by_kind"], {"confirmation": {"failed": 1}})
+
+    @override_settings(NOTIFICATIONS_SMS_EMAIL_GATEWAY="")
+    def test_no_sms_queued_without_gateway(self):
+        self.pat.email = ""
+        self.pat.save()
+
+        self.client.post(reverse("booking_action", args=[self.booking.id]), {"action": "confirm"})
+        self.assertEqual(notifications.queue_due_reminders(), 0)
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    def test_sms_without_gateway_fails_without_retrying(self):
+        self.pat.email = ""
+        self.pat.save()
+        message = notifications.queue_booking_message(self.booking, "confirmation")
+
+        with self.settings(NOTIFICATIONS_SMS_EMAIL_GATEWAY=""):
+            with self.assertLogs("booking_app.notifications", "WARNING") as logs:
+                self.assertEqual(notifications.drain(), (0, 1))
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), ("failed", 1))
+        self.assertEqual(len(logs.output), 1)
+
+    def test_claimed_messages_are_not_claimed_twice(self):
+        notifications.queue_booking_message(self.booking, "confirmation")
+        self.assertEqual(len(notifications.claim_batch(10)), 1)
+        self.assertEqual(notifications.claim_batch(10), [])
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        self.service = Service.objects.create(name="Bath", duration_minutes=60, price="40.00")
+        self.pat = Client.objects.create(full_name="Pat Doe", address="1 Main St", phone="3125550100")
+        now = timezone.now()
+
+        def booking(days_ago, status):
+            start = now - datetime.timedelta(days=days_ago)
+            b = BookingRequest.objects.create(
+                client=self.pat,
+                pet_name="Rex",
+                pet_breed="Poodle",
+                pet_weight_lbs=20,
+                pet_age_years=3,
+                scheduled_start=start,
+                scheduled_end=start + datetime.timedelta(hours=1),
+                status=status,
+            )
+            b.services.set([self.service])
+            return b
+
+        self.old_done = booking(400, "completed")
+        self.old_canceled = booking(300, "canceled")
+        self.old_confirmed = booking(300, "confirmed")  # never closed out: stays hot
+        self.recent_done = booking(10, "completed")
+
+    def test_moves_only_old_finished_bookings(self):
+        OutboxMessage.objects.create(booking=self.old_done, kind="confirmation", channel="sms", recipient="1", body="x")
+
+        call_command("archive_bookings", "--older-than-days", "180", "--batch", "1", stdout=open(os.devnull, "w"))
+
+        self.assertEqual(
+            set(BookingRequest.objects.values_list("id", flat=True)),
+            {self.old_confirmed.id, self.recent_done.id},
+        )
+        archived = ArchivedBooking.objects.get(id=self.old_done.id)
+        self.assertEqual((archived.status, archived.client, archived.pet_name), ("completed", self.pat, "Rex"))
+        self.assertEqual(list(archived.services.all()), [self.service])
+        self.assertEqual(ArchivedBooking.objects.count(), 2)
+        self.assertIsNone(OutboxMessage.objects.get().booking_id)
+
+    def test_list_pages_read_archive_only_on_request(self):
+        archive.archive_bookings(timezone.now() - datetime.timedelta(days=350))
+        self.client.force_login(_staff_user())
+
+        response = self.client.get(reverse("bookings_list"))
+        self.assertIsNone(response.context["archived"])
+        response = self.client.get(reverse("bookings_list"), {"archive": "1"})
+        self.assertEqual([b.id for b in response.context["archived"]], [self.old_done.id])
+
+        self.recent_done.delete()
+        self.old_confirmed.delete()
+        self.old_canceled.delete()
+        clients = self.client.get(reverse("clients_list")).context["clients"]
+        self.assertIsNone(clients[0].last_booking)
+        clients = self.client.get(reverse("clients_list"), {"archive": "1"}).context["clients"]
+        self.assertEqual(clients[0].last_booking, self.old_done.scheduled_start)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.client.force_login(_staff_user())
+        bath = Service.objects.create(name="Bath", duration_minutes=60, price="40.00")
+        nails = Service.objects.create(name="Nails", duration_minutes=15, price="12.50")
+        pat = Client.objects.create(full_name="Pat Doe", address="1 Main St", phone="3125550100")
+
+        tz = timezone.get_current_timezone()
+        self.bookings = []
+        for day in (3, 4, 20):
+            start = timezone.make_aware(datetime.datetime(2026, 3, day, 10, 0), tz)
+            booking = BookingRequest.objects.create(
+                client=pat,
+                pet_name=f"Rex {day}",
+                pet_breed="Poodle",
+                pet_weight_lbs=20,
+                pet_age_years=3,
+                scheduled_start=start,
+                scheduled_end=start + datetime.timedelta(hours=1),
+                status="completed",
+            )
+            booking.services.set([bath, nails])
+            self.bookings.append(booking)
+
+    def _csv(self, response):
+        body = b"".join(response.streaming_content).decode()
+        return list(csv.DictReader(io.StringIO(body)))
+
+    def test_bookings_csv_with_range_and_joined_columns(self):
+        response = self.client.get(reverse("export_bookings"), {"start": "2026-03-01", "end": "2026-03-04"})
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        self.assertIn("bookings-2026-03-01_2026-03-04.csv", response["Content-Disposition"])
+
+        rows = self._csv(response)
+        self.assertEqual([r["pet_name"] for r in rows], ["Rex 3", "Rex 4"])
+        self.assertEqual(
+            (rows[0]["client_name"], rows[0]["services"], rows[0]["service_minutes"], rows[0]["total_price"]),
+            ("Pat Doe", "Bath; Nails", "75", "52.50"),
+        )
+
+        self.assertEqual(self.client.get(reverse("export_bookings"), {"format": "xml"}).status_code, 400)
+        self.assertEqual(self.client.get(reverse("export_bookings"), {"start": "March"}).status_code, 400)
+
+    def test_single_query_whatever_the_chunk_size(self):
+        # Service totals are columns on the booking: the cursor is the only query.
+        with self.assertNumQueries(1):
+            rows = list(exports.iter_bookings(chunk_size=2))
+        self.assertEqual(len(rows), 3)
+
+    def test_jsonl_and_command(self):
+        response = self.client.get(reverse("export_clients"), {"format": "jsonl"})
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(json.loads(lines[0])["bookings"], 3)
+
+        out = io.StringIO()
+        call_command("export_data", "bookings", "--start", "2026-03-20", stdout=out)
+        self.assertEqual(out.getvalue().count("\n"), 2)  # header + one booking
+
+    def test_client_columns_include_archived_bookings(self):
+        archive.archive_bookings(timezone.make_aware(datetime.datetime(2026, 3, 10)))
+        self.assertEqual(BookingRequest.objects.count(), 1)
+
+        rows = list(exports.iter_clients())
+        bookings, last_booking = rows[0][-2:]
+        self.assertEqual(bookings, 3)
+        self.assertEqual(last_booking, self.bookings[-1].scheduled_start)
+
+        BookingRequest.objects.all().delete()
+        bookings, last_booking = list(exports.iter_clients())[0][-2:]
+        self.assertEqual(bookings, 2)
+        self.assertEqual(last_booking, self.bookings[1].scheduled_start)
+
+
+class ImportTests(TestCase):
+    CSV = (
+        "client_name,client_phone,address,pet_name,pet_breed,pet_weight_lbs,pet_age_years,"
+        "scheduled_start,scheduled_end,status,services\n"
+        "Pat Doe,(312) 555-0100,\"1 Main St, Chicago, IL 60614\",Rex,Poodle,20,3,"
+        "2030-01-07T09:00,2030-01-07T10:00,confirmed,Bath\n"
+        "Sam Lee,312.555.0199,2 Oak Ave,Bo,Pug,12,2,2030-01-07T09:30,2030-01-07T10:30,confirmed,\n"
+        "Sam Lee,312.555.0199,2 Oak Ave,Bo,Pug,12,2,2030-01-07T09:30,2030-01-07T10:30,completed,Bath; Nails\n"
+        "Sam Lee,312.555.0199,2 Oak Ave,Bo,Pug,12,2,2030-01-08T12:00,2030-01-08T13:00,confirmed,\n"
+        "Sam Lee,312.555.0199,2 Oak Ave,Bo,Pug,heavy,2,,,new,\n"
+        "Sam Lee,312.555.0199,2 Oak Ave,Bo,Pug,12,2,,,new,Massage\n"
+    )
+
+    def setUp(self):
+        Service.objects.create(name="Bath", duration_minutes=60, price="40.00")
+        Service.objects.create(name="Nails", duration_minutes=15, price="12.50")
+        self.pat = Client.objects.create(full_name="Pat Doe", address="1 Main St", phone="3125550100")
+        start = timezone.make_aware(datetime.datetime(2030, 1, 8, 12, 30))
+        BookingRequest.objects.create(
+            client=self.pat,
+            pet_name="Old",
+            pet_breed="Pug",
+            pet_weight_lbs=10,
+            pet_age_years=1,
+            scheduled_start=start,
+            scheduled_end=start + datetime.timedelta(hours=1),
+            status="confirmed",
+        )
+
+    def _import(self, *args):
+        path = os.path.join(tempfile.mkdtemp(), "bookings.csv")
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write(self.CSV)
+        out = io.StringIO()
+        call_command("import_data", "bookings", path, *args, stdout=out)
+        return out.getvalue()
+
+    def test_dry_run_reports_without_saving(self):
+        output = self._import("--dry-run")
+        self.assertIn("Would import 2 of 6 bookings", output)
+        self.assertIn("line 3: That time overlaps", output)
+        self.assertIn("line 5: That time overlaps", output)
+        self.assertIn("line 6: pet_weight_lbs must be a whole number", output)
+        self.assertIn("line 7: Unknown service 'Massage'", output)
+        self.assertEqual(BookingRequest.objects.count(), 1)
+        self.assertEqual(Client.objects.count(), 1)
+
+    def test_import_matches_formatted_stored_phone(self):
+        # A phone saved before normalization, as typed on an application.
+        legacy = Client.objects.create(full_name="Ana Ruiz", address="5 Elm St", phone="0")
+        Client.objects.filter(pk=legacy.pk).update(phone="(702) 555-0123")
+        migration = importlib.import_module("booking_app.migrations.0024_normalize_client_phones")
+        migration.normalize_client_phones(apps, None)
+
+        report = import_clients([(2, {"client_name": "Ana Ruiz", "client_phone": "702.555.0123"})])
+        self.assertEqual(Client.objects.filter(full_name="Ana Ruiz").count(), 1)
+        self.assertEqual(Client.objects.get(pk=legacy.pk).phone, "7025550123")
+        self.assertEqual((report.clients_matched, report.clients_created), (1, 0))
+
+        # New saves are normalized too.
+        self.assertEqual(Client.objects.create(full_name="Bo", address="x", phone="(702) 555-0199").phone, "7025550199")
+
+    def test_jsonl_lines_that_are_not_objects_are_rejected(self):
+        path = os.path.join(tempfile.mkdtemp(), "clients.jsonl")
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write('["Sam Lee"]\n"Sam"\n{"client_name": "Sam Lee", "client_phone": "312.555.0199"}\nnope\n')
+        out = io.StringIO()
+        call_command("import_data", "clients", path, stdout=out)
+
+        output = out.getvalue()
+        self.assertIn("line 1: Expected a JSON object", output)
+        self.assertIn("line 2: Expected a JSON object", output)
+        self.assertIn("line 4: Invalid JSON", output)
+        self.assertTrue(Client.objects.filter(phone="3125550199").exists())
+
+    def test_import_matches_clients_and_links_services(self):
+        self._import()
+
+        sam = Client.objects.get(phone="3125550199")
+        self.assertEqual(Client.objects.count(), 2)
+        pat_booking = BookingRequest.objects.get(pet_name="Rex")
+        self.assertEqual((pat_booking.client, pat_booking.zip_code), (self.pat, "60614"))
+        self.assertEqual([s.name for s in pat_booking.services.all()], ["Bath"])
+        completed = BookingRequest.objects.get(client=sam)
+        self.assertEqual(completed.status, "completed")
+        self.assertEqual(completed.services.count(), 2)
+
+    def test_overlap_sweep_follows_groomer_rule(self):
+        def at(hour):
+            return timezone.make_aware(datetime.datetime(2030, 1, 7, hour))
+
+        existing = [(at(9), at(10), 1)]
+        candidates = [
+            (at(9), at(10), 2),  # other groomer: fine
+            (at(9), at(10), 1),  # same groomer: clash with existing
+            (at(9), at(10), None),  # unassigned clashes with everyone
+            (at(10), at(11), 1),  # back to back: fine
+            (at(10), at(12), 1),  # clashes with the candidate above
+        ]
+        self.assertEqual(find_overlaps(candidates, existing), {1, 2, 4})
+
+
+@override_settings(READ_REPLICA_ALIAS="replica")
+class ReplicaRoutingTests(TransactionTestCase):
+    # "replica" is a query_only connection mirroring the test "default".
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        pat = Client.objects.create(full_name="Pat Doe", address="1 Main St", phone="3125550100")
+        start = timezone.now() + datetime.timedelta(days=1)
+        self.booking = BookingRequest.objects.create(
+            client=pat,
+            pet_name="Rex",
+            pet_breed="Poodle",
+            pet_weight_lbs=20,
+            pet_age_years=3,
+            scheduled_start=start,
+            scheduled_end=start + datetime.timedelta(hours=1),
+        )
+
+    def _queries(self, *args, **kwargs):
+        with CaptureQueriesContext(connections["default"]) as primary:
+            with CaptureQueriesContext(connections["replica"]) as replica:
+                response = self.client.get(*args, **kwargs)
+                body = b"".join(response.streaming_content) if response.streaming else response.content
+        return response, body, len(primary), len(replica)
+
+    def test_read_views_use_replica_including_streamed_body(self):
+        response, body, primary, replica = self._queries(reverse("calendar_events"))
+        self.assertEqual(json.loads(body)[0]["id"], self.booking.id)
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+
+        with self.assertRaises(OperationalError):
+            with connections["replica"].cursor() as cursor:
+                cursor.execute("DELETE FROM booking_app_client")
+
+    def test_writer_is_pinned_to_primary(self):
+        self.client.force_login(_staff_user())
+
+        _, _, primary, replica = self._queries(reverse("bookings_list"))
+        self.assertGreater(replica, 0)
+
+        response = self.client.post(reverse("booking_action", args=[self.booking.id]), {"action": "confirm"})
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+        _, _, primary, replica = self._queries(reverse("bookings_list"))
+        self.assertEqual(replica, 0)
+        self.assertGreater(primary, 0)
+
+
+@override_settings(
+    THROTTLE_RULES={
+        "availability_slots": {"rate": "2/m"},
+        "apply": {"rate": "1/m", "methods": ("POST",)},
+    }
+)
+class ThrottleTests(TestCase):
+    def test_bucket_refills_over_time(self):
+        count, seconds = parse_rate("6/m")
+        state = None
+        for _ in range(count):
+            state, retry_after = take(state, 100.0, count, count / seconds)
+            self.assertEqual(retry_after, 0)
+
+        state, retry_after = take(state, 100.0, count, count / seconds)
+        self.assertAlmostEqual(retry_after, 10.0)
+        _, retry_after = take(state, 110.0, count, count / seconds)
+        self.assertEqual(retry_after, 0)
+
+    def test_per_ip_limit_returns_429_with_retry_after(self):
+        url = reverse("availability_slots")
+        for _ in range(2):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+        before = dict(metrics.registry._counters)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "30")
+        self.assertFalse(response.json()["ok"])
+
+        key = ("booking_throttled_total", (("scope", "ip"), ("view", "availability_slots")))
+        self.assertEqual(metrics.registry._counters[key] - before.get(key, 0), 1)
+
+        # Another client and other routes are unaffected.
+        self.assertEqual(self.client.get(url, REMOTE_ADDR="10.0.0.2").status_code, 200)
+        self.assertEqual(self.client.get(reverse("apply")).status_code, 200)
+
+    def test_methods_and_route_wide_bucket(self):
+        url = reverse("apply")
+        self.assertEqual(self.client.post(url, {}).status_code, 200)
+        response = self.client.post(url, {})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Content-Type"], "text/plain; charset=utf-8")
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+        with override_settings(THROTTLE_RULES={"availability_slots": {"route_rate": "1/h"}}):
+            url = reverse("availability_slots")
+            self.assertEqual(self.client.get(url, REMOTE_ADDR="10.0.0.3").status_code, 200)
+            self.assertEqual(self.client.get(url, REMOTE_ADDR="10.0.0.4").status_code, 429)
+
+    def test_range_scanning_endpoints_are_throttled(self):
+        for name in ("availability_summary", "next_available_slots"):
+            rule = project_settings.THROTTLE_RULES[name]
+            self.assertTrue(rule["route_rate"])
+            with self.subTest(name=name), override_settings(THROTTLE_RULES={name: {**rule, "burst": 1}}):
+                url = reverse(name)
+                self.assertNotEqual(self.client.get(url, REMOTE_ADDR="10.0.1.1").status_code, 429)
+                self.assertEqual(self.client.get(url, REMOTE_ADDR="10.0.1.1").status_code, 429)
+
+    @override_settings(THROTTLE_CACHE="default", THROTTLE_PROXY_COUNT=1)
+    def test_cache_shares_buckets_across_workers(self):
+        cache.clear()
+        url = reverse("availability_slots")
+        # Each test client loads its own middleware, like a separate worker.
+        workers = [TestClient(), TestClient(), TestClient()]
+        statuses = [w.get(url, HTTP_X_FORWARDED_FOR="203.0.113.9").status_code for w in workers]
+        self.assertEqual(statuses, [200, 200, 429])
+        self.assertEqual(workers[0].get(url, HTTP_X_FORWARDED_FOR="203.0.113.10").status_code, 200)
+
+
+class CalendarFeedTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        settings_override = override_settings(CALENDAR_FEED_DIR=self.tmp.name, CALENDAR_FEED_REBUILD_DELAY=0)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        pat = Client.objects.create(full_name="Pat Doe", address="1 Main St", phone="3125550100")
+        start = timezone.now() + datetime.timedelta(days=1)
+        self.booking = BookingRequest.objects.create(
+            client=pat,
+            pet_name="Rex",
+            pet_breed="Poodle",
+            pet_weight_lbs=20,
+            pet_age_years=3,
+            scheduled_start=start,
+            scheduled_end=start + datetime.timedelta(hours=1),
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.subscription = CalendarSubscription.objects.create(name="Naz's phone")
+        self.url = reverse("apple_calendar_feed")
+        calendar_feed._freshness["checked"] = None
+
+    def _confirm(self, run_jobs=True):
+        self.client.force_login(_staff_user())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("booking_action", args=[self.booking.id]), {"action": "confirm"})
+        self.client.logout()
+        if run_jobs:
+            jobs.run_ready()
+
+    def _feed(self):
+        response = self.client.get(self.url, {"token": self.subscription.token})
+        return b"".join(response.streaming_content).decode()
+
+    def test_token_poll_serves_snapshot_without_queries(self):
+        self._confirm()
+        # Building is one query: service names are stored on the booking.
+        with self.assertNumQueries(1):
+            calendar_feed.build_ics()
+
+        # The first poll in a while compares the snapshot with the data version.
+        with self.assertNumQueries(1):
+            self._feed()
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, {"token": self.subscription.token})
+            body = b"".join(response.streaming_content).decode()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/calendar; charset=utf-8")
+        self.assertIn(f"UID:booking-{self.booking.id}@naz-mobile-grooming", body)
+
+        with self.assertNumQueries(0):
+            again = self.client.get(
+                self.url, {"token": self.subscription.token}, HTTP_IF_NONE_MATCH=response["ETag"]
+            )
+        self.assertEqual(again.status_code, 304)
+
+    def test_rebuilds_only_when_confirmed_bookings_change(self):
+        # A new (unconfirmed) booking isn't in the feed.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.booking.services.add(Service.objects.create(name="Bath", duration_minutes=30, price=40))
+            self.booking.pet_name = "Max"
+            self.booking.save(update_fields=["pet_name"])
+        self.assertFalse(Job.objects.exists())
+
+        self._confirm()
+        self.assertEqual(Job.objects.filter(name="rebuild_calendar_feed").count(), 1)
+        first = self.client.get(self.url, {"token": self.subscription.token})["ETag"]
+
+        self.booking.status = "canceled"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.booking.save(update_fields=["status"])
+        jobs.run_ready()
+        response = self.client.get(self.url, {"token": self.subscription.token})
+        self.assertNotEqual(response["ETag"], first)
+        self.assertNotIn(b"BEGIN:VEVENT", b"".join(response.streaming_content))
+
+    def test_feed_catches_up_without_a_worker(self):
+        self._confirm(run_jobs=False)
+        self.assertEqual(Job.objects.get().status, Job.STATUS_QUEUED)
+        self.assertIn(f"UID:booking-{self.booking.id}@naz-mobile-grooming", self._feed())
+
+        # The queued job finds the snapshot current and leaves it alone.
+        etag = self.client.get(self.url, {"token": self.subscription.token})["ETag"]
+        jobs.run_ready()
+        self.assertEqual(self.client.get(self.url, {"token": self.subscription.token})["ETag"], etag)
+
+    @override_settings(JOBS_EAGER=True, CALENDAR_FEED_REBUILD_DELAY=5)
+    def test_eager_jobs_rebuild_after_confirming(self):
+        # Keep the view from catching up by itself.
+        calendar_feed._freshness["checked"] = time.monotonic()
+        self._confirm(run_jobs=False)
+        self.assertEqual(Job.objects.get().status, Job.STATUS_DONE)
+        self.assertIn(f"UID:booking-{self.booking.id}@naz-mobile-grooming", self._feed())
+
+    def test_tokens_are_per_subscriber_and_revocable(self):
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+        self.assertEqual(self.client.get(self.url, {"token": "nope"}).status_code, 404)
+        self.assertEqual(self.client.get(self.url, {"token": self.subscription.token}).status_code, 200)
+
+        self.subscription.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.subscription.save()
+        self.assertEqual(self.client.get(self.url, {"token": self.subscription.token}).status_code, 404)
+
+        self.client.force_login(_staff_user())
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+
+class ServiceTotalsTests(TestCase):
+    def setUp(self):
+        self.bath = Service.objects.create(name="Bath", duration_minutes=60, price="40.00")
+        self.nails = Service.objects.create(name="Nails", duration_minutes=15, price="12.50")
+        pat = Client.objects.create(full_name="Pat Doe", address="1 Main St", phone="3125550100")
+        start = timezone.now() - datetime.timedelta(hours=2)
+        self.booking = BookingRequest.objects.create(
+            client=pat,
+            pet_name="Rex",
+            pet_breed="Poodle",
+            pet_weight_lbs=20,
+            pet_age_years=3,
+            scheduled_start=start,
+            scheduled_end=start + datetime.timedelta(hours=1),
+            status="confirmed",
+        )
+
+    def _totals(self):
+        return BookingRequest.objects.values_list(
+            "total_duration_minutes", "total_price", "service_names"
+        ).get(pk=self.booking.pk)
+
+    def test_kept_in_sync_with_links_and_service_edits(self):
+        self.booking.services.set([self.bath, self.nails])
+        self.assertEqual(self._totals(), (75, Decimal("52.50"), ["Bath", "Nails"]))
+        self.assertEqual(self.booking.total_price, Decimal("52.50"))
+
+        self.nails.price = "15.00"
+        self.nails.save()
+        self.assertEqual(self._totals(), (75, Decimal("55.00"), ["Bath", "Nails"]))
+
+        self.bath.bookingrequest_set.clear()
+        self.assertEqual(self._totals(), (15, Decimal("15.00"), ["Nails"]))
+
+        self.nails.delete()
+        self.assertEqual(self._totals(), (0, Decimal("0.00"), []))
+
+    def test_backfill_and_readers_skip_the_join(self):
+        self.booking.services.set([self.bath, self.nails])
+        BookingRequest.objects.update(total_duration_minutes=0, total_price=0, service_names=[])
+
+        call_command("backfill_service_totals", stdout=open(os.devnull, "w"))
+        self.assertEqual(self._totals(), (75, Decimal("52.50"), ["Bath", "Nails"]))
+
+        self.client.force_login(_staff_user())
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("bookings_list"))
+            summary = self.client.get(reverse("dashboard_summary")).json()
+        self.assertContains(response, "Bath, Nails")
+        self.assertEqual(summary["revenue_to_date"], "52.50")
+        self.assertFalse(any("bookingrequest_services" in q["sql"] for q in ctx.captured_queries))
+
+
+class AdminScalingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.admin = User.objects.create_superuser("admin", password="pw")
+        seed_dataset(clients=5, bookings=20, applications=0, seed=1, groomers=2)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def _changelist_queries(self, url, **params):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response, ctx.captured_queries
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        urls = [reverse("admin:booking_app_bookingrequest_changelist"), reverse("admin:booking_app_client_changelist")]
+        before = [len(self._changelist_queries(url)[1]) for url in urls]
+
+        seed_dataset(clients=40, bookings=200, applications=0, seed=2, groomers=2)
+
+        after = [len(self._changelist_queries(url)[1]) for url in urls]
+        self.assertEqual(after, before)
+
+    def test_change_form_uses_autocomplete_for_client(self):
+        booking = BookingRequest.objects.select_related("client").first()
+        other = Client.objects.exclude(full_name=booking.client.full_name).first()
+
+        response = self.client.get(reverse("admin:booking_app_bookingrequest_change", args=[booking.pk]))
+        self.assertContains(response, "admin-autocomplete")
+        self.assertContains(response, booking.client.full_name)
+        self.assertNotContains(response, other.full_name)
+
+    def test_phone_search_is_an_exact_lookup(self):
+        target = Client.objects.order_by("pk").first()
+        pretty = f"({target.phone[:3]}) {target.phone[3:6]}-{target.phone[6:]}"
+
+        response, queries = self._changelist_queries(reverse("admin:booking_app_client_changelist"), q=pretty)
+        self.assertEqual(list(response.context["cl"].result_list), [target])
+        self.assertFalse(any("LIKE" in q["sql"] for q in queries))
+
+    def test_phone_search_finds_clients_from_approved_applications(self):
+        app = NewClientApplication.objects.create(
+            full_name="Ana Ruiz", address="5 Elm St", zip_code="89101", phone="(702) 555-0123",
+            pet_name="Bo", pet_breed="Pug",
+        )
+        self.client.post(reverse("application_action", args=[app.id]), {"action": "approve"})
+
+        for q in ("(702) 555-0123", "7025550123", "702.555.0123"):
+            with self.subTest(q=q):
+                response = self.client.get(reverse("admin:booking_app_client_changelist"), {"q": q})
+                self.assertEqual([c.full_name for c in response.context["cl"].result_list], ["Ana Ruiz"])
+
+    def test_prefix_searches_use_an_index(self):
+        for qs in (
+            Client.objects.filter(full_name__istartswith="pat"),
+            BookingRequest.objects.filter(pet_name__istartswith="re"),
+            ArchivedBooking.objects.filter(zip_code__iexact="60614"),
+        ):
+            sql, params = qs.query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+                plan = " ".join(str(row[-1]) for row in cursor.fetchall())
+            self.assertIn("_search_idx", plan)
+
+    def test_clients_list_phone_search_ignores_formatting(self):
+        target = Client.objects.order_by("pk").first()
+        local = f"{target.phone[3:6]}-{target.phone[6:]}"
+        for q in (f"({target.phone[:3]}) {local}", local):
+            with self.subTest(q=q):
+                response = self.client.get(reverse("clients_list"), {"q": q, "show": "all"})
+                self.assertIn(target, list(response.context["clients"]))
+
+    def test_estimated_count_skips_count_star(self):
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+        with override_settings(ADMIN_ESTIMATED_COUNT_ABOVE=1):
+            with CaptureQueriesContext(connection) as ctx:
+                estimate = EstimatedCountPaginator(BookingRequest.objects.order_by("pk"), 10).count
+            self.assertEqual(estimate, 20)
+            self.assertFalse(any("COUNT" in q["sql"] for q in ctx.captured_queries))
+
+            # Filtered lists still get an exact count.
+            exact = EstimatedCountPaginator(BookingRequest.objects.filter(status="confirmed").order_by("pk"), 10).count
+            self.assertEqual(exact, BookingRequest.objects.filter(status="confirmed").count())
+
+
+class BookingValidationFastPathTests(TestCase):
+    def setUp(self):
+        self.pat = Client.objects.create(full_name="Pat Doe", address="1 Main St", phone="3125550100")
+        self.start = timezone.now() + datetime.timedelta(days=1)
+        self.booking = self._book(self.start)
+
+    def _book(self, start, status="new"):
+        return BookingRequest.objects.create(
+            client=self.pat,
+            pet_name="Rex",
+            pet_breed="Poodle",
+            pet_weight_lbs=20,
+            pet_age_years=3,
+            scheduled_start=start,
+            scheduled_end=start + datetime.timedelta(hours=1),
+            status=status,
+        )
+
+    def _booking_queries(self, func):
+        with CaptureQueriesContext(connection) as ctx:
+            func()
+        return [q["sql"] for q in ctx.captured_queries if "booking_app_bookingrequest" in q["sql"]]
+
+    def test_status_only_updates_are_a_single_update(self):
+        for status in ("confirmed", "declined"):
+            booking = BookingRequest.objects.get(pk=self.booking.pk)
+            booking.status = status
+            queries = self._booking_queries(lambda: booking.save(update_fields=["status"]))
+            self.assertEqual(len(queries), 1, queries)
+            self.assertTrue(queries[0].startswith('UPDATE "booking_app_bookingrequest"'))
+
+        # Through the view too: confirming a new booking is the fetch, then one UPDATE.
+        fresh = self._book(self.start + datetime.timedelta(hours=5))
+        self.client.force_login(_staff_user())
+        queries = self._booking_queries(
+            lambda: self.client.post(reverse("booking_action", args=[fresh.pk]), {"action": "confirm"})
+        )
+        self.assertEqual([q.split()[0] for q in queries], ["SELECT", "UPDATE"])
+
+    def test_overlap_rechecked_when_slot_or_activity_changes(self):
+        # Declining frees the slot, and someone else takes it.
+        self.booking.status = "declined"
+        self.booking.save(update_fields=["status"])
+        other = self._book(self.start)
+
+        # Moving back into an active status is checked.
+        self.booking.status = "confirmed"
+        with self.assertRaises(ValidationError):
+            self.booking.save(update_fields=["status"])
+
+        # So is moving the time.
+        later = self._book(self.start + datetime.timedelta(hours=3))
+        other.scheduled_start = later.scheduled_start
+        other.scheduled_end = later.scheduled_end
+        with self.assertRaises(ValidationError):
+            other.save(update_fields=["scheduled_start", "scheduled_end"])
@@ -0,0 +1,171 @@
+"""Token-bucket throttling for the public endpoints.
+
+`THROTTLE_RULES` maps a URL name to its limits:
+
+    "availability_slots": {"rate": "60/m", "burst": 20, "route_rate": "1200/m"}
+
+`rate` is how fast a client's bucket refills ("N/s", "N/m", "N/h" or "N/d").
+`burst` is how many requests it can make back to back (defaults to N). The
+bucket is keyed by client IP and URL name. The optional `route_rate` /
+`route_burst` add one more bucket for the route that all clients share,
+which caps the total load on it. `methods` limits the rule to some HTTP
+methods (e.g. only the POST of a form).
+
+A request that finds a bucket empty gets a 429 with a `Retry-After` header
+and is counted in booking_throttled_total.
+
+Buckets live in the middleware instance, so each worker process keeps its
+own, with no I/O per request. Set `THROTTLE_CACHE` to a cache alias to share
+them across workers instead. That costs one cache get and set per bucket,
+and since the get and set are not atomic, two workers racing on one bucket
+can each let a request through.
+"""
+
+import functools
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse, JsonResponse
+
+from . import metrics
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+@functools.lru_cache(maxsize=64)
+def parse_rate(rate):
+    """("N/period") -> (requests, seconds). Raises ValueError if malformed."""
+    count, _, period = rate.partition("/")
+    seconds = PERIODS.get(period.strip().lower()[:1])
+    if seconds is None or int(count) <= 0:
+        raise ValueError(f"bad throttle rate {rate!r}")
+    return int(count), seconds
+
+
+def refill(tokens, stamp, now, capacity, per_second):
+    """Tokens in a bucket last seen at `stamp` with `tokens` left."""
+    return min(capacity, tokens + (now - stamp) * per_second)
+
+
+def take(state, now, capacity, per_second):
+    """Spend one token from `state` ((tokens, stamp) or None for a full bucket).
+
+    Returns (new_state, retry_after): retry_after is 0 when the request may
+    go ahead, otherwise the seconds until a token is back.
+    """
+    tokens = capacity if state is None else refill(state[0], state[1], now, capacity, per_second)
+    if tokens >= 1:
+        return (tokens - 1, now), 0
+    return (tokens, now), (1 - tokens) / per_second
+
+
+class LocalBuckets:
+    """Per-process bucket store."""
+
+    def __init__(self, max_keys):
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self.max_keys = max_keys
+
+    def take(self, key, capacity, per_second):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._buckets.get(key)
+            state, retry_after = take(entry and entry[0], now, capacity, per_second)
+            # Remember when the bucket will be full again, for pruning.
+            self._buckets[key] = (state, now + (capacity - state[0]) / per_second)
+            if len(self._buckets) > self.max_keys:
+                self._prune(now)
+        return retry_after
+
+    def _prune(self, now):
+        # A full bucket is the same as no bucket, so those can go.
+        for key in [k for k, (_, full_at) in self._buckets.items() if full_at <= now]:
+            del self._buckets[key]
+        if len(self._buckets) > self.max_keys:
+            # Still too many distinct clients: forget them all (fail open).
+            self._buckets.clear()
+
+
+class CacheBuckets:
+    """Bucket store shared by every worker through a Django cache."""
+
+    def __init__(self, alias):
+        self.cache = caches[alias]
+
+    def take(self, key, capacity, per_second):
+        cache_key = "booking_app:throttle:" + key
+        now = time.time()
+        state, retry_after = take(self.cache.get(cache_key), now, capacity, per_second)
+        # Keep the entry until it would have refilled anyway.
+        self.cache.set(cache_key, state, math.ceil(capacity / per_second) + 1)
+        return retry_after
+
+
+def client_ip(request):
+    """The caller's IP, taken from X-Forwarded-For behind THROTTLE_PROXY_COUNT proxies."""
+    proxies = getattr(settings, "THROTTLE_PROXY_COUNT", 0)
+    if proxies:
+        forwarded = [p.strip() for p in request.META.get("HTTP_X_FORWARDED_FOR", "").split(",") if p.strip()]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def _buckets(rule):
+    """[(scope, capacity, per_second)] for one THROTTLE_RULES entry."""
+    buckets = []
+    for scope, rate_key, burst_key in (("ip", "rate", "burst"), ("route", "route_rate", "route_burst")):
+        if rule.get(rate_key):
+            count, seconds = parse_rate(rule[rate_key])
+            buckets.append((scope, rule.get(burst_key) or count, count / seconds))
+    return buckets
+
+
+def throttled_response(request, retry_after):
+    message = "Too many requests. Please wait a moment and try again."
+    if request.path.startswith("/api/"):
+        response = JsonResponse({"ok": False, "error": message}, status=429)
+    else:
+        response = HttpResponse(message, status=429, content_type="text/plain; charset=utf-8")
+    response["Retry-After"] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+class ThrottleMiddleware:
+    """Apply THROTTLE_RULES before the view runs (and before CSRF checks)."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, "THROTTLE_ENABLED", True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        alias = getattr(settings, "THROTTLE_CACHE", None)
+        if alias:
+            self.store = CacheBuckets(alias)
+        else:
+            self.store = LocalBuckets(getattr(settings, "THROTTLE_MAX_KEYS", 10000))
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view = request.resolver_match.url_name
+        rule = getattr(settings, "THROTTLE_RULES", {}).get(view)
+        if rule is None:
+            return None
+        methods = rule.get("methods")
+        if methods and request.method not in methods:
+            return None
+
+        ip = client_ip(request)
+        for scope, capacity, per_second in _buckets(rule):
+            key = f"{view}:{ip}" if scope == "ip" else view
+            retry_after = self.store.take(key, capacity, per_second)
+            if retry_after:
+                metrics.inc("booking_throttled_total", view=view, scope=scope)
+                return throttled_response(request, retry_after)
+        return None
@@ -0,0 +1,96 @@
+"""Denormalized service totals on BookingRequest and ArchivedBooking.
+
+Each booking stores `total_duration_minutes`, `total_price` and
+`service_names` (a list, in link order) copied from its services. Lists,
+the calendar feed, exports and revenue figures read these columns instead of
+joining booking -> link -> Service.
+
+signals.py keeps them in sync when a booking's services change and when a
+Service is edited or deleted. Code that writes links with bulk_create (the
+seeder, imports) calls `refresh()` itself. `manage.py backfill_service_totals`
+fills in rows that predate the columns.
+"""
+
+from decimal import Decimal
+
+from django.db import transaction
+
+TOTAL_FIELDS = ("total_duration_minutes", "total_price", "service_names")
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def totals_for(services):
+    """Field values for a booking linked to `services` (Service instances)."""
+    return {
+        "total_duration_minutes": sum(s.duration_minutes for s in services),
+        "total_price": sum((Decimal(str(s.price)) for s in services), Decimal("0.00")),
+        "service_names": [s.name for s in services],
+    }
+
+
+def _link_field(model):
+    return f"{model._meta.model_name}_id"
+
+
+def compute(model, ids):
+    """{id: field values} for the given bookings, from one query on the link table."""
+    link_field = _link_field(model)
+    found = {pk: ([], 0, Decimal("0.00")) for pk in ids}
+    links = (
+        model.services.through.objects.filter(**{f"{link_field}__in": ids})
+        .order_by("id")
+        .values_list(link_field, "service__name", "service__duration_minutes", "service__price")
+    )
+    for pk, name, minutes, price in links:
+        names, total_minutes, total_price = found[pk]
+        names.append(name)
+        found[pk] = (names, total_minutes + minutes, total_price + price)
+
+    return {
+        pk: {"total_duration_minutes": minutes, "total_price": price, "service_names": names}
+        for pk, (names, minutes, price) in found.items()
+    }
+
+
+def refresh(model, ids, batch_size=DEFAULT_BATCH_SIZE):
+    """Recompute the totals of bookings `ids` of `model`. Returns how many were written."""
+    ids = list(ids)
+    written = 0
+    for offset in range(0, len(ids), batch_size):
+        chunk = ids[offset:offset + batch_size]
+        objs = []
+        for pk, values in compute(model, chunk).items():
+            obj = model(pk=pk)
+            for field, value in values.items():
+                setattr(obj, field, value)
+            objs.append(obj)
+        # bulk_update skips save() and signals, which is what we want here.
+        with transaction.atomic():
+            written += model.objects.bulk_update(objs, TOTAL_FIELDS)
+    return written
+
+
+def booking_ids_for_service(model, service_id):
+    link_field = _link_field(model)
+    return list(
+        model.services.through.objects.filter(service_id=service_id)
+        .values_list(link_field, flat=True)
+        .distinct()
+    )
+
+
+def backfill(model, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """Refresh every row of `model` in id order, one batch per transaction."""
+    done = 0
+    last_id = 0
+    while True:
+        ids = list(
+            model.objects.filter(pk__gt=last_id).order_by("pk").values_list("pk", flat=True)[:batch_size]
+        )
+        if not ids:
+            return done
+        done += refresh(model, ids, batch_size)
+        last_id = ids[-1]
+        if progress:
+            progress(done)
@@ -0,0 +1,194 @@
+"""Drive times between zip codes, from a local centroid table.
+
+Minutes between two zips are estimated from the great-circle distance
+between their centroids (`ZipCentroid`), a road detour factor and an average
+van speed, capped at `TRAVEL_MAX_MINUTES`. No maps service is called.
+
+Nothing is precomputed. A request loads the centroids of just the zips it
+needs (its own and those of nearby bookings) and works out each pair on
+first use. Centroids and pair times are memoized per process, up to
+`TRAVEL_MEMO_SIZE` entries each. The memo is dropped when the
+`zip_centroids` data version changes. That version is checked at most every
+`TRAVEL_VERSION_TTL` seconds.
+"""
+
+import datetime
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from . import caching
+from .models import ZipCentroid
+
+EARTH_RADIUS_MILES = 3958.8
+
+# A 5-digit (or ZIP+4) code at the end of an address, e.g. "..., IL 60614".
+ZIP_RE = re.compile(r"\b(\d{5})(?:-\d{4})?\W*(?:USA?)?\W*$", re.IGNORECASE)
+
+
+def extract_zip(address):
+    match = ZIP_RE.search(address or "")
+    return match.group(1) if match else ""
+
+
+def haversine_miles(lat1, lon1, lat2, lon2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * math.asin(math.sqrt(a))
+
+
+def unknown_minutes():
+    """Buffer used when either end of a trip has no known centroid."""
+    return getattr(settings, "TRAVEL_UNKNOWN_MINUTES", 0)
+
+
+def max_minutes():
+    """Longest drive time ever returned, which bounds every buffer."""
+    return getattr(settings, "TRAVEL_MAX_MINUTES", 240)
+
+
+def _trim(memo, size):
+    while len(memo) > size:
+        memo.popitem(last=False)
+
+
+class DriveTimes:
+    """Whole-minute drive times between zips, computed per pair and memoized."""
+
+    def __init__(self):
+        self.speed = getattr(settings, "TRAVEL_SPEED_MPH", 25)
+        self.detour = getattr(settings, "TRAVEL_DETOUR_FACTOR", 1.3)
+        self.minimum = getattr(settings, "TRAVEL_MIN_MINUTES", 5)
+        self.cap = max_minutes()
+        self.size = getattr(settings, "TRAVEL_MEMO_SIZE", 50000)
+
+        self._lock = threading.Lock()
+        # zip -> (lat, lng), or None when the zip has no centroid.
+        self._coords = OrderedDict()
+        # (zip, zip) in sorted order -> minutes. Drive times are symmetric.
+        self._minutes = OrderedDict()
+
+    def load(self, zip_codes):
+        """Fetch the centroids of any `zip_codes` not seen yet, in one query."""
+        with self._lock:
+            missing = {z for z in zip_codes if z and z not in self._coords}
+        if not missing:
+            return
+
+        found = {
+            z: (lat, lng)
+            for z, lat, lng in ZipCentroid.objects.filter(zip_code__in=missing).values_list(
+                "zip_code", "latitude", "longitude"
+            )
+        }
+        with self._lock:
+            for z in missing:
+                self._coords[z] = found.get(z)
+            _trim(self._coords, self.size)
+
+    def minutes(self, from_zip, to_zip):
+        key = (from_zip, to_zip) if from_zip <= to_zip else (to_zip, from_zip)
+        with self._lock:
+            value = self._minutes.get(key)
+            if value is not None:
+                self._minutes.move_to_end(key)
+                return value
+
+        self.load(key)
+        a = self._coords.get(key[0])
+        b = self._coords.get(key[1])
+        if a is None or b is None:
+            return unknown_minutes()
+
+        if key[0] == key[1]:
+            value = 0
+        else:
+            miles = haversine_miles(a[0], a[1], b[0], b[1]) * self.detour
+            value = min(max(math.ceil(miles / self.speed * 60), self.minimum), self.cap)
+
+        with self._lock:
+            self._minutes[key] = value
+            _trim(self._minutes, self.size)
+        return value
+
+
+_lock = threading.Lock()
+_state = {"times": None, "version": None, "checked": 0.0}
+
+
+def get_drive_times():
+    """The process-wide memo, replaced when the centroid table changed."""
+    now = time.monotonic()
+    ttl = getattr(settings, "TRAVEL_VERSION_TTL", 300)
+
+    times = _state["times"]
+    if times is not None and now - _state["checked"] < ttl:
+        return times
+
+    version = caching.get_version(caching.ZIP_CENTROIDS)
+    with _lock:
+        if _state["times"] is None or _state["version"] != version:
+            _state["times"] = DriveTimes()
+            _state["version"] = version
+        _state["checked"] = now
+        return _state["times"]
+
+
+def invalidate():
+    """Drop this process's memo (other workers notice via the data version)."""
+    with _lock:
+        _state["times"] = None
+
+
+def centroids_changed():
+    """Call after bulk writes to ZipCentroid, which skip the model signals."""
+    caching.bump_version(caching.ZIP_CENTROIDS)
+    invalidate()
+
+
+class Buffers:
+    """Drive-time padding around existing bookings for a new appointment.
+
+    A booking at zip B blocks `travel(new -> B)` before its start and
+    `travel(B -> new)` after its end. Without a zip for the new appointment
+    every booking gets the flat `TRAVEL_UNKNOWN_MINUTES`, and no centroids
+    are loaded at all.
+
+    `widest` is the largest pad in play. It starts at the most any booking
+    could need (`limit`) and narrows to the real maximum once `reach()` has
+    seen the zips of the bookings near the range.
+    """
+
+    def __init__(self, zip_code=None):
+        self.zip_code = (zip_code or "").strip()
+        self.times = get_drive_times() if self.zip_code else None
+
+        limit = unknown_minutes()
+        if self.times is not None:
+            limit = max(limit, self.times.cap)
+        self.limit = self.widest = datetime.timedelta(minutes=limit)
+
+    def reach(self, booking_zips):
+        """Narrow `widest` to the largest pad needed by bookings at `booking_zips`."""
+        if self.times is None:
+            return self.widest
+
+        zips = set(booking_zips)
+        self.times.load(zips | {self.zip_code})
+        self.widest = max((self.around(z)[0] for z in zips), default=datetime.timedelta(0))
+        return self.widest
+
+    def around(self, booking_zip):
+        """(before, after) timedeltas to add around a booking at `booking_zip`."""
+        if self.times is None or not booking_zip:
+            pad = datetime.timedelta(minutes=unknown_minutes())
+            return pad, pad
+
+        minutes = self.times.minutes(self.zip_code, booking_zip)
+        return datetime.timedelta(minutes=minutes), datetime.timedelta(minutes=minutes)
@@ -10,6 +10,11 @@ urlpatterns = [
     path("calendar/", views.calendar_dashboard, name="calendar_dashboard"),
     path("calendar.ics", views.apple_calendar_feed, name="apple_calendar_feed"),
     path("api/calendar-events/", views.calendar_events, name="calendar_events"),
+    path(
+        "api/dashboard-summary/",
+        views.dashboard_summary,
+        name="dashboard_summary",
+    ),
     path(
         "availability/",
         views.availability_dashboard,
@@ -25,6 +30,16 @@ urlpatterns = [
         views.availability_slots,
         name="availability_slots",
     ),
+    path(
+        "api/availability-summary/",
+        views.availability_summary,
+        name="availability_summary",
+    ),
+    path(
+        "api/next-slots/",
+        views.next_available_slots,
+        name="next_available_slots",
+    ),
     path(
         "applications/",
         views.applications_list,
@@ -42,6 +57,11 @@ urlpatterns = [
         views.pending_applications,
         name="pending_applications",
     ),
+    path(
+        "api/pending-applications/count/",
+        views.application_counts,
+        name="application_counts",
+    ),
     path(
         "api/application/<int:app_id>/action/",
         views.application_action,
@@ -74,4 +94,18 @@ urlpatterns = [
         views.booking_suggestions,
         name="booking_suggestions",
     ),
+    path("api/export/bookings/", views.export_bookings, name="export_bookings"),
+    path("api/export/clients/", views.export_clients, name="export_clients"),
+    path(
+        "api/notifications/stats/",
+        views.notification_stats,
+        name="notification_stats",
+    ),
+    path("metrics", views.metrics, name="metrics"),
+    path("profiling/", views.profiling_captures, name="profiling_captures"),
+    path(
+        "profiling/<str:capture_id>.prof",
+        views.profiling_download,
+        name="profiling_download",
+    ),
 ]
\ No newline at end of file
@@ -1,17 +1,37 @@
+import base64
 import datetime
+import hmac
+import json
+import re
+import uuid
 
 from django.conf import settings
 from django.contrib.auth.decorators import user_passes_test
+from django.contrib.auth.views import redirect_to_login
 from django.core.exceptions import ValidationError
-from django.db import transaction
-from django.db.models import Case, IntegerField, Max, Q, When
-from django.http import HttpResponse, JsonResponse
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, IntegerField, Max, OuterRef, Q, Subquery, Sum, When
+from django.db.models.functions import Coalesce, Greatest
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.utils import timezone
 from django.views.decorators.http import require_POST
 
+from . import availability, caching, calendar_feed, exports, jobs, notifications
+from . import metrics as app_metrics
+from . import profiling
 from .forms import BookingRequestForm, NewClientApplicationForm
-from .models import BookingRequest, Client, NewClientApplication, Service
+from .models import (
+    ArchivedBooking,
+    BookingRequest,
+    Client,
+    IdempotencyKey,
+    NewClientApplication,
+    Service,
+    normalize_phone,
+)
+from .routing import replica_reads
+from .streaming import StreamingJsonResponse, stream_queryset
 
 # Staff gate that uses the app login (NOT Django admin login)
 # This prevents redirects to /django-admin/login/.
@@ -23,8 +43,32 @@ staff_required = user_passes_test(
 )
 
 
+def _is_overlap_error(error):
+    """True when a ValidationError came from BookingRequest's overlap guard."""
+    if hasattr(error, "error_dict"):
+        errors = [e for errs in error.error_dict.values() for e in errs]
+    else:
+        errors = error.error_list
+    return any(getattr(e, "code", None) == "overlap" for e in errors)
+
+
+IDEMPOTENCY_KEY_RE = re.compile(r"^[A-Za-z0-9-]{16,64}$")
+
+
+def _idempotency_key(request):
+    key = (request.POST.get("idempotency_key") or "").strip()
+    return key if IDEMPOTENCY_KEY_RE.match(key) else ""
+
+
 def book_request(request):
     if request.method == "POST":
+        # A replayed submission (double tap, back button) already succeeded:
+        # answer like the first time without touching clients or bookings.
+        idempotency_key = _idempotency_key(request)
+        if idempotency_key and IdempotencyKey.objects.filter(key=idempotency_key).exists():
+            app_metrics.record_admission("replayed")
+            return redirect("book_success")
+
         form = BookingRequestForm(request.POST, user=request.user)
         if form.is_valid():
             # Soft gate: when enabled, only allow staff OR known existing active clients to book.
@@ -72,6 +116,7 @@ def book_request(request):
                     None,
                     "New clients must submit an application and be approved before booking. If you are an existing client, enter the same phone number used previously.",
                 )
+                app_metrics.record_admission("soft_gate_rejected")
             else:
                 try:
                     with transaction.atomic():
@@ -167,13 +212,29 @@ def book_request(request):
                         booking.save()
                         form.save_m2m()
 
+                        if idempotency_key:
+                            # The unique index makes a concurrent retry fail here and roll back.
+                            IdempotencyKey.objects.create(key=idempotency_key, booking=booking)
+
+                    app_metrics.record_admission("created")
+                    _warm_dashboard_later()
+                    return redirect("book_success")
+
+                except IntegrityError:
+                    if not idempotency_key or not IdempotencyKey.objects.filter(key=idempotency_key).exists():
+                        raise
+                    app_metrics.record_admission("replayed")
                     return redirect("book_success")
 
                 except ValidationError as e:
+                    app_metrics.record_admission(
+                        "overlap_rejected" if _is_overlap_error(e) else "invalid"
+                    )
                     msg = "; ".join(e.messages) if getattr(e, "messages", None) else str(e)
                     form.add_error(None, msg)
     else:
         form = BookingRequestForm(user=request.user)
+        idempotency_key = ""
 
     return render(
         request,
@@ -181,6 +242,7 @@ def book_request(request):
         {
             "form": form,
             "services": Service.objects.all(),
+            "idempotency_key": idempotency_key or uuid.uuid4().hex,
         },
     )
 
@@ -216,20 +278,150 @@ def home(request):
     return redirect("availability_dashboard")
 
 
+# Bookings counted in the dashboard's today/week totals. Unlike
+# models.ACTIVE_STATUSES (which occupy a slot), this includes completed ones.
+DASHBOARD_COUNTED_STATUSES = ("new", "confirmed", "completed")
+REVENUE_STATUSES = ("confirmed", "completed")
+DASHBOARD_CACHE_SECONDS = 60
+
+
+def _build_dashboard_summary():
+    tz = timezone.get_current_timezone()
+    now = timezone.now()
+    today = timezone.localdate(now)
+
+    def local_midnight(day):
+        return timezone.make_aware(datetime.datetime.combine(day, datetime.time(0, 0)), tz)
+
+    week_start = today - datetime.timedelta(days=today.weekday())
+    week_end = week_start + datetime.timedelta(days=7)
+    year_start = today.replace(month=1, day=1)
+
+    counts = BookingRequest.objects.filter(
+        status__in=DASHBOARD_COUNTED_STATUSES,
+        scheduled_start__gte=local_midnight(week_start),
+        scheduled_start__lt=local_midnight(week_end),
+    ).aggregate(
+        week=Count("id"),
+        today=Count(
+            "id",
+            filter=Q(
+                scheduled_start__gte=local_midnight(today),
+                scheduled_start__lt=local_midnight(today + datetime.timedelta(days=1)),
+            ),
+        ),
+    )
+
+    pending_bookings = BookingRequest.objects.filter(status="new").count()
+    pending_applications = NewClientApplication.objects.filter(status="pending").count()
+
+    upcoming = (
+        BookingRequest.objects.select_related("client")
+        .filter(status__in=("new", "confirmed"), scheduled_start__gte=now)
+        .order_by("scheduled_start")
+        .first()
+    )
+
+    revenue = BookingRequest.objects.filter(
+        status__in=REVENUE_STATUSES,
+        scheduled_start__gte=local_midnight(year_start),
+        scheduled_start__lt=now,
+    ).aggregate(total=Sum("total_price"))["total"]
+    # Completed bookings from earlier in the year may already be archived.
+    archived_revenue = ArchivedBooking.objects.filter(
+        status__in=REVENUE_STATUSES,
+        scheduled_start__gte=local_midnight(year_start),
+        scheduled_start__lt=now,
+    ).aggregate(total=Sum("total_price"))["total"]
+    revenue = (revenue or 0) + (archived_revenue or 0)
+
+    next_appointment = None
+    if upcoming is not None:
+        next_appointment = {
+            "id": upcoming.id,
+            "pet_name": upcoming.pet_name,
+            "client_name": upcoming.client.full_name,
+            "status": upcoming.status,
+            "start": timezone.localtime(upcoming.scheduled_start).isoformat(),
+            "end": (
+                timezone.localtime(upcoming.scheduled_end).isoformat()
+                if upcoming.scheduled_end
+                else None
+            ),
+        }
+
+    return {
+        "today": counts["today"],
+        "week": counts["week"],
+        "pending_bookings": pending_bookings,
+        "pending_applications": pending_applications,
+        "next_appointment": next_appointment,
+        "revenue_to_date": f"{revenue or 0:.2f}",
+        "revenue_since": year_start.isoformat(),
+        "generated_at": timezone.localtime(now).isoformat(),
+    }
+
+
+def dashboard_summary_data():
+    """Dashboard counters, cached until bookings/applications change (or 60s pass)."""
+    versions = caching.get_versions(caching.BOOKINGS, caching.APPLICATIONS)
+    return caching.cached(
+        "dashboard_summary",
+        [versions[caching.BOOKINGS], versions[caching.APPLICATIONS], timezone.localdate()],
+        _build_dashboard_summary,
+        timeout=DASHBOARD_CACHE_SECONDS,
+    )
+
+
+def _warm_dashboard_later():
+    """Refill the dashboard summary in the background after a booking write.
+
+    Only worth a job when the cache is shared: with a per-process cache the
+    worker would just warm its own memory.
+    """
+    if caching.is_shared():
+        jobs.enqueue("warm_dashboard_summary", unique=True)
+
+
+@staff_required
+def dashboard_summary(request):
+    return JsonResponse(dashboard_summary_data())
+
+
 @staff_required
 def calendar_dashboard(request):
-    return render(request, "booking_app/calendar.html")
+    return render(
+        request,
+        "booking_app/calendar.html",
+        {"summary": dashboard_summary_data()},
+    )
 
 
 def availability_dashboard(request):
-    return render(request, "booking_app/availability.html")
+    # Embed this month's summary so the first paint needs no API round trip.
+    # The page lazily fetches other months via /api/availability-summary/.
+    tz = timezone.get_current_timezone()
+    today = timezone.localdate()
+    range_start, range_end = availability.month_range(today.year, today.month, tz)
+    slot = datetime.timedelta(minutes=availability.DEFAULT_SLOT_MINUTES)
+
+    initial_summary = {
+        "month": today.strftime("%Y-%m"),
+        "days": availability.day_summaries(range_start, range_end, slot, slot, tz),
+    }
+    return render(request, "booking_app/availability.html", {"initial_summary": initial_summary})
+
+
+# Archived rows shown on /bookings/?archive=1 (newest first).
+ARCHIVE_LIST_LIMIT = 200
 
 
 @staff_required
+@replica_reads
 def bookings_list(request):
     q = (request.GET.get("q") or "").strip()
 
-    qs = BookingRequest.objects.select_related("client").prefetch_related("services")
+    qs = BookingRequest.objects.select_related("client")
 
     if q:
         qs = qs.filter(
@@ -247,12 +439,29 @@ def bookings_list(request):
         )
     ).order_by("_no_time", "scheduled_start", "-created_at")
 
+    # Old finished bookings live in ArchivedBooking and are only read on request.
+    include_archive = request.GET.get("archive") == "1"
+    archived = None
+    if include_archive:
+        archived = ArchivedBooking.objects.select_related("client")
+        if q:
+            archived = archived.filter(
+                Q(client__full_name__icontains=q)
+                | Q(pet_name__icontains=q)
+                | Q(pet_breed__icontains=q)
+                | Q(address__icontains=q)
+            )
+        archived = archived.order_by("-scheduled_start")[:ARCHIVE_LIST_LIMIT]
+
     return render(
         request,
         "booking_app/booking_list.html",
         {
             "bookings": qs,
             "q": q,
+            "include_archive": include_archive,
+            "archived": archived,
+            "archive_limit": ARCHIVE_LIST_LIMIT,
         },
     )
 
@@ -266,6 +475,7 @@ def applications_list(request):
 
 
 @staff_required
+@replica_reads
 def clients_list(request):
     q = (request.GET.get("q") or "").strip()
     show_inactive = (request.GET.get("show") or "").strip().lower() == "all"
@@ -276,16 +486,30 @@ def clients_list(request):
         qs = qs.filter(is_active=True)
 
     if q:
+        # Phones are stored as digits, so "(312) 555-01" has to be searched as "31255501".
+        digits = normalize_phone(q) if not any(ch.isalpha() for ch in q) else ""
         qs = qs.filter(
             Q(full_name__icontains=q)
-            | Q(phone__icontains=q)
+            | Q(phone__contains=digits or q)
             | Q(address__icontains=q)
         )
 
-    qs = (
-        qs.annotate(last_booking=Max("bookingrequest__scheduled_start"))
-        .order_by("-last_booking", "full_name")
-    )
+    include_archive = request.GET.get("archive") == "1"
+    if include_archive:
+        archived_last = Subquery(
+            ArchivedBooking.objects.filter(client=OuterRef("pk"))
+            .order_by("-scheduled_start")
+            .values("scheduled_start")[:1]
+        )
+        hot_last = Max("bookingrequest__scheduled_start")
+        # Greatest() is NULL if either side is, so fall back to the other.
+        qs = qs.annotate(
+            last_booking=Greatest(Coalesce(hot_last, archived_last), Coalesce(archived_last, hot_last))
+        )
+    else:
+        qs = qs.annotate(last_booking=Max("bookingrequest__scheduled_start"))
+
+    qs = qs.order_by("-last_booking", "full_name")
 
     return render(
         request,
@@ -294,11 +518,13 @@ def clients_list(request):
             "clients": qs,
             "q": q,
             "show": "all" if show_inactive else "active",
+            "include_archive": include_archive,
         },
     )
 
 
 @staff_required
+@replica_reads
 def booking_suggestions(request):
     q = (request.GET.get("q") or "").strip()
 
@@ -349,154 +575,195 @@ def booking_suggestions(request):
     return JsonResponse({"items": items})
 
 
-def calendar_events(request):
-    events = []
+def _calendar_event(booking):
+    start = timezone.localtime(booking.scheduled_start)
+    end = timezone.localtime(booking.scheduled_end) if booking.scheduled_end else None
+
+    title = f"{booking.pet_name} ({booking.client.full_name})"
+    addr = booking.address or booking.client.address
+
+    event = {
+        "id": booking.id,
+        "title": title,
+        "start": start.isoformat(),
+        "url": f"/django-admin/booking_app/bookingrequest/{booking.id}/change/",
+        "extendedProps": {
+            "booking_id": booking.id,
+            "status": booking.status,
+            "address": addr,
+            "groomer": booking.groomer.name if booking.groomer_id else None,
+        },
+    }
+
+    # Backward compatible keys (safe if templates still reference them)
+    event["address"] = addr
+    event["status"] = booking.status
 
+    if end is not None:
+        event["end"] = end.isoformat()
+
+    return event
+
+
+@replica_reads
+def calendar_events(request):
     bookings = (
-        BookingRequest.objects.select_related("client")
+        BookingRequest.objects.select_related("client", "groomer")
         .exclude(status="declined")
         .exclude(scheduled_start__isnull=True)
     )
 
-    for booking in bookings:
-        start = timezone.localtime(booking.scheduled_start)
-        end = timezone.localtime(booking.scheduled_end) if booking.scheduled_end else None
-
-        title = f"{booking.pet_name} ({booking.client.full_name})"
-        addr = booking.address or booking.client.address
-
-        event = {
-            "id": booking.id,
-            "title": title,
-            "start": start.isoformat(),
-            "url": f"/django-admin/booking_app/bookingrequest/{booking.id}/change/",
-            "extendedProps": {
-                "booking_id": booking.id,
-                "status": booking.status,
-                "address": addr,
-            },
-        }
-
-        # Backward compatible keys (safe if templates still reference them)
-        event["address"] = addr
-        event["status"] = booking.status
-
-        if end is not None:
-            event["end"] = end.isoformat()
+    return stream_queryset(bookings, _calendar_event)
 
-        events.append(event)
 
-    return JsonResponse(events, safe=False)
+def _busy_event(row):
+    start, end = row
+    return {
+        "title": "Booked",
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+    }
 
 
+@replica_reads
 def availability_events(request):
-    events = []
-
     bookings = (
         BookingRequest.objects.exclude(status="declined")
         .exclude(scheduled_start__isnull=True)
         .exclude(scheduled_end__isnull=True)
+        .values_list("scheduled_start", "scheduled_end")
     )
 
-    for booking in bookings:
-        events.append(
-            {
-                "title": "Booked",
-                "start": booking.scheduled_start.isoformat(),
-                "end": booking.scheduled_end.isoformat(),
-            }
-        )
+    return stream_queryset(bookings, _busy_event)
+
+
+def _slot_params(request):
+    """(duration, step, {groomer_id, zip_code}) from availability query params."""
+    duration = availability.requested_duration(request.GET)
+    if duration is None:
+        duration = datetime.timedelta(minutes=availability.DEFAULT_SLOT_MINUTES)
+        step = availability.requested_step(request.GET, availability.DEFAULT_SLOT_MINUTES)
+    else:
+        step = availability.requested_step(request.GET, 15)
+
+    groomer_raw = (request.GET.get("groomer") or "").strip()
+    groomer_id = int(groomer_raw) if groomer_raw.isdigit() else None
 
-    return JsonResponse(events, safe=False)
+    zip_code = (request.GET.get("zip") or "").strip()[:10]
 
+    return duration, step, {"groomer_id": groomer_id, "zip_code": zip_code}
 
+
+@replica_reads
 def availability_slots(request):
+    """Open start times between ?start= and ?end=, or for ?month=YYYY-MM.
+
+    By default it returns 60-minute slots on the hour, as before. Pass
+    ?duration=<minutes> or ?services=<id,id> to get every start where that
+    appointment fits, on a ?step= minute grid (default 15). A start is listed
+    when any groomer is free, or only one groomer's free starts with
+    ?groomer=<id>. With ?zip=<zip code> each start also leaves drive time
+    from the previous booking and to the next one.
+    """
     tz = timezone.get_current_timezone()
 
-    start_str = request.GET.get("start")
-    end_str = request.GET.get("end")
+    month = availability.parse_month(request.GET.get("month"))
+    if month is not None:
+        # Month-scoped requests from the public page skip days already gone.
+        range_start, range_end = availability.month_range(*month, tz)
+    else:
+        start_str = request.GET.get("start")
+        end_str = request.GET.get("end")
 
-    if not start_str or not end_str:
-        return JsonResponse([], safe=False)
+        if not start_str or not end_str:
+            return JsonResponse([], safe=False)
 
-    try:
-        range_start = datetime.datetime.fromisoformat(start_str)
-        range_end = datetime.datetime.fromisoformat(end_str)
-    except ValueError:
-        return JsonResponse([], safe=False)
+        try:
+            range_start = datetime.datetime.fromisoformat(start_str)
+            range_end = datetime.datetime.fromisoformat(end_str)
+        except ValueError:
+            return JsonResponse([], safe=False)
 
-    if timezone.is_naive(range_start):
-        range_start = timezone.make_aware(range_start, tz)
-    else:
-        range_start = timezone.localtime(range_start, tz)
+        if timezone.is_naive(range_start):
+            range_start = timezone.make_aware(range_start, tz)
+        else:
+            range_start = timezone.localtime(range_start, tz)
 
-    if timezone.is_naive(range_end):
-        range_end = timezone.make_aware(range_end, tz)
-    else:
-        range_end = timezone.localtime(range_end, tz)
+        if timezone.is_naive(range_end):
+            range_end = timezone.make_aware(range_end, tz)
+        else:
+            range_end = timezone.localtime(range_end, tz)
 
-    busy_qs = (
-        BookingRequest.objects.exclude(status="declined")
-        .exclude(scheduled_start__isnull=True)
-        .exclude(scheduled_end__isnull=True)
-        .filter(scheduled_start__lt=range_end)
-        .filter(scheduled_end__gt=range_start)
-        .values_list("scheduled_start", "scheduled_end")
+        range_end = min(range_end, range_start + datetime.timedelta(days=availability.MAX_RANGE_DAYS))
+
+    duration, step, filters = _slot_params(request)
+
+    return StreamingJsonResponse(
+        availability.iter_available_slots(range_start, range_end, duration, step, tz, **filters)
     )
 
-    busy_blocks = []
-    for s, e in busy_qs:
-        busy_blocks.append((timezone.localtime(s, tz), timezone.localtime(e, tz)))
 
-    def overlaps(a_start, a_end):
-        for b_start, b_end in busy_blocks:
-            if a_start < b_end and a_end > b_start:
-                return True
-        return False
+@replica_reads
+def availability_summary(request):
+    """Per-day openings for ?month=YYYY-MM, for the public month grid.
 
-    slot_minutes = 60
-    open_hour = 9
-    close_hour = 18
+    Each day has its free minutes (summed over groomers) and the first start
+    where the requested appointment fits. It takes the same
+    duration/services/step/groomer/zip parameters as availability_slots.
+    """
+    month = availability.parse_month(request.GET.get("month"))
+    if month is None:
+        return JsonResponse({"ok": False, "error": "month must be YYYY-MM"}, status=400)
 
-    events = []
-    day = range_start.date()
-    last_day = range_end.date()
+    tz = timezone.get_current_timezone()
+    range_start, range_end = availability.month_range(*month, tz)
+    duration, step, filters = _slot_params(request)
 
-    while day <= last_day:
-        day_start = timezone.make_aware(
-            datetime.datetime.combine(day, datetime.time(0, 0)),
-            tz,
-        )
+    return JsonResponse(
+        {
+            "ok": True,
+            "month": f"{month[0]:04d}-{month[1]:02d}",
+            "duration_minutes": int(duration.total_seconds() // 60),
+            "days": availability.day_summaries(range_start, range_end, duration, step, tz, **filters),
+        }
+    )
 
-        work_start = day_start.replace(hour=open_hour, minute=0)
-        work_end = day_start.replace(hour=close_hour, minute=0)
 
-        cur = work_start
-        step = datetime.timedelta(minutes=slot_minutes)
+NEXT_SLOTS_DEFAULT = 5
+NEXT_SLOTS_MAX = 50
+NEXT_SLOTS_HORIZON_DAYS = 90
 
-        while cur + step <= work_end:
-            slot_start = cur
-            slot_end = cur + step
 
-            in_range = slot_start >= range_start and slot_end <= range_end
-            if in_range and not overlaps(slot_start, slot_end):
-                events.append(
-                    {
-                        "title": "Available",
-                        "start": slot_start.isoformat(),
-                        "end": slot_end.isoformat(),
-                    }
-                )
+@replica_reads
+def next_available_slots(request):
+    """The soonest ?count= openings (default 5) within ?horizon= days (default 90).
 
-            cur = slot_end
+    Takes the same duration/services/step/groomer/zip parameters as
+    availability_slots.
+    """
+    try:
+        count = int(request.GET.get("count") or NEXT_SLOTS_DEFAULT)
+        horizon = int(request.GET.get("horizon") or NEXT_SLOTS_HORIZON_DAYS)
+    except ValueError:
+        return JsonResponse({"ok": False, "error": "count and horizon must be integers"}, status=400)
 
-        day = day + datetime.timedelta(days=1)
+    count = max(1, min(count, NEXT_SLOTS_MAX))
+    horizon = max(1, min(horizon, availability.MAX_RANGE_DAYS))
 
-    return JsonResponse(events, safe=False)
+    tz = timezone.get_current_timezone()
+    duration, step, filters = _slot_params(request)
+    starts = availability.next_slot_starts(count, duration, step, horizon, tz, **filters)
+
+    slots = []
+    for start in starts:
+        start = timezone.localtime(start, tz)
+        slots.append({"start": start.isoformat(), "end": (start + duration).isoformat()})
+
+    return JsonResponse({"ok": True, "slots": slots})
 
 
 def _ensure_client_from_application(app):
-    phone = (getattr(app, "phone", "") or "").strip()
+    phone = normalize_phone(getattr(app, "phone", ""))
     address = (getattr(app, "address", "") or "").strip()
     full_name = (getattr(app, "full_name", "") or "").strip()
 
@@ -525,28 +792,115 @@ def _ensure_client_from_application(app):
     return Client.objects.create(**create_kwargs)
 
 
+def _pending_application_item(app):
+    created = getattr(app, "created_at", None)
+    created_iso = created.isoformat() if created else None
+
+    return {
+        "id": app.id,
+        "name": (getattr(app, "full_name", "") or "").strip(),
+        "zip_code": (getattr(app, "zip_code", "") or "").strip(),
+        "address": (getattr(app, "address", "") or "").strip(),
+        "created": created_iso,
+        "status": app.status,
+        "admin_url": (
+            f"/django-admin/booking_app/newclientapplication/{app.id}/change/"
+        ),
+    }
+
+
+APPLICATION_PAGE_SIZE = 50
+APPLICATION_MAX_PAGE_SIZE = 200
+
+
+def _encode_cursor(app):
+    raw = json.dumps([app.created_at.isoformat(), app.id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor):
+    padded = cursor + "=" * (-len(cursor) % 4)
+    created_iso, app_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    return datetime.datetime.fromisoformat(created_iso), int(app_id)
+
+
+def _application_statuses(request):
+    """Statuses requested via ?status=a,b or ?all=1 (default: pending only)."""
+    if (request.GET.get("all") or "").strip() in {"1", "true"}:
+        return None
+
+    raw = (request.GET.get("status") or "pending").strip().lower()
+    if raw == "all":
+        return None
+
+    valid = {value for value, _ in NewClientApplication.STATUS_CHOICES}
+    return [s for s in raw.split(",") if s in valid] or ["pending"]
+
+
+@staff_required
+@replica_reads
 def pending_applications(request):
-    apps = NewClientApplication.objects.filter(status="pending").order_by("-created_at")
-
-    data = []
-    for app in apps:
-        created = getattr(app, "created_at", None)
-        created_iso = created.isoformat() if created else None
-
-        data.append(
-            {
-                "id": app.id,
-                "name": (getattr(app, "full_name", "") or "").strip(),
-                "zip_code": (getattr(app, "zip_code", "") or "").strip(),
-                "address": (getattr(app, "address", "") or "").strip(),
-                "created": created_iso,
-                "admin_url": (
-                    f"/django-admin/booking_app/newclientapplication/{app.id}/change/"
-                ),
-            }
+    """Newest-first applications, one page at a time.
+
+    The body stays a plain JSON array. When more rows exist, the next page's URL
+    is sent in a `Link: <...>; rel="next"` header, and its cursor in
+    `X-Next-Cursor`. Filters: ?status=pending,approved,declined or
+    ?status=all / ?all=1. Page size: ?limit= (max 200).
+    """
+    apps = NewClientApplication.objects.all()
+
+    statuses = _application_statuses(request)
+    if statuses is not None:
+        apps = apps.filter(status__in=statuses)
+
+    try:
+        limit = int(request.GET.get("limit") or APPLICATION_PAGE_SIZE)
+    except ValueError:
+        limit = APPLICATION_PAGE_SIZE
+    limit = max(1, min(limit, APPLICATION_MAX_PAGE_SIZE))
+
+    cursor = (request.GET.get("cursor") or "").strip()
+    if cursor:
+        try:
+            created, app_id = _decode_cursor(cursor)
+        except (ValueError, TypeError):
+            return JsonResponse({"ok": False, "error": "bad_cursor"}, status=400)
+
+        apps = apps.filter(
+            Q(created_at__lt=created) | Q(created_at=created, id__lt=app_id)
         )
 
-    return JsonResponse(data, safe=False)
+    # Fetch one extra row to learn whether another page exists.
+    page = list(apps.order_by("-created_at", "-id")[: limit + 1])
+    has_more = len(page) > limit
+    page = page[:limit]
+
+    response = StreamingJsonResponse(_pending_application_item(app) for app in page)
+
+    if has_more:
+        next_cursor = _encode_cursor(page[-1])
+        params = request.GET.copy()
+        params["cursor"] = next_cursor
+        response["X-Next-Cursor"] = next_cursor
+        response["Link"] = f'<{request.path}?{params.urlencode()}>; rel="next"'
+
+    return response
+
+
+@staff_required
+def application_counts(request):
+    """Application counts per status for dashboard badges (one indexed GROUP BY)."""
+    counts = {value: 0 for value, _ in NewClientApplication.STATUS_CHOICES}
+
+    rows = (
+        NewClientApplication.objects.values("status")
+        .annotate(n=Count("id"))
+        .order_by()
+    )
+    for row in rows:
+        counts[row["status"]] = row["n"]
+
+    return JsonResponse(counts)
 
 
 @staff_required
@@ -558,13 +912,15 @@ def application_action(request, app_id):
     if action not in {"approve", "decline"}:
         return JsonResponse({"ok": False, "error": "bad_action"}, status=400)
 
-    if action == "approve":
-        _ensure_client_from_application(app)
-        app.status = "approved"
-    else:
-        app.status = "declined"
+    with transaction.atomic():
+        if action == "approve":
+            # Approved applicants must be able to book right away (soft gate).
+            _ensure_client_from_application(app)
+            app.status = "approved"
+        else:
+            app.status = "declined"
 
-    app.save(update_fields=["status"])
+        app.save(update_fields=["status"])
 
     return JsonResponse({"ok": True, "status": app.status})
 
@@ -573,19 +929,28 @@ def application_action(request, app_id):
 @staff_required
 @require_POST
 def booking_action(request, booking_id):
-    booking = get_object_or_404(BookingRequest, id=booking_id)
+    booking = get_object_or_404(BookingRequest.objects.select_related("client"), id=booking_id)
 
     action = (request.POST.get("action") or "").strip().lower()
 
     if action not in {"confirm", "decline"}:
         return JsonResponse({"ok": False, "error": "bad_action"}, status=400)
 
+    previous = booking.status
     if action == "confirm":
         booking.status = "confirmed"
     else:
         booking.status = "declined"
 
-    booking.save(update_fields=["status"])
+    # The client message is committed (or rolled back) with the status change.
+    with transaction.atomic():
+        booking.save(update_fields=["status"])
+        if booking.status != previous:
+            kind = "confirmation" if action == "confirm" else "declined"
+            if previous == "confirmed":
+                kind = "cancellation"
+            notifications.queue_booking_message(booking, kind)
+    _warm_dashboard_later()
 
     return JsonResponse({"ok": True, "status": booking.status})
 
@@ -601,14 +966,17 @@ def booking_cancel(request, booking_id):
     Canceling sets the booking to 'declined' so it disappears from the calendar
     and availability calculations.
     """
-    booking = get_object_or_404(BookingRequest, id=booking_id)
+    booking = get_object_or_404(BookingRequest.objects.select_related("client"), id=booking_id)
 
     # Only allow canceling bookings that are not already declined
     if booking.status == "declined":
         return JsonResponse({"ok": True, "status": booking.status})
 
     booking.status = "declined"
-    booking.save(update_fields=["status"])
+    with transaction.atomic():
+        booking.save(update_fields=["status"])
+        notifications.queue_booking_message(booking, "cancellation")
+    _warm_dashboard_later()
 
     return JsonResponse({"ok": True, "status": booking.status})
 
@@ -623,7 +991,7 @@ def booking_reschedule(request, booking_id):
     Expects datetime-local strings in the server's current timezone.
     Uses model validation to prevent overlaps.
     """
-    booking = get_object_or_404(BookingRequest, id=booking_id)
+    booking = get_object_or_404(BookingRequest.objects.select_related("client"), id=booking_id)
 
     start_raw = (request.POST.get("scheduled_start") or "").strip()
     end_raw = (request.POST.get("scheduled_end") or "").strip()
@@ -663,12 +1031,15 @@ def booking_reschedule(request, booking_id):
 
         # Will raise ValidationError on overlaps or invalid ranges
         booking.full_clean()
-        booking.save(update_fields=["scheduled_start", "scheduled_end"])
+        with transaction.atomic():
+            booking.save(update_fields=["scheduled_start", "scheduled_end"])
+            notifications.queue_booking_message(booking, "reschedule")
 
     except ValidationError as e:
         msg = "; ".join(e.messages) if getattr(e, "messages", None) else str(e)
         return JsonResponse({"ok": False, "error": msg}, status=400)
 
+    _warm_dashboard_later()
     return JsonResponse({"ok": True})
 
 
@@ -687,118 +1058,118 @@ def client_action(request, client_id):
     return JsonResponse({"ok": True, "is_active": client.is_active})
 
 
-def _ics_escape(value: str) -> str:
-    """Escape text for iCalendar (RFC 5545)."""
-    if value is None:
-        return ""
+def apple_calendar_feed(request):
+    """Apple Calendar subscription feed (confirmed bookings only).
+
+    Served from the prebuilt snapshot (see calendar_feed.py). Subscribers
+    pass their CalendarSubscription ?token=; signed-in staff need none.
+    """
+    token = request.GET.get("token")
+    if token:
+        if not calendar_feed.valid_token(token):
+            raise Http404("Unknown calendar")
+        return calendar_feed.feed_response(request)
+
+    if not request.user.is_staff:
+        return redirect_to_login(request.get_full_path(), "/login/", "next")
+    return calendar_feed.feed_response(request)
 
-    s = str(value)
-    s = s.replace("\\", "\\\\")
-    s = s.replace(";", "\\;")
-    s = s.replace(",", "\\,")
-    s = s.replace("\r\n", "\\n").replace("\n", "\\n").replace("\r", "\\n")
-    return s
 
+def metrics(request):
+    """Prometheus scrape endpoint.
 
-def _ics_dt(dt: datetime.datetime) -> str:
-    """Format datetimes as UTC iCal timestamps."""
-    if dt is None:
-        return ""
+    Staff sessions can always read it. Scrapers can send
+    `Authorization: Bearer <METRICS_TOKEN>` when that setting is configured.
+    """
+    token = getattr(settings, "METRICS_TOKEN", "")
+    has_token = bool(token) and hmac.compare_digest(
+        request.headers.get("Authorization", "").encode("utf-8"), f"Bearer {token}".encode("utf-8")
+    )
 
-    if timezone.is_naive(dt):
-        dt = timezone.make_aware(dt, timezone.get_current_timezone())
+    if not has_token and not request.user.is_staff:
+        return redirect_to_login(request.get_full_path(), "/login/", "next")
 
-    dt_utc = dt.astimezone(datetime.timezone.utc)
-    return dt_utc.strftime("%Y%m%dT%H%M%SZ")
+    return HttpResponse(
+        app_metrics.render(),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+def _export_response(rows, header, fmt, filename):
+    response = StreamingHttpResponse(
+        exports.iter_encoded(rows, header, fmt), content_type=exports.CONTENT_TYPES[fmt]
+    )
+    response["Content-Disposition"] = f'attachment; filename="{filename}.{fmt}"'
+    response["Cache-Control"] = "no-store"
+    return response
 
 
 @staff_required
-def apple_calendar_feed(request):
-    """Apple Calendar subscription feed (confirmed bookings only)."""
-    now = timezone.now()
+@replica_reads
+def export_bookings(request):
+    """Stream bookings with client and service columns as CSV or JSON Lines.
 
-    qs = (
-        BookingRequest.objects.select_related("client")
-        .prefetch_related("services")
-        .filter(status="confirmed")
-        .exclude(scheduled_start__isnull=True)
-        .exclude(scheduled_end__isnull=True)
-        .order_by("scheduled_start")
+    ?start= / ?end= (YYYY-MM-DD, inclusive) filter on the scheduled start,
+    ?status= may repeat, ?format=csv|jsonl and ?archive=1 adds archived rows.
+    """
+    fmt = (request.GET.get("format") or "csv").strip().lower()
+    if fmt not in exports.FORMATS:
+        return JsonResponse({"ok": False, "error": "bad_format"}, status=400)
+
+    try:
+        start, end = exports.parse_range(request.GET.get("start"), request.GET.get("end"))
+    except ValueError:
+        return JsonResponse({"ok": False, "error": "Invalid date"}, status=400)
+
+    statuses = [s for s in request.GET.getlist("status") if s]
+    rows = exports.iter_bookings(
+        start, end, statuses=statuses, include_archive=request.GET.get("archive") == "1"
     )
 
-    lines = [
-        "BEGIN:VCALENDAR",
-        "VERSION:2.0",
-        "PRODID:-//Naz Mobile Grooming//Booking Calendar//EN",
-        "CALSCALE:GREGORIAN",
-        "METHOD:PUBLISH",
-        "X-WR-CALNAME:Naz Mobile Grooming",
-        "X-WR-TIMEZONE:America/Chicago",
-    ]
+    span = "_".join(
+        filter(None, [(request.GET.get(k) or "").strip() for k in ("start", "end")])
+    ) or "all"
+    return _export_response(rows, exports.BOOKING_HEADER, fmt, f"bookings-{span}")
 
-    for b in qs:
-        start_dt = b.scheduled_start
-        end_dt = b.scheduled_end
-        if not start_dt or not end_dt:
-            continue
 
-        client_name = (getattr(b.client, "full_name", "") or "").strip()
-        pet_name = (getattr(b, "pet_name", "") or "").strip()
+@staff_required
+@replica_reads
+def export_clients(request):
+    fmt = (request.GET.get("format") or "csv").strip().lower()
+    if fmt not in exports.FORMATS:
+        return JsonResponse({"ok": False, "error": "bad_format"}, status=400)
 
-        bits = []
-        if pet_name:
-            bits.append(pet_name)
-        if client_name:
-            bits.append(client_name)
+    rows = exports.iter_clients(include_inactive=(request.GET.get("show") or "all") == "all")
+    return _export_response(rows, exports.CLIENT_HEADER, fmt, "clients")
 
-        summary = " — ".join(bits) if bits else "Booking"
 
-        addr = (getattr(b, "address", "") or "").strip()
-        if not addr:
-            addr = (getattr(b.client, "address", "") or "").strip()
+@staff_required
+def notification_stats(request):
+    return JsonResponse({"ok": True, **notifications.delivery_stats()})
 
-        phone = (getattr(b.client, "phone", "") or "").strip()
 
-        services = []
-        try:
-            for s in b.services.all():
-                name = (getattr(s, "name", "") or "").strip()
-                if name:
-                    services.append(name)
-        except Exception:
-            services = []
-
-        desc = []
-        if addr:
-            desc.append(f"Address: {addr}")
-        if phone:
-            desc.append(f"Phone: {phone}")
-        if services:
-            desc.append("Services: " + ", ".join(services))
-
-        uid = f"booking-{b.id}@naz-mobile-grooming"
-
-        lines.append("BEGIN:VEVENT")
-        lines.append(f"UID:{_ics_escape(uid)}")
-        lines.append(f"DTSTAMP:{_ics_dt(now)}")
-        lines.append(f"DTSTART:{_ics_dt(start_dt)}")
-        lines.append(f"DTEND:{_ics_dt(end_dt)}")
-        lines.append(f"SUMMARY:{_ics_escape(summary)}")
-
-        if addr:
-            lines.append(f"LOCATION:{_ics_escape(addr)}")
-
-        if desc:
-            lines.append(
-                f"DESCRIPTION:{_ics_escape('\n'.join(desc))}"
-            )
+@staff_required
+def profiling_captures(request):
+    return render(
+        request,
+        "booking_app/profiling.html",
+        {
+            "captures": profiling.recent_captures(),
+            "enabled": getattr(settings, "PROFILING_ENABLED", False),
+            "max_captures": getattr(settings, "PROFILING_MAX_CAPTURES", 20),
+        },
+    )
 
-        lines.append("END:VEVENT")
 
-    lines.append("END:VCALENDAR")
+@staff_required
+def profiling_download(request, capture_id):
+    path = profiling.capture_path(capture_id, "prof")
+    if path is None:
+        raise Http404("Unknown capture")
+
+    try:
+        fh = open(path, "rb")
+    except FileNotFoundError:
+        raise Http404("Unknown capture")
 
-    ics = "\r\n".join(lines) + "\r\n"
-    resp = HttpResponse(ics, content_type="text/calendar; charset=utf-8")
-    resp["Content-Disposition"] = "inline; filename=calendar.ics"
-    resp["Cache-Control"] = "no-cache"
-    return resp
\ No newline at end of file
+    return FileResponse(fh, as_attachment=True, filename=f"{capture_id}.prof")
@@ -42,10 +42,15 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    "booking_app.instrumentation.RequestTimingMiddleware",
+    "booking_app.metrics.MetricsMiddleware",
+    "booking_app.routing.ReplicaPinMiddleware",
+    "booking_app.throttling.ThrottleMiddleware",
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    "booking_app.profiling.ProfilingMiddleware",
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -54,7 +59,8 @@ ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Stock DjangoTemplates plus render timing for RequestTimingMiddleware.
+        'BACKEND': 'booking_app.instrumentation.TimedDjangoTemplates',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -78,9 +84,26 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    },
+    # Read replica for read-only views (booking_app.routing). Locally it is a
+    # second, query_only connection to the same file; in production point it
+    # at a streaming replica of the primary.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {'init_command': 'PRAGMA query_only = ON'},
+        'TEST': {'MIRROR': 'default'},
+    },
 }
 
+DATABASE_ROUTERS = ["booking_app.routing.ReplicaRouter"]
+
+# Alias that @replica_reads views read from; None keeps every query on "default".
+# Off by default so the single-SQLite setup behaves exactly as before.
+READ_REPLICA_ALIAS = None
+# After a browser writes, its reads stay on the primary this long (replica lag).
+READ_REPLICA_PIN_SECONDS = 10
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -128,4 +151,108 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 LOGIN_URL = "/login/"
 LOGIN_REDIRECT_URL = "/calendar/"
 LOGOUT_REDIRECT_URL = "/login/"
-SOFT_GATE_BOOKING = True
\ No newline at end of file
+SOFT_GATE_BOOKING = True
+
+# Per-request DB / template / view timings, sent as a Server-Timing header and
+# logged as one JSON line on the "booking_app.timing" logger. Off by default.
+REQUEST_TIMING_ENABLED = False
+
+# /metrics storage: one JSON file per worker process, summed at scrape time.
+# Defaults to a folder under the system temp dir; clear it on deploy.
+METRICS_DIR = None
+METRICS_FLUSH_SECONDS = 5
+# Optional bearer token so Prometheus can scrape /metrics without a staff login.
+METRICS_TOKEN = ""
+
+# Staff-only ?_profile=cpu,mem request captures, listed at /profiling/. Off by default.
+PROFILING_ENABLED = False
+PROFILING_DIR = None
+PROFILING_MAX_CAPTURES = 20
+PROFILING_TRACEMALLOC_FRAMES = 5
+
+# Drive-time buffers for ?zip= availability, estimated from ZipCentroid rows.
+TRAVEL_SPEED_MPH = 25
+TRAVEL_DETOUR_FACTOR = 1.3
+TRAVEL_MIN_MINUTES = 5
+# Cap on any one drive; also bounds how far ?zip= widens the booking query.
+TRAVEL_MAX_MINUTES = 240
+# Buffer around bookings whose zip (or the requester's) has no centroid.
+TRAVEL_UNKNOWN_MINUTES = 0
+# Centroids and zip-pair drive times memoized per process.
+TRAVEL_MEMO_SIZE = 50000
+TRAVEL_VERSION_TTL = 300
+
+# Background jobs (booking_app.jobs), run by `manage.py run_jobs`.
+# JOBS_EAGER runs each job in-process right after the enqueuing commit
+# (ignoring any delay), for setups without a worker.
+JOBS_EAGER = False
+JOBS_POLL_SECONDS = 1.0
+JOBS_MAX_ATTEMPTS = 5
+JOBS_BACKOFF_SECONDS = 10
+JOBS_BACKOFF_MAX_SECONDS = 3600
+JOBS_LOCK_TIMEOUT_SECONDS = 600
+# Finished jobs kept for inspection; `manage.py purge_jobs` deletes older ones.
+JOBS_KEEP_DAYS = 7
+
+# Client notifications (booking_app.notifications), sent by `manage.py send_outbox`.
+NOTIFICATIONS_BACKEND = "booking_app.notifications.MailBackend"
+NOTIFICATIONS_BUSINESS_NAME = "Naz Mobile Grooming"
+# e.g. "txt.example.com" to send SMS as <digits>@txt.example.com; empty = clients
+# without an email get no notifications.
+NOTIFICATIONS_SMS_EMAIL_GATEWAY = ""
+NOTIFICATIONS_REMINDER_HOURS = 24
+NOTIFICATIONS_MAX_ATTEMPTS = 5
+NOTIFICATIONS_CLAIM_TIMEOUT_SECONDS = 600
+NOTIFICATIONS_POLL_SECONDS = 5.0
+DEFAULT_FROM_EMAIL = "bookings@localhost"
+
+# `manage.py archive_bookings` moves finished bookings that ended this long ago
+# into the ArchivedBooking table.
+ARCHIVE_AFTER_DAYS = 180
+
+# Prebuilt calendar.ics (booking_app.calendar_feed). The snapshot and the
+# subscriber token hashes live here; defaults to a folder under the temp dir.
+CALENDAR_FEED_DIR = None
+# Seconds to wait before rebuilding, so a burst of changes costs one rebuild.
+CALENDAR_FEED_REBUILD_DELAY = 5
+# How often each process checks that the snapshot is current (one query);
+# a stale one is rebuilt by the poll itself, so no worker is required.
+CALENDAR_FEED_CHECK_SECONDS = 30
+
+# Admin changelists for bookings and clients show the database's row estimate
+# instead of running COUNT(*) once an unfiltered table is this big.
+ADMIN_ESTIMATED_COUNT_ABOVE = 100000
+
+# Token-bucket limits for the public endpoints (booking_app.throttling), keyed
+# by URL name. "rate" refills each client IP's bucket, "burst" is its size;
+# "route_rate"/"route_burst" cap the route across all clients.
+THROTTLE_ENABLED = True
+THROTTLE_RULES = {
+    "book_request": {"rate": "10/m", "burst": 5, "methods": ("POST",)},
+    "apply": {"rate": "5/m", "burst": 3, "methods": ("POST",)},
+    "availability_slots": {"rate": "60/m", "burst": 20, "route_rate": "1200/m", "route_burst": 200},
+    "booking_suggestions": {"rate": "120/m", "burst": 30},
+    # Each call scans a date range of bookings, so both are capped like slots.
+    "availability_summary": {"rate": "30/m", "burst": 10, "route_rate": "600/m", "route_burst": 100},
+    "next_available_slots": {"rate": "30/m", "burst": 10, "route_rate": "600/m", "route_burst": 100},
+}
+# Cache alias to share buckets across workers; None keeps them per process.
+THROTTLE_CACHE = None
+THROTTLE_MAX_KEYS = 10000
+# Reverse proxies in front of the app that append to X-Forwarded-For (0 = use REMOTE_ADDR).
+THROTTLE_PROXY_COUNT = 0
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "booking_app.timing": {
+            "handlers": ["console"],
+            "level": "INFO",
+            "propagate": False,
+        },
+    },
+}